@@ -1,12 +1,152 @@
-from typing import Dict, Any, Optional
-from core.llm import call_llm
-from core.prompts import ADVISOR_PROMPT
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+import asyncio
+import json
+import os
+import time
+from core.llm import call_llm, stream_llm
+from core.prompts import ADVISOR_PROMPT, ADVISOR_SINGLE_CALL_PROMPT
+from core.tokens import ADVISOR_SUMMARY_BUDGET, compact_metrics, fit_to_budget, token_usage
 from .fundamental import FundamentalAgent
 from .technical import TechnicalAgent
 from .risk import RiskAgent
 from .sentiment import SentimentAgent
 from .news import NewsAgent
 
+# Per-stage deadlines (seconds). ADVISOR_AGENT_TIMEOUT sets the default,
+# ADVISOR_TIMEOUT_<STAGE> overrides a single stage.
+DEFAULT_STAGE_TIMEOUT = float(os.getenv('ADVISOR_AGENT_TIMEOUT', '25'))
+STAGES = ('fundamental', 'technical', 'risk', 'sentiment', 'synthesis')
+SUB_AGENTS = STAGES[:4]
+STAGE_TIMEOUTS = {
+    stage: float(os.getenv(f'ADVISOR_TIMEOUT_{stage.upper()}', DEFAULT_STAGE_TIMEOUT))
+    for stage in STAGES
+}
+# LLM mode: 'multi' (each sub-agent asks the LLM, then a synthesis call) or
+# 'single' (rule-based sub-agents feed one structured JSON completion)
+ADVISOR_MODE = os.getenv('ADVISOR_MODE', 'multi')
+ADVISOR_MODES = ('multi', 'single')
+
+async def _run_stage(name: str, coro, timeout: float) -> Tuple[str, Optional[Any], float, str]:
+    """Await one stage under its deadline; returns (name, result, elapsed ms, status)"""
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(coro, timeout)
+        status = 'ok'
+    except asyncio.TimeoutError:
+        result, status = None, 'timeout'
+    except Exception as e:
+        print(f"Advisor stage '{name}' failed: {e}")
+        result, status = None, 'error'
+    return name, result, round((time.perf_counter() - start) * 1000, 1), status
+
+def _missing(stage: str, timed_out: List[str]) -> str:
+    return "Timed out" if stage in timed_out else "N/A"
+
+def _collect(stages) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, float], List[str], List[str]]:
+    """Split _run_stage tuples into (results, timings, timed_out, failed)"""
+    results = {name: result or {} for name, result, _, _ in stages}
+    timings = {name: elapsed for name, _, elapsed, _ in stages}
+    timed_out = [name for name, _, _, status in stages if status == 'timeout']
+    failed = [name for name, _, _, status in stages if status == 'error']
+    return results, timings, timed_out, failed
+
+def _verdict(results: Dict[str, Dict[str, Any]]) -> Tuple[str, int, int]:
+    """Vote over the agents that answered; returns (verdict, buy votes, sell votes)"""
+    ratings = [
+        results[name].get('rating', default)
+        for name, default in (('fundamental', 'Hold'), ('technical', 'Hold'), ('sentiment', 'Neutral'))
+        if results[name]
+    ]
+    
+    # Simple voting logic
+    buy_votes = ratings.count('Strong Buy') + ratings.count('Buy') + ratings.count('Positive')
+    sell_votes = ratings.count('Sell') + ratings.count('Strong Sell') + ratings.count('Negative')
+    
+    final_verdict = "Hold"
+    if buy_votes > sell_votes and buy_votes >= 2:
+        final_verdict = "Bullish"
+    elif sell_votes > buy_votes and sell_votes >= 2:
+        final_verdict = "Bearish"
+    return final_verdict, buy_votes, sell_votes
+
+def _synthesis_prompt(ticker: str, results: Dict[str, Dict[str, Any]], timed_out: List[str], provider: str) -> str:
+    # Pre-fill the system prompt with data; LLM-written summaries can be long,
+    # so they are cut down to a shared token budget first
+    summaries = {name: results[name].get('summary', _missing(name, timed_out)) for name in SUB_AGENTS}
+    return ADVISOR_PROMPT.format(ticker=ticker, **fit_to_budget(summaries, ADVISOR_SUMMARY_BUDGET, provider))
+
+def _single_call_prompt(ticker: str, results: Dict[str, Dict[str, Any]], timed_out: List[str]) -> str:
+    blocks = {}
+    for name in SUB_AGENTS:
+        res = results[name]
+        if not res or 'error' in res:
+            blocks[name] = json.dumps(_missing(name, timed_out))
+        else:
+            blocks[name] = compact_metrics({"rating": res.get('rating'), "metrics": res.get('key_metrics', {})})
+    return ADVISOR_SINGLE_CALL_PROMPT.format(ticker=ticker, **blocks)
+
+def _parse_sections(reply: str) -> Optional[Dict[str, str]]:
+    """Pull the JSON object out of a single-call reply (tolerates code fences)"""
+    start, end = reply.find('{'), reply.rfind('}')
+    if start < 0 or end <= start:
+        return None
+    try:
+        sections = json.loads(reply[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(sections, dict):
+        return None
+    return {name: text for name, text in sections.items() if isinstance(text, str) and text.strip()}
+
+def _fallback_summary(final_verdict: str, results: Dict[str, Dict[str, Any]], timed_out: List[str]) -> str:
+    summary = f"**AI Advisor Verdict: {final_verdict}**\n\n"
+    for name in SUB_AGENTS:
+        summary += f"• **{name.title()}**: {results[name].get('summary', _missing(name, timed_out))}\n"
+    return summary
+
+def _response(ticker: str, results: Dict[str, Dict[str, Any]], summary: Optional[str],
+              timings: Dict[str, float], timed_out: List[str], failed: List[str], started: float,
+              mode: str = 'multi', synthesis_tokens: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    final_verdict, buy_votes, sell_votes = _verdict(results)
+    # Fallback summary if LLM fails or not configured
+    if not summary:
+        summary = _fallback_summary(final_verdict, results, timed_out)
+    timings['total'] = round((time.perf_counter() - started) * 1000, 1)
+
+    # Estimated LLM tokens per stage (sub-agents report their own)
+    tokens = {name: res['meta']['tokens'] for name, res in results.items() if res.get('meta', {}).get('tokens')}
+    if synthesis_tokens:
+        tokens['synthesis'] = synthesis_tokens
+    tokens['total'] = {
+        side: sum(usage[side] for usage in tokens.values()) for side in ('prompt', 'completion')
+    }
+
+    return {
+        "ticker": ticker,
+        "type": "Advisor",
+        "rating": final_verdict,
+        "summary": summary,
+        "key_metrics": {
+            "Overall Score": f"{buy_votes}/5",
+            "Confidence": "High" if buy_votes > 3 or sell_votes > 3 else "Medium",
+            "Primary Driver": "Fundamentals" if results['fundamental'].get('rating') in ['Buy', 'Sell'] else "Technicals"
+        },
+        # Sub-agent results as the individual endpoints return them (minus chart data)
+        "agents": {
+            name: {k: v for k, v in res.items() if k != 'chart_data'}
+            for name, res in results.items() if res
+        },
+        "meta": {
+            "mode": mode,
+            "timings_ms": timings,
+            "tokens": tokens,
+            "timed_out": timed_out,
+            "failed": failed,
+            # A sub-agent that fell back after an LLM failure degrades the whole answer
+            "partial": bool(timed_out or failed or any(res.get('meta', {}).get('partial') for res in results.values() if res)),
+        }
+    }
+
 class AdvisorAgent:
     def __init__(self):
         self.fundamental = FundamentalAgent()
@@ -14,72 +154,150 @@ class AdvisorAgent:
         self.risk = RiskAgent()
         self.sentiment = SentimentAgent()
 
-    async def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none') -> Dict[str, Any]:
-        # Collect insights from all agents
-        fund_res = await self.fundamental.analyze(ticker, api_key, provider)
-        tech_res = await self.technical.analyze(ticker, period='6mo', api_key=api_key, provider=provider)
-        risk_res = await self.risk.analyze(ticker, api_key, provider)
-        sent_res = await self.sentiment.analyze(ticker, api_key, provider)
-        
-        # Aggregate ratings
-        ratings = [
-            fund_res.get('rating', 'Hold'),
-            tech_res.get('rating', 'Hold'),
-            sent_res.get('rating', 'Neutral')
+    def _stages(self, ticker: str, api_key: Optional[str], provider: Optional[str], model: Optional[str]) -> List:
+        """One deadline-bound stage per sub-agent"""
+        return [
+            _run_stage('fundamental', self.fundamental.analyze(ticker, api_key, provider, model), STAGE_TIMEOUTS['fundamental']),
+            _run_stage('technical', self.technical.analyze(ticker, period='6mo', api_key=api_key, provider=provider, model=model), STAGE_TIMEOUTS['technical']),
+            _run_stage('risk', self.risk.analyze(ticker, api_key, provider, model), STAGE_TIMEOUTS['risk']),
+            _run_stage('sentiment', self.sentiment.analyze(ticker, api_key, provider, model), STAGE_TIMEOUTS['sentiment']),
         ]
-        
-        # Simple voting logic
-        buy_votes = ratings.count('Strong Buy') + ratings.count('Buy') + ratings.count('Positive')
-        sell_votes = ratings.count('Sell') + ratings.count('Strong Sell')
-        
-        final_verdict = "Hold"
-        if buy_votes > sell_votes and buy_votes >= 2:
-            final_verdict = "Bullish"
-        elif sell_votes > buy_votes and sell_votes >= 2:
-            final_verdict = "Bearish"
-        
-        summary = f"**AI Advisor Verdict: {final_verdict}**\n\n"
+
+    async def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none', model: Optional[str] = '',
+                      mode: Optional[str] = None) -> Dict[str, Any]:
+        if api_key and provider != 'none' and (mode or ADVISOR_MODE) == 'single':
+            return await self._analyze_single_call(ticker, api_key, provider, model)
+        started = time.perf_counter()
+        # Collect insights from all agents concurrently, each under its own deadline
+        stages = await asyncio.gather(*self._stages(ticker, api_key, provider, model))
+        results, timings, timed_out, failed = _collect(stages)
+        summary = None
+        synthesis_tokens = None
         
         # LLM Logic for Synthesis
         if api_key and provider != 'none':
             try:
-
-                # Pre-fill the system prompt with data
-                formatted_system_prompt = ADVISOR_PROMPT.format(
-                    ticker=ticker,
-                    fundamental=fund_res.get('summary', 'N/A'),
-                    technical=tech_res.get('summary', 'N/A'),
-                    risk=risk_res.get('summary', 'N/A'),
-                    sentiment=sent_res.get('summary', 'N/A')
+                system_prompt = _synthesis_prompt(ticker, results, timed_out, provider)
+                user_prompt = f"Provide a final investment decision for {ticker}."
+                _, llm_summary, timings['synthesis'], status = await _run_stage(
+                    'synthesis',
+                    call_llm(
+                        provider=provider,
+                        api_key=api_key,
+                        model=model or '',
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt
+                    ),
+                    STAGE_TIMEOUTS['synthesis'],
                 )
-
-                llm_summary = await call_llm(
-                    provider=provider,
-                    api_key=api_key,
-                    model='',
-                    system_prompt=formatted_system_prompt,
-                    user_prompt=f"Provide a final investment decision for {ticker}."
-                )
-                if not llm_summary.startswith("AI Analysis failed"):
+                synthesis_tokens = token_usage(provider, system_prompt, user_prompt, llm_summary)
+                if status == 'timeout':
+                    timed_out.append('synthesis')
+                elif llm_summary and not llm_summary.startswith("AI Analysis failed"):
                     summary = llm_summary
+                else:
+                    failed.append('synthesis')
             except Exception as e:
                 print(f"Advisor Agent LLM Error: {e}")
-                
-        # Fallback summary if LLM fails or not configured
-        if summary.startswith("**AI Advisor Verdict"):
-            summary += f"• **Fundamental**: {fund_res.get('summary', 'N/A')}\n"
-            summary += f"• **Technical**: {tech_res.get('summary', 'N/A')}\n"
-            summary += f"• **Risk**: {risk_res.get('summary', 'N/A')}\n"
-            summary += f"• **Sentiment**: {sent_res.get('summary', 'N/A')}\n"
-        
-        return {
-            "ticker": ticker,
-            "type": "Advisor",
-            "rating": final_verdict,
-            "summary": summary,
-            "key_metrics": {
-                "Overall Score": f"{buy_votes}/5",
-                "Confidence": "High" if buy_votes > 3 or sell_votes > 3 else "Medium",
-                "Primary Driver": "Fundamentals" if fund_res.get('rating') in ['Buy', 'Sell'] else "Technicals"
-            }
-        }
+                failed.append('synthesis')
+
+        return _response(ticker, results, summary, timings, timed_out, failed, started,
+                         synthesis_tokens=synthesis_tokens)
+
+    async def _analyze_single_call(self, ticker: str, api_key: str, provider: str, model: Optional[str]) -> Dict[str, Any]:
+        """One LLM round-trip: rule-based sub-agents supply the metric blocks, the reply is split back per agent"""
+        started = time.perf_counter()
+        stages = await asyncio.gather(*self._stages(ticker, None, 'none', ''))
+        results, timings, timed_out, failed = _collect(stages)
+        summary = None
+
+        system_prompt = _single_call_prompt(ticker, results, timed_out)
+        user_prompt = f"Provide the structured analysis and final investment decision for {ticker} as JSON."
+        _, reply, timings['synthesis'], status = await _run_stage(
+            'synthesis',
+            call_llm(
+                provider=provider,
+                api_key=api_key,
+                model=model or '',
+                system_prompt=system_prompt,
+                user_prompt=user_prompt
+            ),
+            STAGE_TIMEOUTS['synthesis'],
+        )
+        synthesis_tokens = token_usage(provider, system_prompt, user_prompt, reply)
+        if status == 'timeout':
+            timed_out.append('synthesis')
+        elif reply and not reply.startswith("AI Analysis failed"):
+            sections = _parse_sections(reply)
+            if sections is None:
+                print(f"Advisor single-call reply for {ticker} was not valid JSON")
+                failed.append('synthesis')
+            else:
+                for name in SUB_AGENTS:
+                    if results[name] and 'error' not in results[name] and name in sections:
+                        results[name] = {**results[name], "summary": sections[name]}
+                summary = sections.get('verdict')
+        else:
+            # call_llm reports provider errors as text; a degraded result must not be cached as complete
+            failed.append('synthesis')
+
+        return _response(ticker, results, summary, timings, timed_out, failed, started,
+                         mode='single', synthesis_tokens=synthesis_tokens)
+
+    async def stream(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none', model: Optional[str] = '') -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Progressive variant of analyze(), yielding (event, payload) pairs:
+        an 'agent' event per sub-agent as soon as its rule-based result is
+        ready, 'token' events while the LLM synthesis streams, then 'verdict'.
+        """
+        started = time.perf_counter()
+        # Sub-agents skip their own LLM calls here so their results arrive fast
+        tasks = [asyncio.ensure_future(stage) for stage in self._stages(ticker, None, 'none', '')]
+        stages = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                name, result, elapsed, status = await next_done
+                stages.append((name, result, elapsed, status))
+                yield 'agent', {"stage": name, "status": status, "elapsed_ms": elapsed, "result": result}
+        finally:
+            for task in tasks:
+                task.cancel()
+        results, timings, timed_out, failed = _collect(stages)
+        summary = None
+        synthesis_tokens = None
+
+        if api_key and provider != 'none':
+            synthesis_started = time.perf_counter()
+            deadline = synthesis_started + STAGE_TIMEOUTS['synthesis']
+            system_prompt = _synthesis_prompt(ticker, results, timed_out, provider)
+            user_prompt = f"Provide a final investment decision for {ticker}."
+            tokens = stream_llm(
+                provider=provider,
+                api_key=api_key,
+                model=model or '',
+                system_prompt=system_prompt,
+                user_prompt=user_prompt
+            )
+            pieces = []
+            try:
+                while True:
+                    remaining = max(deadline - time.perf_counter(), 0)
+                    piece = await asyncio.wait_for(tokens.__anext__(), remaining)
+                    pieces.append(piece)
+                    yield 'token', {"text": piece}
+            except StopAsyncIteration:
+                summary = ''.join(pieces) or None
+                if summary is None:
+                    failed.append('synthesis')
+            except asyncio.TimeoutError:
+                timed_out.append('synthesis')
+            except Exception as e:
+                print(f"Advisor Agent LLM Error: {e}")
+                failed.append('synthesis')
+            finally:
+                await tokens.aclose()
+            timings['synthesis'] = round((time.perf_counter() - synthesis_started) * 1000, 1)
+            synthesis_tokens = token_usage(provider, system_prompt, user_prompt, ''.join(pieces))
+
+        yield 'verdict', _response(ticker, results, summary, timings, timed_out, failed, started,
+                                   mode='stream', synthesis_tokens=synthesis_tokens)
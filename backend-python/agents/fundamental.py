@@ -1,12 +1,12 @@
 from typing import Dict, Any, Optional
-from core.stock_data import StockDataService
+from core.async_data import AsyncStockDataService
 from core.llm import call_llm
 from core.prompts import FUNDAMENTAL_PROMPT
-import json
+from core.tokens import compact_metrics, token_usage
 
 class FundamentalAgent:
-    async def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none') -> Dict[str, Any]:
-        metrics = StockDataService.get_fundamental_metrics(ticker)
+    async def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none', model: Optional[str] = '') -> Dict[str, Any]:
+        metrics = await AsyncStockDataService.get_fundamental_metrics(ticker)
         
         if not metrics:
             return {
@@ -27,24 +27,33 @@ class FundamentalAgent:
         summary = f"{ticker} has a P/E ratio of {round(pe_ratio, 2)} and ROE of {round(roe*100, 2)}%. "
         summary += "The valuation logic suggests a " + rating + "."
 
+        tokens = {"prompt": 0, "completion": 0}
+        # An LLM failure falls back to the rule-based summary; partial keeps it out of the result cache
+        llm_failed = False
         # LLM Logic (Enhanced)
         if api_key and provider != 'none':
             try:
-                metrics_str = json.dumps(metrics, indent=2)
+                metrics_str = compact_metrics(metrics)
+                system_prompt = FUNDAMENTAL_PROMPT.format(ticker=ticker, metrics=metrics_str)
+                user_prompt = f"Analyze the fundamentals for {ticker}."
                 llm_summary = await call_llm(
                     provider=provider,
                     api_key=api_key,
-                    model='',
-                    system_prompt=FUNDAMENTAL_PROMPT.format(ticker=ticker, metrics=metrics_str),
-                    user_prompt=f"Analyze the fundamentals for {ticker}."
+                    model=model or '',
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt
                 )
-                if not llm_summary.startswith("AI Analysis failed"):
+                tokens = token_usage(provider, system_prompt, user_prompt, llm_summary)
+                if llm_summary and not llm_summary.startswith("AI Analysis failed"):
                     summary = llm_summary
                     # Try to extract rating from text if possible, or keep rule-based rating
                     if "Strong Buy" in summary: rating = "Strong Buy"
                     elif "Strong Sell" in summary: rating = "Strong Sell"
+                else:
+                    llm_failed = True
             except Exception as e:
                 print(f"Fundamental Agent LLM Error: {e}")
+                llm_failed = True
 
         # Format metrics for display
         display_metrics = {
@@ -60,5 +69,6 @@ class FundamentalAgent:
             "type": "Fundamental",
             "rating": rating,
             "summary": summary,
-            "key_metrics": display_metrics
+            "key_metrics": display_metrics,
+            "meta": {"tokens": tokens, "partial": llm_failed}
         }
@@ -1,202 +1,171 @@
-from typing import Dict, Any, Optional
-import yfinance as yf
+import asyncio
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
 from datetime import datetime
-import requests
-import json
+from core.async_data import AsyncStockDataService, data_executor
+from core.http_client import http_client
+from core.news_store import NewsItem, collapse_duplicates, news_store
+
+# Overall deadline for a news request; sources still running are dropped
+NEWS_DEADLINE = float(os.getenv('NEWS_DEADLINE', '8'))
+# Server-side search keys, queried alongside Yahoo even when the request has none
+FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY', '')
+SPIDER_API_KEY = os.getenv('SPIDER_API_KEY', '')
+
+SOURCE_NAMES = {
+    'yahoo': 'Yahoo Finance',
+    'firecrawl': 'Firecrawl',
+    'spider': 'Spider Cloud',
+}
+
+
+def _publisher(link: Optional[str]) -> str:
+    host = urlparse(link or '').netloc
+    return host[4:] if host.startswith('www.') else (host or 'Unknown Source')
+
+
+def _merge(items: List[NewsItem]) -> List[NewsItem]:
+    """Newest first (undated search hits last), one entry per story across sources"""
+    return collapse_duplicates(sorted(items, key=lambda item: -(item.ts or 0)))
+
 
 class NewsAgent:
-    def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none') -> Dict[str, Any]:
-        
-        # Method 1: Firecrawl
-        if provider == 'firecrawl' and api_key:
-            return self._analyze_with_firecrawl(ticker, api_key)
-            
-        # Method 2: Spider Cloud
-        if provider == 'spider' and api_key:
-            return self._analyze_with_spider(ticker, api_key)
-
-        # Method 3: Crawl4AI
-        if provider == 'crawl4ai' and api_key:
-            return self._analyze_with_crawl4ai(ticker, api_key)
-            
-        # Fallback to Yahoo Finance
-        return self._analyze_with_yfinance(ticker)
-    
-    def _analyze_with_firecrawl(self, ticker: str, api_key: str) -> Dict[str, Any]:
-        try:
-            url = "https://api.firecrawl.dev/v0/search"
-            headers = {"Authorization": f"Bearer {api_key}"}
-            payload = {
-                "query": f"latest financial news {ticker} stock market",
-                "limit": 5,
-                "pageOptions": {"onlyMainContent": True}
-            }
-            
-            response = requests.post(url, json=payload, headers=headers)
-            if response.status_code != 200:
-                print(f"Firecrawl API Error: {response.text}")
-                return self._analyze_with_yfinance(ticker)
-                
-            data = response.json()
-            results = data.get('data', [])
-            
-            summary = f"Latest News for {ticker} (via Firecrawl):\n\n"
-            for i, item in enumerate(results[:5], 1):
-                title = item.get('title', 'No Title')
-                link = item.get('url', '#')
-                snippet = item.get('markdown', '')[:100] + "..."
-                summary += f"{i}. **{title}**\n{snippet}\n[Read more]({link})\n\n"
-                
-            return {
-                "ticker": ticker,
-                "type": "News",
-                "rating": "Informational",
-                "summary": summary,
-                "key_metrics": { "Source": "Firecrawl", "Items": len(results), "Mode": "Search" }
-            }
-        except Exception as e:
-            print(f"Firecrawl exception: {e}")
-            return self._analyze_with_yfinance(ticker)
+    def _sources(self, ticker: str, api_key: Optional[str], provider: Optional[str]) -> Dict[str, Any]:
+        """Source name -> coroutine; Yahoo always, search APIs when a key is available"""
+        keys = {'firecrawl': FIRECRAWL_API_KEY, 'spider': SPIDER_API_KEY}
+        if api_key and provider in keys:
+            keys[provider] = api_key
+        elif api_key and provider == 'crawl4ai':
+            print("Crawl4AI selected but requires local library installation. Using the other sources.")
 
-    def _analyze_with_spider(self, ticker: str, api_key: str) -> Dict[str, Any]:
-        try:
-            # Spider Cloud API (Search)
-            url = "https://api.spider.cloud/v1/search"
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            # Strictly adhering to Search API docs (search, limit)
-            payload = {
-                "search": f"latest financial news {ticker}",
-                "limit": 5
-            }
-            
-            response = requests.post(url, json=payload, headers=headers)
-            if response.status_code != 200:
-                print(f"Spider API Error: {response.text}")
-                return self._analyze_with_yfinance(ticker)
-                
-            results = response.json() # Assuming list or data object
-            # Adjust parsing based on actual Spider API response structure
-            if isinstance(results, dict) and 'data' in results:
-                results = results['data']
-            
-            summary = f"Latest News for {ticker} (via Spider Cloud):\n\n"
-            for i, item in enumerate(results[:5], 1):
-                title = item.get('title', 'No Title')
-                link = item.get('url', '#')
-                content = item.get('content', '')[:100] + "..."
-                summary += f"{i}. **{title}**\n{content}\n[Read more]({link})\n\n"
+        sources = {'yahoo': data_executor.run(news_store.get_items, ticker)}
+        if keys['firecrawl']:
+            sources['firecrawl'] = self._fetch_firecrawl(ticker, keys['firecrawl'])
+        if keys['spider']:
+            sources['spider'] = self._fetch_spider(ticker, keys['spider'])
+        return sources
 
-            return {
-                "ticker": ticker,
-                "type": "News",
-                "rating": "Informational",
-                "summary": summary,
-                "key_metrics": { "Source": "Spider Cloud", "Items": len(results), "Mode": "Search" }
-            }
-        except Exception as e:
-            print(f"Spider exception: {e}")
-            return self._analyze_with_yfinance(ticker)
+    async def fetch_items(self, ticker: str, api_key: Optional[str] = None,
+                          provider: Optional[str] = 'none') -> Tuple[List[NewsItem], Dict[str, str], Dict[str, float]]:
+        """
+        Query every source concurrently and merge whatever arrived by the
+        deadline. Returns (items, status per source, timings in ms).
+        """
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        ticker = await AsyncStockDataService.resolve_ticker(ticker)
 
-    def _analyze_with_crawl4ai(self, ticker: str, api_key: str) -> Dict[str, Any]:
-        try:
-            # Crawl4AI placeholder logic
-            print("Crawl4AI selected but requires local library installation. Falling back to yfinance.")
-            return self._analyze_with_yfinance(ticker)
+        async def timed(name, coro):
+            try:
+                return await coro
+            finally:
+                timings[name] = round((time.perf_counter() - started) * 1000, 1)
 
-        except Exception as e:
-            return self._analyze_with_yfinance(ticker)
+        tasks = {
+            asyncio.ensure_future(timed(name, coro)): name
+            for name, coro in self._sources(ticker, api_key, provider).items()
+        }
+        _, pending = await asyncio.wait(tasks, timeout=NEWS_DEADLINE)
+        for task in pending:
+            task.cancel()
+
+        items: List[NewsItem] = []
+        status: Dict[str, str] = {}
+        for task, name in tasks.items():
+            if task in pending:
+                status[name] = 'timeout'
+                timings[name] = round(NEWS_DEADLINE * 1000, 1)
+            elif task.exception() is not None:
+                print(f"{SOURCE_NAMES[name]} news error: {task.exception()}")
+                status[name] = 'error'
+            else:
+                items.extend(task.result())
+                status[name] = 'ok'
+        return _merge(items), status, timings
 
-    def _analyze_with_yfinance(self, ticker: str) -> Dict[str, Any]:
+    async def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none') -> Dict[str, Any]:
         try:
-            stock = yf.Ticker(ticker)
-            news = stock.news
-            
-            if not news:
+            items, status, timings = await self.fetch_items(ticker, api_key, provider)
+            meta = {
+                "partial": any(s != 'ok' for s in status.values()),
+                "sources": status,
+                "timings_ms": timings,
+            }
+            used = [SOURCE_NAMES[name] for name, s in status.items() if s == 'ok']
+
+            if not items:
                 return {
                     "ticker": ticker,
                     "type": "News",
                     "rating": "N/A",
-                    "summary": "No recent news found found via Yahoo Finance.",
-                    "key_metrics": {}
+                    "summary": f"No recent news found via {', '.join(used) or 'any source'}.",
+                    "key_metrics": {},
+                    "meta": meta
                 }
-            
-            # Extract and format headlines with dates
-            summary = f"Latest News Analysis for {ticker} (via Yahoo Finance):\n\n"
-            
-            news_count = 0
+
+            summary = f"Latest News Analysis for {ticker} (via {', '.join(used)}):\n\n"
             latest_date = None
-            valid_items = []
-
-            for n in news:
-                # Handle potential nested structure from Yahoo Finance
-                title = n.get('title')
-                if not title and 'content' in n:
-                    title = n['content'].get('title')
-                
-                if not title: continue
-                
-                publisher = n.get('publisher', 'Unknown Source')
-                if publisher == 'Unknown Source' and 'content' in n:
-                    provider = n['content'].get('provider')
-                    if provider:
-                        publisher = provider.get('displayName', 'Unknown Source')
-
-                # Try to get timestamp
-                ts = n.get('providerPublishTime', 0)
-                
-                # Check nested pubDate if top-level is missing
-                if (ts == 0 or ts is None) and 'content' in n:
-                     pub_date = n['content'].get('pubDate')
-                     if pub_date and isinstance(pub_date, str):
-                         try:
-                             # Handle ISO format like "2026-01-23T21:46:00Z"
-                             pub_date = pub_date.replace('Z', '+00:00')
-                             dt = datetime.fromisoformat(pub_date)
-                             ts = dt.timestamp()
-                         except:
-                             pass
-
-                date_str = "Date Unknown"
-                if ts and isinstance(ts, (int, float)) and ts > 0:
-                    try:
-                        date_str = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M')
-                        if not latest_date: latest_date = date_str
-                    except: pass
-                
-                # Extract Link
-                link = n.get('link')
-                if not link and 'content' in n:
-                    if 'canonicalUrl' in n['content']:
-                         link = n['content']['canonicalUrl'].get('url')
-                    if not link and 'clickThroughUrl' in n['content']:
-                         link = n['content']['clickThroughUrl'].get('url')
-
-                valid_items.append({ "title": title, "publisher": publisher, "date": date_str, "link": link })
-            
-            for i, item in enumerate(valid_items[:8], 1):
-                summary += f"{i}. **{item['date']}** | _{item['publisher']}_\n{item['title']}\n"
-                if item.get('link'):
-                    summary += f"[Read more]({item['link']})\n\n"
+            shown = items[:8]
+            for i, item in enumerate(shown, 1):
+                date_str = datetime.fromtimestamp(item.ts).strftime('%Y-%m-%d %H:%M') if item.ts else "Date Unknown"
+                if item.ts and not latest_date:
+                    latest_date = date_str
+                summary += f"{i}. **{date_str}** | _{item.publisher}_\n{item.title}\n"
+                if item.snippet:
+                    summary += f"{item.snippet}\n"
+                if item.link:
+                    summary += f"[Read more]({item.link})\n\n"
                 else:
                     summary += "\n"
-                news_count += 1
-            
-            if news_count == 0:
-                 return { "ticker": ticker, "type": "News", "rating": "N/A", "summary": "News found but contained no valid titles.", "key_metrics": {} }
 
             return {
                 "ticker": ticker,
                 "type": "News",
-                "rating": "High Activity" if news_count >= 5 else "Moderate Activity",
+                "rating": "High Activity" if len(shown) >= 5 else "Moderate Activity",
                 "summary": summary,
                 "key_metrics": {
-                    "News items retrieved": news_count,
+                    "News items retrieved": len(items),
                     "Latest Update": latest_date or "N/A",
-                    "Primary Source": valid_items[0]['publisher'] if valid_items else "Unknown"
-                }
+                    "Primary Source": shown[0].publisher,
+                    "Sources": ", ".join(used),
+                },
+                "meta": meta
             }
         except Exception as e:
             return { "ticker": ticker, "type": "News", "error": str(e) }
+
+    async def _fetch_firecrawl(self, ticker: str, api_key: str) -> List[NewsItem]:
+        response = await http_client.get().post(
+            "https://api.firecrawl.dev/v0/search",
+            json={
+                "query": f"latest financial news {ticker} stock market",
+                "limit": 5,
+                "pageOptions": {"onlyMainContent": True}
+            },
+            headers={"Authorization": f"Bearer {api_key}"},
+        )
+        response.raise_for_status()
+        return [
+            NewsItem(r.get('title') or 'No Title', _publisher(r.get('url')), None, r.get('url'),
+                     (r.get('markdown') or '')[:100] + "...", 'firecrawl')
+            for r in response.json().get('data', [])[:5]
+        ]
+
+    async def _fetch_spider(self, ticker: str, api_key: str) -> List[NewsItem]:
+        response = await http_client.get().post(
+            "https://api.spider.cloud/v1/search",
+            # Strictly adhering to Search API docs (search, limit)
+            json={"search": f"latest financial news {ticker}", "limit": 5},
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        results = response.json()
+        if isinstance(results, dict) and 'data' in results:
+            results = results['data']
+        return [
+            NewsItem(r.get('title') or 'No Title', _publisher(r.get('url')), None, r.get('url'),
+                     (r.get('content') or '')[:100] + "...", 'spider')
+            for r in results[:5]
+        ]
@@ -1,12 +1,12 @@
 from typing import Dict, Any, Optional
-from core.stock_data import StockDataService
+from core.async_data import AsyncStockDataService
 from core.llm import call_llm
 from core.prompts import RISK_PROMPT
-import json
+from core.tokens import compact_metrics, token_usage
 
 class RiskAgent:
-    async def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none') -> Dict[str, Any]:
-        metrics = StockDataService.get_risk_metrics(ticker)
+    async def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none', model: Optional[str] = '') -> Dict[str, Any]:
+        metrics = await AsyncStockDataService.get_risk_metrics(ticker)
         
         if not metrics:
             return {
@@ -15,34 +15,47 @@ class RiskAgent:
                 "error": "Could not fetch data"
             }
         
-        beta = metrics.get('beta', 1.0)
+        beta = metrics.get('beta')
         sharpe = metrics.get('sharpe_ratio', 0)
         max_dd = metrics.get('max_drawdown', 0)
         
         rating = "Moderate"
-        if beta > 1.5 or max_dd < -30:
+        if (beta is not None and beta > 1.5) or max_dd < -30:
             rating = "High Risk"
-        elif beta < 0.8 and max_dd > -15:
+        elif beta is not None and beta < 0.8 and max_dd > -15:
             rating = "Low Risk"
             
-        summary = f"{ticker} has a Beta of {beta}, indicating it is {('more' if beta > 1 else 'less')} volatile than the market. "
+        if beta is not None:
+            market = metrics.get('benchmark') or "the market"
+            summary = f"{ticker} has a Beta of {beta} against {market}, indicating it is {('more' if beta > 1 else 'less')} volatile than the market. "
+        else:
+            summary = f"Beta is unavailable for {ticker}. "
         summary += f"Max drawdown is {max_dd}%. Sharpe Ratio: {sharpe}."
 
+        tokens = {"prompt": 0, "completion": 0}
+        # An LLM failure falls back to the rule-based summary; partial keeps it out of the result cache
+        llm_failed = False
         # LLM Logic
         if api_key and provider != 'none':
             try:
-                metrics_str = json.dumps(metrics, indent=2)
+                metrics_str = compact_metrics(metrics)
+                system_prompt = RISK_PROMPT.format(ticker=ticker, metrics=metrics_str)
+                user_prompt = f"Analyze the risk profile for {ticker}."
                 llm_summary = await call_llm(
                     provider=provider,
                     api_key=api_key,
-                    model='',
-                    system_prompt=RISK_PROMPT.format(ticker=ticker, metrics=metrics_str),
-                    user_prompt=f"Analyze the risk profile for {ticker}."
+                    model=model or '',
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt
                 )
-                if not llm_summary.startswith("AI Analysis failed"):
+                tokens = token_usage(provider, system_prompt, user_prompt, llm_summary)
+                if llm_summary and not llm_summary.startswith("AI Analysis failed"):
                     summary = llm_summary
+                else:
+                    llm_failed = True
             except Exception as e:
                 print(f"Risk Agent LLM Error: {e}")
+                llm_failed = True
 
         return {
             "ticker": ticker,
@@ -50,9 +63,12 @@ class RiskAgent:
             "rating": rating,
             "summary": summary,
             "key_metrics": {
-                "Beta": beta,
+                "Beta": beta if beta is not None else "N/A",
+                "Correlation": metrics.get('correlation') if metrics.get('correlation') is not None else "N/A",
+                "Tracking Error": f"{metrics.get('tracking_error')}%" if metrics.get('tracking_error') is not None else "N/A",
                 "Max Drawdown": f"{max_dd}%",
                 "Sharpe Ratio": sharpe,
                 "Volatility": f"{metrics.get('volatility', 0)}%"
-            }
+            },
+            "meta": {"tokens": tokens, "partial": llm_failed}
         }
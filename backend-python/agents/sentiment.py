@@ -1,40 +1,67 @@
 from typing import Dict, Any, Optional
+from datetime import datetime
 from core.llm import call_llm
 from core.prompts import SENTIMENT_PROMPT
-import json
+from core.sentiment import aggregate, lexicon_scorer
+from core.tokens import compact_metrics, token_usage
+from .news import NewsAgent
 
 class SentimentAgent:
-    async def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none') -> Dict[str, Any]:
-        # In a real app, this would fetch social media/news sentiment specifically.
-        # We will use a placeholder score.
-        score = 0.65 
-        rating = "Positive"
-        
-        summary = f"Sentiment for {ticker} is generally positive based on recent market activity."
-        
+    async def analyze(self, ticker: str, api_key: Optional[str] = None, provider: Optional[str] = 'none', model: Optional[str] = '') -> Dict[str, Any]:
+        # Headline tone from the local lexicon scorer; no LLM or search keys involved
+        items, status, _ = await NewsAgent().fetch_items(ticker)
+        tones = lexicon_scorer.score_batch([item.title for item in items])
+        sentiment = aggregate(tones, [item.ts for item in items])
+        rating = sentiment['label'] if sentiment['headlines'] else "N/A"
+
+        if sentiment['headlines']:
+            summary = (
+                f"Sentiment for {ticker} is {sentiment['label'].lower()} across {sentiment['headlines']} recent headlines "
+                f"({sentiment['positive']} positive, {sentiment['negative']} negative), trend {sentiment['trend'].lower()}."
+            )
+        else:
+            summary = f"No recent headlines found for {ticker}; sentiment could not be scored."
+
+        tokens = {"prompt": 0, "completion": 0}
+        # An LLM failure falls back to the rule-based summary; partial keeps it out of the result cache
+        llm_failed = False
         # LLM Logic
-        if api_key and provider != 'none':
+        if api_key and provider != 'none' and items:
             try:
-                # We mock metrics/news for now since we don't have a live feed here yet.
-                # In a real scenario, we'd inject data from NewsAgent or Twitter API.
-                mock_metrics = {"social_volume": "High", "news_sentiment": "Positive (0.65)"}
-                metrics_str = json.dumps(mock_metrics, indent=2)
-                
+                metrics_str = compact_metrics({
+                    "news_sentiment": sentiment['score'],
+                    "trend": sentiment['trend'],
+                    "positive": sentiment['positive'],
+                    "negative": sentiment['negative'],
+                    "neutral": sentiment['neutral'],
+                })
+                news_summary = "\n".join(
+                    f"- [{tone:+.1f}] {item.title}"
+                    + (f" ({datetime.fromtimestamp(item.ts).strftime('%Y-%m-%d')})" if item.ts else "")
+                    for item, tone in zip(items[:10], tones[:10])
+                )
+
+                system_prompt = SENTIMENT_PROMPT.format(
+                    ticker=ticker,
+                    metrics=metrics_str,
+                    news_summary=news_summary
+                )
+                user_prompt = f"Analyze the market sentiment for {ticker}."
                 llm_summary = await call_llm(
                     provider=provider,
                     api_key=api_key,
-                    model='',
-                    system_prompt=SENTIMENT_PROMPT.format(
-                        ticker=ticker,
-                        metrics=metrics_str,
-                        news_summary="Recent financial news indicates steady growth and strong earnings potential."
-                    ),
-                    user_prompt=f"Analyze the market sentiment for {ticker}."
+                    model=model or '',
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt
                 )
-                if not llm_summary.startswith("AI Analysis failed"):
+                tokens = token_usage(provider, system_prompt, user_prompt, llm_summary)
+                if llm_summary and not llm_summary.startswith("AI Analysis failed"):
                     summary = llm_summary
+                else:
+                    llm_failed = True
             except Exception as e:
                 print(f"Sentiment Agent LLM Error: {e}")
+                llm_failed = True
 
         return {
             "ticker": ticker,
@@ -42,7 +69,14 @@ class SentimentAgent:
             "rating": rating,
             "summary": summary,
             "key_metrics": {
-                "Sentiment Score": score,
-                "Social Volume": "High"
+                "Sentiment Score": sentiment['score'],
+                "Headlines Scored": sentiment['headlines'],
+                "Positive Headlines": sentiment['positive'],
+                "Negative Headlines": sentiment['negative'],
+                "Trend": sentiment['trend']
+            },
+            "meta": {
+                "tokens": tokens,
+                "partial": llm_failed or any(s != 'ok' for s in status.values())
             }
         }
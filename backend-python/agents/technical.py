@@ -1,12 +1,12 @@
 from typing import Dict, Any, Optional
-from core.stock_data import StockDataService
+from core.async_data import AsyncStockDataService
 from core.llm import call_llm
 from core.prompts import TECHNICAL_PROMPT
-import json
+from core.tokens import compact_metrics, token_usage
 
 class TechnicalAgent:
-    async def analyze(self, ticker: str, period: str = '6mo', api_key: Optional[str] = None, provider: Optional[str] = 'none') -> Dict[str, Any]:
-        metrics = StockDataService.get_technical_metrics(ticker, period)
+    async def analyze(self, ticker: str, period: str = '6mo', api_key: Optional[str] = None, provider: Optional[str] = 'none', model: Optional[str] = '') -> Dict[str, Any]:
+        metrics = await AsyncStockDataService.get_technical_metrics(ticker, period)
         
         if not metrics:
             return {
@@ -31,24 +31,42 @@ class TechnicalAgent:
             rating = "Sell"
             trend = "downtrend"
         
+        rsi = metrics.get('rsi_14')
+        macd_hist = metrics.get('macd_hist')
+
         summary = f"{ticker} is currently at ${current}, showing {trend}. "
         summary += f"Trading relative to SMA20 (${sma_20}). Volatility: {metrics.get('volatility', 0)}%."
+        if rsi is not None:
+            zone = "overbought" if rsi > 70 else "oversold" if rsi < 30 else "neutral"
+            summary += f" RSI(14) is {rsi} ({zone})"
+            if macd_hist is not None:
+                summary += f", MACD is {'above' if macd_hist > 0 else 'below'} its signal line"
+            summary += "."
 
+        tokens = {"prompt": 0, "completion": 0}
+        # An LLM failure falls back to the rule-based summary; partial keeps it out of the result cache
+        llm_failed = False
         # LLM Logic
         if api_key and provider != 'none':
             try:
-                metrics_str = json.dumps(metrics, indent=2)
+                metrics_str = compact_metrics(metrics)
+                system_prompt = TECHNICAL_PROMPT.format(ticker=ticker, metrics=metrics_str, period=period)
+                user_prompt = f"Analyze the technicals for {ticker}."
                 llm_summary = await call_llm(
                     provider=provider,
                     api_key=api_key,
-                    model='',
-                    system_prompt=TECHNICAL_PROMPT.format(ticker=ticker, metrics=metrics_str, period=period),
-                    user_prompt=f"Analyze the technicals for {ticker}."
+                    model=model or '',
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt
                 )
-                if not llm_summary.startswith("AI Analysis failed"):
+                tokens = token_usage(provider, system_prompt, user_prompt, llm_summary)
+                if llm_summary and not llm_summary.startswith("AI Analysis failed"):
                     summary = llm_summary
+                else:
+                    llm_failed = True
             except Exception as e:
                 print(f"Technical Agent LLM Error: {e}")
+                llm_failed = True
 
         return {
             "ticker": ticker,
@@ -59,9 +77,13 @@ class TechnicalAgent:
                 "Current Price": f"${current}",
                 "SMA 20": f"${sma_20}",
                 "SMA 50": f"${sma_50}",
+                "RSI (14)": rsi if rsi is not None else "N/A",
+                "MACD": metrics.get('macd') if metrics.get('macd') is not None else "N/A",
+                "Bollinger": f"${metrics.get('bb_lower')} - ${metrics.get('bb_upper')}" if metrics.get('bb_upper') is not None else "N/A",
                 "Volatility": f"{metrics.get('volatility', 0)}%",
                 "1W Change": f"{metrics.get('price_change_1w', 0)}%",
                 "1M Change": f"{metrics.get('price_change_1m', 0)}%",
             },
-            "chart_data": StockDataService.get_price_history(ticker, period)
+            "chart_data": await AsyncStockDataService.get_price_history(ticker, period),
+            "meta": {"tokens": tokens, "partial": llm_failed}
         }
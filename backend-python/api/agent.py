@@ -1,22 +1,50 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+import asyncio
+import json
 import sys
 import os
+import time
 
 # Add parent directory to path to import core modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.stock_data import StockDataService
+from core.async_data import AsyncStockDataService, data_executor
+from core.cache import snapshot_cache
+from core.symbols import get_symbol_master
+from core.singleflight import SingleFlight
+from core.result_cache import result_cache, ttl_for, FRESH
+from core.llm import complete, stream_llm
+from core.llm_cache import llm_cache
+from core.llm_clients import llm_clients
+from core.http_client import http_client
+from core.news_store import news_store
+from core.screener import compile_expression, panel_cache, screen
+from core.shared_panel import shared_panel
+from core.portfolio_risk import RISK_MC_PATHS, portfolio_risk
+from core.relative_risk import relative_risk
+from core.llm_hedge import hedger
+from core.llm_scheduler import BATCH, INTERACTIVE, llm_priority, llm_scheduler
 from agents.fundamental import FundamentalAgent
 from agents.technical import TechnicalAgent
 from agents.risk import RiskAgent
 from agents.sentiment import SentimentAgent
 from agents.news import NewsAgent
-from agents.advisor import AdvisorAgent
+from agents.advisor import AdvisorAgent, ADVISOR_MODE, ADVISOR_MODES
 
 router = APIRouter()
 
+# Coalesces identical /analyze requests that arrive while one is running
+analysis_flight = SingleFlight('analyze')
+# Background stale-while-revalidate refreshes by analysis key
+_refresh_tasks: Dict[Tuple, asyncio.Task] = {}
+
+# Analyses of one /analyze/batch request that run at the same time
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+BATCH_MAX_TICKERS = int(os.getenv('BATCH_MAX_TICKERS', '500'))
+
 class ChatRequest(BaseModel):
     message: str
     ticker: Optional[str] = None
@@ -30,12 +58,42 @@ class AnalysisRequest(BaseModel):
     apiKey: Optional[str] = None
     provider: Optional[str] = 'none'
     period: Optional[str] = '6mo'
+    model: Optional[str] = ''
+    mode: Optional[str] = None  # Advisor LLM mode: multi | single (default ADVISOR_MODE)
 
-# Helper function to call LLM APIs (Keep as is for Chat)
-async def call_llm(provider: str, api_key: str, model: str, message: str, context: str) -> str:
-    """Call the appropriate LLM API based on provider"""
-    
-    system_prompt = """You are a senior hedge fund analyst and expert stock trader.
+class BatchAnalysisRequest(BaseModel):
+    tickers: List[str]
+    types: List[str] = ['Advisor']  # any AnalysisRequest type, each run for every ticker
+    apiKey: Optional[str] = None
+    provider: Optional[str] = 'none'
+    period: Optional[str] = '6mo'
+    model: Optional[str] = ''
+    mode: Optional[str] = None
+
+class ScreenRequest(BaseModel):
+    filter: Optional[str] = None  # e.g. "close > sma_50 and pe_ratio < 20 and roe > 0.15"
+    rank: Optional[str] = None  # expression to sort matches by, e.g. "roe" or "-pe_ratio"
+    descending: bool = True
+    limit: int = 50
+    universe: Optional[str] = 'NSE'  # NSE | US | BSE | ALL (bundled listings), ignored when symbols is set
+    symbols: Optional[List[str]] = None
+    period: str = '1y'
+
+class Holding(BaseModel):
+    ticker: str
+    weight: float  # any scale (fractions, percent, market value); normalized to sum to one
+
+class PortfolioRiskRequest(BaseModel):
+    holdings: List[Holding]
+    confidence: List[float] = [0.95, 0.99]
+    horizon: int = 1  # trading days
+    period: str = '1y'  # return history behind the estimates
+    paths: int = RISK_MC_PATHS
+    seed: Optional[int] = None  # fixes the Monte Carlo draws
+    df: Optional[float] = None  # Student-t degrees of freedom for fat-tailed draws (normal when unset)
+    value: Optional[float] = None  # portfolio value, to also report losses as amounts
+
+CHAT_SYSTEM_PROMPT = """You are a senior hedge fund analyst and expert stock trader.
     Your goal is to provide specific, data-driven, and actionable investment advice.
     
     When answering questions:
@@ -48,65 +106,66 @@ async def call_llm(provider: str, api_key: str, model: str, message: str, contex
     
     Context Data:
     """
+
+# Helper function to call LLM APIs for Chat (pooled clients, see core/llm.py)
+async def call_llm(provider: str, api_key: str, model: str, message: str, context: str) -> str:
+    """Call the appropriate LLM API based on provider"""
     user_prompt = f"{context}\n\nUser Question: {message}"
-    
-    if provider == 'openai':
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    
-    elif provider == 'anthropic':
-        import anthropic
-        client = anthropic.Anthropic(api_key=api_key)
-        message = client.messages.create(
-            model=model or "claude-3-5-sonnet-20241022",
-            max_tokens=1024,
-            messages=[
-                {"role": "user", "content": f"{system_prompt}\n\n{user_prompt}"}
-            ]
-        )
-        return message.content[0].text
-    
-    elif provider == 'google':
-        import google.generativeai as genai
-        genai.configure(api_key=api_key)
-        model_instance = genai.GenerativeModel(model or 'gemini-pro')
-        response = model_instance.generate_content(f"{system_prompt}\n\n{user_prompt}")
-        return response.text
-    
+    return await complete(provider, api_key, model, CHAT_SYSTEM_PROMPT, user_prompt, priority=INTERACTIVE)
+
+async def stock_context(ticker: Optional[str]) -> str:
+    """One-line quote context for the chat LLM prompt"""
+    if not ticker:
+        return ""
+    stock_info = await AsyncStockDataService.get_stock_info(ticker)
+    if not stock_info:
+        return ""
+    return f"Stock: {ticker}, Price: ${stock_info.get('price', 'N/A')}, Change: {stock_info.get('change', 0):.2f}%, Sector: {stock_info.get('sector', 'N/A')}"
+
+async def default_chat_reply(request: ChatRequest) -> str:
+    """Rule-based chat answer used without an LLM (or when the LLM call fails)"""
+    message = request.message.lower()
+    if request.ticker:
+        stock_info = await AsyncStockDataService.get_stock_info(request.ticker)
+        if stock_info:
+            price = stock_info.get('price', 'N/A')
+            change = stock_info.get('change', 0)
+            direction = "up" if change > 0 else "down"
+            
+            response_text = f"I'm analyzing {request.ticker} for you. "
+            response_text += f"Current price is ${price}, {direction} {abs(change):.2f}% today. "
+            
+            if "buy" in message or "invest" in message:
+                response_text += "Based on current market conditions, I recommend reviewing the fundamental and technical analysis tabs for a comprehensive view before making investment decisions."
+            elif "risk" in message:
+                response_text += "Check out the Risk Analysis tab to see detailed risk metrics including beta, max drawdown, and Sharpe ratio."
+            elif "price" in message or "cost" in message:
+                response_text += f"The stock is currently trading at ${price}. Historical data shows it's been quite active recently."
+            else:
+                response_text += "What specific aspect would you like to know more about? I can help with fundamentals, technicals, or risk analysis."
+                if not request.apiKey:
+                    response_text += " (Tip: Add an API key in Credentials for AI-powered insights!)"
+        else:
+            response_text = f"I'm having trouble fetching data for {request.ticker}. Please verify the ticker symbol is correct."
     else:
-        raise ValueError(f"Unsupported provider: {provider}")
+        response_text = "Hello! I'm your AI stock advisor. Please select a stock ticker using the input at the top, and I'll provide detailed analysis and insights."
+        if not request.apiKey:
+            response_text += " (Tip: Configure an LLM API key in the Credentials page for enhanced AI responses!)"
+    return response_text
 
 @router.post("/chat")
 async def chat_with_agent(request: ChatRequest):
     try:
-        ticker = request.ticker or "the market"
-        message = request.message.lower()
-        
         # Check if API key is provided for LLM call
         if request.apiKey and request.provider != 'none':
             try:
-                # Get stock context
-                stock_context = ""
-                if request.ticker:
-                    stock_info = StockDataService.get_stock_info(request.ticker)
-                    if stock_info:
-                        stock_context = f"Stock: {request.ticker}, Price: ${stock_info.get('price', 'N/A')}, Change: {stock_info.get('change', 0):.2f}%, Sector: {stock_info.get('sector', 'N/A')}"
-                
                 # Make LLM call based on provider
                 llm_response = await call_llm(
                     provider=request.provider,
                     api_key=request.apiKey,
                     model=request.model or 'gpt-4',
                     message=request.message,
-                    context=stock_context
+                    context=await stock_context(request.ticker)
                 )
                 
                 return {
@@ -119,85 +178,389 @@ async def chat_with_agent(request: ChatRequest):
                 # Fall through to default response
         
         # Default response with stock data (no LLM)
-        if request.ticker:
-            stock_info = StockDataService.get_stock_info(request.ticker)
-            if stock_info:
-                price = stock_info.get('price', 'N/A')
-                change = stock_info.get('change', 0)
-                direction = "up" if change > 0 else "down"
-                
-                response_text = f"I'm analyzing {request.ticker} for you. "
-                response_text += f"Current price is ${price}, {direction} {abs(change):.2f}% today. "
-                
-                if "buy" in message or "invest" in message:
-                    response_text += "Based on current market conditions, I recommend reviewing the fundamental and technical analysis tabs for a comprehensive view before making investment decisions."
-                elif "risk" in message:
-                    response_text += "Check out the Risk Analysis tab to see detailed risk metrics including beta, max drawdown, and Sharpe ratio."
-                elif "price" in message or "cost" in message:
-                    response_text += f"The stock is currently trading at ${price}. Historical data shows it's been quite active recently."
-                else:
-                    response_text += "What specific aspect would you like to know more about? I can help with fundamentals, technicals, or risk analysis."
-                    if not request.apiKey:
-                        response_text += " (Tip: Add an API key in Credentials for AI-powered insights!)"
-            else:
-                response_text = f"I'm having trouble fetching data for {request.ticker}. Please verify the ticker symbol is correct."
-        else:
-            response_text = "Hello! I'm your AI stock advisor. Please select a stock ticker using the input at the top, and I'll provide detailed analysis and insights."
-            if not request.apiKey:
-                response_text += " (Tip: Configure an LLM API key in the Credentials page for enhanced AI responses!)"
-        
         return {
             "sender": "AI Advisor",
-            "text": response_text,
+            "text": await default_chat_reply(request),
             "timestamp": "2026-01-24T00:20:00Z"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/analyze")
-async def analyze_stock(request: AnalysisRequest):
-    try:
-        analysis_type = request.type.lower()
-        
-        if analysis_type == "fundamental":
-            agent = FundamentalAgent()
-            return await agent.analyze(request.ticker, request.apiKey, request.provider)
-        
-        elif analysis_type == "technical":
-            agent = TechnicalAgent()
-            return await agent.analyze(request.ticker, request.period or '6mo', request.apiKey, request.provider)
-        
-        elif analysis_type == "risk":
-            agent = RiskAgent()
-            return await agent.analyze(request.ticker, request.apiKey, request.provider)
+def sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    # Proxies (nginx) must not buffer, or events arrive all at once
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/chat/stream")
+async def chat_with_agent_stream(request: ChatRequest):
+    """Chat over SSE: 'token' events while the LLM answers, then 'done'"""
+    async def events():
+        text = ""
+        if request.apiKey and request.provider != 'none':
+            try:
+                tokens = stream_llm(
+                    provider=request.provider,
+                    api_key=request.apiKey,
+                    model=request.model or 'gpt-4',
+                    system_prompt=CHAT_SYSTEM_PROMPT,
+                    user_prompt=f"{await stock_context(request.ticker)}\n\nUser Question: {request.message}",
+                    use_cache=False,
+                    priority=INTERACTIVE
+                )
+                async for piece in tokens:
+                    text += piece
+                    yield sse("token", {"text": piece})
+            except Exception as e:
+                print(f"LLM stream failed: {e}")
+                if text:
+                    yield sse("error", {"detail": str(e)})
+        try:
+            if not text:
+                text = await default_chat_reply(request)
+                yield sse("token", {"text": text})
+            yield sse("done", {"sender": "AI Advisor", "text": text, "timestamp": "2026-01-24T00:20:00Z"})
+        except Exception as e:
+            yield sse("error", {"detail": str(e)})
+
+    return sse_response(events())
+
+@router.get("/symbols/search")
+async def search_symbols(q: str, limit: int = 10):
+    """Ticker autocomplete served from the offline symbol master"""
+    limit = max(1, min(limit, 50))
+    return {"query": q, "results": get_symbol_master().search(q, limit)}
+
+@router.get("/live/{ticker}")
+async def live_indicators(ticker: str):
+    """Incrementally maintained indicators at the latest quote"""
+    result = await AsyncStockDataService.get_live_indicators(ticker)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No data for {ticker}")
+    return result
+
+@router.get("/metrics")
+async def get_metrics():
+    """Cache and data-layer counters for this worker"""
+    return {
+        "snapshot_cache": snapshot_cache.stats(),
+        "data_executor": data_executor.stats(),
+        "analysis_singleflight": analysis_flight.stats(),
+        "result_cache": result_cache.stats(),
+        "llm_clients": llm_clients.stats(),
+        "llm_cache": llm_cache.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "llm_hedging": hedger.stats(),
+        "http_client": http_client.stats(),
+        "news_store": news_store.stats(),
+        "screener": panel_cache.stats(),
+        "shared_panel": shared_panel.stats(),
+    }
+
+async def run_analysis(request: AnalysisRequest) -> Dict[str, Any]:
+    """Dispatch an analysis request to its agent"""
+    analysis_type = request.type.lower()
+    
+    if analysis_type == "fundamental":
+        agent = FundamentalAgent()
+        return await agent.analyze(request.ticker, request.apiKey, request.provider, request.model)
+    
+    elif analysis_type == "technical":
+        agent = TechnicalAgent()
+        return await agent.analyze(request.ticker, request.period or '6mo', request.apiKey, request.provider, request.model)
+    
+    elif analysis_type == "risk":
+        agent = RiskAgent()
+        return await agent.analyze(request.ticker, request.apiKey, request.provider, request.model)
+    
+    elif analysis_type == "sentiment":
+        agent = SentimentAgent()
+        return await agent.analyze(request.ticker, request.apiKey, request.provider, request.model)
         
-        elif analysis_type == "sentiment":
-            agent = SentimentAgent()
-            return await agent.analyze(request.ticker, request.apiKey, request.provider)
-            
-        elif analysis_type == "news":
-            agent = NewsAgent()
-            # News agent analyze is likely synchronous? No, let's keep it sync or make async?
-            # Steps 1356 showed NewsAgent as sync def analyze. 
-            # I should keep it sync or wrap it?
-            # Python allows awaiting, but if it returns dict immediately, await fails.
-            # I'll check NewsAgent. It uses 'def analyze'.
-            # I won't await NewsAgent unless I updated it to async.
-            return agent.analyze(request.ticker, request.apiKey, request.provider)
-            
-        elif analysis_type == "advisor":
-            agent = AdvisorAgent()
-            return await agent.analyze(request.ticker, request.apiKey, request.provider)
+    elif analysis_type == "news":
+        agent = NewsAgent()
+        return await agent.analyze(request.ticker, request.apiKey, request.provider)
         
-        else:
-            return {
-                "ticker": request.ticker,
-                "type": request.type,
-                "rating": "Neutral",
-                "summary": f"Analysis type '{request.type}' not supported yet.",
-                "key_metrics": {},
-                "timestamp": "2026-01-24T00:25:00Z"
-            }
+    elif analysis_type == "advisor":
+        agent = AdvisorAgent()
+        return await agent.analyze(request.ticker, request.apiKey, request.provider, request.model, request.mode)
     
+    else:
+        return {
+            "ticker": request.ticker,
+            "type": request.type,
+            "rating": "Neutral",
+            "summary": f"Analysis type '{request.type}' not supported yet.",
+            "key_metrics": {},
+            "timestamp": "2026-01-24T00:25:00Z"
+        }
+
+async def analysis_key(request: AnalysisRequest) -> Tuple:
+    """Normalized identity of an analysis: requests with equal keys get equal answers"""
+    analysis_type = request.type.lower()
+    ticker = await AsyncStockDataService.resolve_ticker(request.ticker)
+    # Without a key every agent falls back to its rule-based path
+    provider = (request.provider or 'none').lower() if request.apiKey else 'none'
+    model = (request.model or '') if provider != 'none' else ''
+    # Only the technical agent looks at the period, only the LLM Advisor at the mode
+    variant = ''
+    if analysis_type == "technical":
+        variant = request.period or '6mo'
+    elif analysis_type == "advisor" and provider != 'none':
+        variant = request.mode or ADVISOR_MODE
+    return (ticker, analysis_type, variant, provider, model)
+
+def store_result(key: Tuple, result: Dict[str, Any]) -> None:
+    """Keep a computed analysis unless it failed or is partial"""
+    partial = isinstance(result.get("meta"), dict) and result["meta"].get("partial")
+    if "error" not in result and not partial:
+        ticker, analysis_type = key[0], key[1]
+        result_cache.store(key, result, ttl_for(analysis_type, ticker))
+
+async def compute_and_cache(key: Tuple, request: AnalysisRequest) -> Dict[str, Any]:
+    """Run an analysis and keep the result unless it failed or is partial"""
+    result = await run_analysis(request)
+    store_result(key, result)
+    return result
+
+def refresh_in_background(key: Tuple, request: AnalysisRequest) -> None:
+    """Revalidate a stale entry without making the caller wait"""
+    if key in _refresh_tasks or analysis_flight.in_flight(key):
+        return
+    result_cache.refreshes += 1
+
+    async def refresh():
+        try:
+            await analysis_flight.do(key, lambda: compute_and_cache(key, request))
+        except Exception as e:
+            print(f"Error refreshing cached analysis {key}: {e}")
+
+    _refresh_tasks[key] = asyncio.create_task(refresh())
+    _refresh_tasks[key].add_done_callback(lambda _, key=key: _refresh_tasks.pop(key, None))
+
+def wants_bypass(cache_control: Optional[str], x_cache_bypass: Optional[str]) -> bool:
+    if x_cache_bypass and x_cache_bypass.lower() not in ("0", "false", "no"):
+        return True
+    directives = (cache_control or "").lower()
+    return "no-cache" in directives or "no-store" in directives
+
+def cached_analysis(key: Tuple, request: AnalysisRequest, bypass: bool) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Result-cache lookup: (X-Cache label, cached result or None)"""
+    if bypass:
+        result_cache.bypasses += 1
+        return "BYPASS", None
+    state, cached = result_cache.lookup(key)
+    if state is None:
+        return "MISS", None
+    if state != FRESH:
+        refresh_in_background(key, request)
+    return ("HIT" if state == FRESH else "STALE"), cached
+
+@router.post("/analyze")
+async def analyze_stock(
+    request: AnalysisRequest,
+    response: Response,
+    cache_control: Optional[str] = Header(None),
+    x_cache_bypass: Optional[str] = Header(None),
+):
+    if request.mode and request.mode not in ADVISOR_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(ADVISOR_MODES)}")
+    try:
+        key = await analysis_key(request)
+        response.headers["X-Cache"], cached = cached_analysis(key, request, wants_bypass(cache_control, x_cache_bypass))
+        if cached is not None:
+            return cached
+        # Identical requests already in flight share one computation
+        return await analysis_flight.do(key, lambda: compute_and_cache(key, request))
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/stream")
+async def analyze_stock_stream(
+    request: AnalysisRequest,
+    cache_control: Optional[str] = Header(None),
+    x_cache_bypass: Optional[str] = Header(None),
+):
+    """
+    /analyze over SSE. Emits 'start' immediately, an 'agent' event per
+    rule-based result as it is ready, 'token' events while the LLM writes,
+    and finally 'verdict' with the same payload /analyze would return.
+    """
+    if request.mode and request.mode not in ADVISOR_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(ADVISOR_MODES)}")
+    bypass = wants_bypass(cache_control, x_cache_bypass)
+    use_llm = bool(request.apiKey) and request.provider != 'none'
+
+    async def events():
+        yield sse("start", {"ticker": request.ticker, "type": request.type})
+        try:
+            key = await analysis_key(request)
+            ticker, analysis_type, variant = key[0], key[1], key[2]
+            # Single-call mode has one LLM reply to wait for; it takes the non-streaming path below
+            if analysis_type == "advisor" and variant != "single":
+                # Streamed verdicts come from rule-based sub-agents, so they are
+                # cached apart from /analyze results; a stale one is streamed again
+                key = (ticker, analysis_type, "stream") + key[3:]
+                if bypass:
+                    result_cache.bypasses += 1
+                state, cached = (None, None) if bypass else result_cache.lookup(key)
+                if state == FRESH:
+                    yield sse("verdict", {**cached, "cache": "HIT"})
+                    return
+                async for event, payload in AdvisorAgent().stream(ticker, request.apiKey, request.provider, request.model):
+                    if event == "verdict":
+                        store_result(key, payload)
+                    yield sse(event, payload)
+                return
+            label, cached = cached_analysis(key, request, bypass)
+            if cached is not None:
+                yield sse("verdict", {**cached, "cache": label})
+                return
+            if use_llm and analysis_type != "news":
+                # The rule-based answer is quick; show it while the LLM works
+                rule_based = await run_analysis(request.model_copy(update={"apiKey": None, "provider": "none"}))
+                yield sse("agent", {"stage": analysis_type, "status": "ok", "result": rule_based})
+            yield sse("verdict", await analysis_flight.do(key, lambda: compute_and_cache(key, request)))
+        except Exception as e:
+            yield sse("error", {"detail": str(e)})
+
+    return sse_response(events())
+
+@router.post("/analyze/batch")
+async def analyze_batch(
+    request: BatchAnalysisRequest,
+    cache_control: Optional[str] = Header(None),
+    x_cache_bypass: Optional[str] = Header(None),
+):
+    """
+    Analyze a watchlist: every (ticker, type) pair goes through the same
+    cache and coalescing path as /analyze. Results stream back as NDJSON,
+    one line per pair in completion order, then a summary line. A failing
+    ticker yields an error line; the rest of the batch carries on.
+    """
+    if request.mode and request.mode not in ADVISOR_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(ADVISOR_MODES)}")
+    tickers = list(dict.fromkeys(t.strip() for t in request.tickers if t and t.strip()))
+    if not tickers or not request.types:
+        raise HTTPException(status_code=400, detail="tickers and types must not be empty")
+    if len(tickers) > BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"at most {BATCH_MAX_TICKERS} tickers per batch")
+    bypass = wants_bypass(cache_control, x_cache_bypass)
+    fields = request.model_dump(exclude={"tickers", "types"})
+
+    async def analyze_one(ticker: str, analysis_type: str, limit: asyncio.Semaphore) -> Dict[str, Any]:
+        async with limit:
+            single = AnalysisRequest(ticker=ticker, type=analysis_type, **fields)
+            try:
+                key = await analysis_key(single)
+                label, result = cached_analysis(key, single, bypass)
+                if result is None:
+                    result = await analysis_flight.do(key, lambda: compute_and_cache(key, single))
+                status = "error" if "error" in result else "ok"
+                return {"ticker": ticker, "type": analysis_type, "status": status, "cache": label, "result": result}
+            except Exception as e:
+                print(f"Error in batch analysis for {ticker} ({analysis_type}): {e}")
+                return {"ticker": ticker, "type": analysis_type, "status": "error", "error": str(e)}
+
+    async def lines():
+        started = time.perf_counter()
+        resolved = await asyncio.gather(
+            *(AsyncStockDataService.resolve_ticker(t) for t in tickers), return_exceptions=True
+        )
+        # One bulk download warms the history of every symbol before the agents ask for it
+        symbols = [s for s in resolved if isinstance(s, str)]
+        prefetch = await AsyncStockDataService.prefetch_history(symbols)
+        if {"risk", "advisor"} & {t.lower() for t in request.types}:
+            # Betas for the whole watchlist in one matrix pass per benchmark; the risk agents then hit the cache
+            try:
+                await data_executor.run(relative_risk, symbols)
+            except Exception as e:
+                print(f"Error computing relative risk for batch: {e}")
+
+        limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+        # LLM calls from the batch queue behind interactive and single analyses
+        with llm_priority(BATCH):
+            tasks = [
+                asyncio.create_task(analyze_one(ticker, analysis_type, limit))
+                for ticker in tickers for analysis_type in request.types
+            ]
+        failed = 0
+        try:
+            for task in asyncio.as_completed(tasks):
+                line = await task
+                failed += line["status"] != "ok"
+                yield json.dumps(line, default=str) + "\n"
+            yield json.dumps({
+                "done": True,
+                "count": len(tasks),
+                "failed": failed,
+                "prefetch": prefetch,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }) + "\n"
+        finally:
+            # Client went away: stop the analyses nobody will read
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+@router.post("/screen")
+async def screen_universe(request: ScreenRequest):
+    """
+    Filter and rank a universe with expressions over indicator and
+    fundamental fields, evaluated as whole-array operations on a cached
+    (symbols x days) panel.
+    """
+    try:
+        for source in (request.filter, request.rank):
+            if source:
+                compile_expression(source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if request.symbols:
+        symbols = list(await asyncio.gather(*(AsyncStockDataService.resolve_ticker(s) for s in request.symbols)))
+    else:
+        universe = (request.universe or 'NSE').upper()
+        symbols = get_symbol_master().tickers(None if universe == 'ALL' else universe)
+    if not symbols:
+        raise HTTPException(status_code=400, detail="empty universe")
+
+    try:
+        panel = await data_executor.run(panel_cache.get, symbols, request.period)
+        return screen(panel, request.filter, request.rank, request.descending, max(1, min(request.limit, 1000)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/risk/portfolio")
+async def analyze_portfolio_risk(request: PortfolioRiskRequest):
+    """
+    Historical, parametric and Monte Carlo VaR/CVaR for a weighted
+    portfolio, with each position's share of the risk.
+    """
+    if not request.holdings:
+        raise HTTPException(status_code=400, detail="no holdings")
+    symbols = await asyncio.gather(*(AsyncStockDataService.resolve_ticker(h.ticker) for h in request.holdings))
+    holdings: Dict[str, float] = {}
+    for symbol, holding in zip(symbols, request.holdings):
+        holdings[symbol] = holdings.get(symbol, 0.0) + holding.weight
+
+    try:
+        return await data_executor.run(
+            portfolio_risk, holdings, request.confidence, request.horizon, request.period,
+            request.paths, request.seed, request.df, request.value,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,82 @@
+"""
+Advisor LLM modes side by side: 'multi' (four sub-agent completions plus a
+synthesis) vs 'single' (one structured JSON completion).
+
+    python benchmarks/bench_advisor_modes.py --runs 5 --latency 0.5 --per-token 0.01
+
+Market data comes from a fixed in-process fake and completions from the
+local mock server, whose reply time is latency + per_token x reply tokens.
+Reply lengths mimic what each prompt asks for, so the comparison shows
+round-trips and prompt/completion token volume rather than model quality.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure real completions, not the response cache
+os.environ['LLM_CACHE_TTL'] = '0'
+
+from mock_llm import USAGE, reset_usage, start_mock_server
+from bench_concurrency import install_fake_upstream
+
+WORD = "insight "
+
+
+def mock_reply(body: dict) -> str:
+    system = body["messages"][0]["content"]
+    if "Respond with ONLY a JSON object" in system:
+        sections = {name: WORD * 120 for name in ('fundamental', 'technical', 'risk', 'sentiment')}
+        sections["verdict"] = WORD * 300
+        return json.dumps(sections)
+    if "FINAL INVESTMENT DECISION" in system:
+        return WORD * 400
+    return WORD * 250
+
+
+async def run_mode(mode: str, runs: int, api_key: str):
+    from agents.advisor import AdvisorAgent
+
+    reset_usage()
+    latencies = []
+    estimated = 0
+    for i in range(runs):
+        start = time.perf_counter()
+        result = await AdvisorAgent().analyze(f"SYM{i}.NS", api_key, 'openai', '', mode=mode)
+        latencies.append(time.perf_counter() - start)
+        assert not result["meta"]["partial"], result["meta"]
+        estimated += sum(result["meta"]["tokens"]["total"].values())
+    latencies.sort()
+    calls = USAGE['requests'] / runs
+    prompt = USAGE['prompt_tokens'] / runs
+    completion = USAGE['completion_tokens'] / runs
+    print(f"{mode:<7} p50 {latencies[len(latencies) // 2]:6.2f}s  LLM calls {calls:4.1f}  "
+          f"prompt tok {prompt:7.0f}  completion tok {completion:7.0f}  total {prompt + completion:7.0f}  "
+          f"(meta estimate {estimated / runs:7.0f})")
+
+
+async def main_async(args):
+    print(f"{args.runs} Advisor runs per mode, mock latency {args.latency}s + {args.per_token}s/token\n")
+    for mode in ('multi', 'single'):
+        await run_mode(mode, args.runs, args.api_key)
+    from core.llm_clients import llm_clients
+    await llm_clients.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.5, help='mock time to first token (s)')
+    parser.add_argument('--per-token', type=float, default=0.01, help='mock generation time per token (s)')
+    parser.add_argument('--api-key', default='sk-bench')
+    args = parser.parse_args()
+    install_fake_upstream(0.0)
+    os.environ['OPENAI_BASE_URL'] = start_mock_server(args.latency, args.per_token, mock_reply)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
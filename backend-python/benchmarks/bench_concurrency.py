@@ -0,0 +1,110 @@
+"""
+Load test: concurrent /agent/analyze requests for different tickers.
+
+    python benchmarks/bench_concurrency.py --requests 32 --latency 0.5
+    python benchmarks/bench_concurrency.py --url http://localhost:8000 AAPL MSFT TCS
+
+Without --url the app runs in-process and Yahoo is replaced by a fixed
+upstream delay, so the run is offline and deterministic. It is repeated
+with a one-thread data executor, which reproduces the old behaviour where
+every blocking fetch ran inline and requests queued behind each other.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+
+async def fire(client: httpx.AsyncClient, tickers, analysis_type: str):
+    async def one(ticker):
+        start = time.perf_counter()
+        r = await client.post('/agent/analyze', json={'ticker': ticker, 'type': analysis_type})
+        return r.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(t) for t in tickers))
+    wall = time.perf_counter() - start
+    latencies = sorted(elapsed for _, elapsed in results)
+    ok = sum(1 for status, _ in results if status == 200)
+    return wall, latencies, ok
+
+
+def report(label, wall, latencies, ok, total):
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<28} wall {wall:6.2f}s  p50 {p50:6.2f}s  p95 {p95:6.2f}s  ok {ok}/{total}")
+
+
+def install_fake_upstream(latency: float):
+    """Replace the Yahoo-facing accessors with a fixed blocking delay"""
+    import numpy as np
+    import pandas as pd
+    from core.news_store import news_store
+    from core.stock_data import StockDataService
+
+    bars = pd.DataFrame(
+        {name: np.linspace(100, 120, 260) for name in ('Open', 'High', 'Low', 'Close', 'Volume')},
+        index=pd.bdate_range(end='2026-01-23', periods=260),
+    )
+
+    def info(symbol):
+        time.sleep(latency)
+        return {'trailingPE': 18.0, 'returnOnEquity': 0.2, 'beta': 1.1}
+
+    def history(symbol, period, interval='1d'):
+        time.sleep(latency)
+        return bars
+
+    def fast_info(symbol):
+        return {'last_price': float(bars['Close'].iloc[-1]), 'currency': 'INR'}
+
+    def news(symbol, limit=20):
+        time.sleep(latency)
+        return []
+
+    StockDataService._get_info = staticmethod(info)
+    StockDataService._get_history = staticmethod(history)
+    StockDataService._get_fast_info = staticmethod(fast_info)
+    news_store.get_items = news
+
+
+async def in_process(args):
+    install_fake_upstream(args.latency)
+    from core.async_data import data_executor
+    from main import app
+
+    tickers = [f"SYM{i}.NS" for i in range(args.requests)]
+    transport = httpx.ASGITransport(app=app)
+    for label, workers in (("serialized (1 thread)", 1), (f"bounded pool ({args.workers})", args.workers)):
+        data_executor.resize(workers)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            wall, latencies, ok = await fire(client, tickers, args.type)
+        report(label, wall, latencies, ok, len(tickers))
+
+
+async def against_server(args):
+    tickers = (args.tickers * args.requests)[:args.requests] if args.tickers else [f"SYM{i}" for i in range(args.requests)]
+    async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+        wall, latencies, ok = await fire(client, tickers, args.type)
+    report(args.url, wall, latencies, ok, len(tickers))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('tickers', nargs='*')
+    parser.add_argument('--url')
+    parser.add_argument('--requests', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.5, help='simulated upstream delay (s)')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--type', default='Fundamental')
+    args = parser.parse_args()
+    asyncio.run(against_server(args) if args.url else in_process(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Indicator engine vs the per-symbol pandas path on synthetic daily bars.
+
+    python benchmarks/bench_indicators.py --symbols 500 --years 10
+
+Runs offline. Also reports the largest relative difference between the two
+paths for each indicator.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from core.indicators import compute_indicators
+
+
+def synthetic_bars(symbols: int, bars: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (symbols, bars)), axis=1))
+    spread = np.abs(rng.normal(0, 0.01, (symbols, bars)))
+    high = close * (1 + spread)
+    low = close * (1 - spread)
+    volume = rng.integers(100_000, 5_000_000, (symbols, bars)).astype(np.float64)
+    return close, high, low, volume
+
+
+def pandas_indicators(close, high, low, volume):
+    """The DataFrame/rolling style the data layer used before the engine"""
+    df = pd.DataFrame({'Close': close, 'High': high, 'Low': low, 'Volume': volume})
+    out = {}
+    for window in (20, 50, 200):
+        out[f'sma_{window}'] = df['Close'].rolling(window=window).mean()
+    for span in (12, 20, 26, 50):
+        out[f'ema_{span}'] = df['Close'].ewm(span=span, adjust=False).mean()
+    macd = out['ema_12'] - out['ema_26']
+    out['macd'] = macd
+    out['macd_signal'] = macd.ewm(span=9, adjust=False).mean()
+    delta = df['Close'].diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+    out['rsi_14'] = 100 - 100 / (1 + gain / loss)
+    std = df['Close'].rolling(window=20).std(ddof=0)
+    out['bb_upper'] = out['sma_20'] + 2 * std
+    prev = df['Close'].shift()
+    tr = pd.concat([df['High'] - df['Low'], (df['High'] - prev).abs(), (df['Low'] - prev).abs()], axis=1).max(axis=1)
+    out['atr_14'] = tr.ewm(alpha=1 / 14, adjust=False).mean()
+    out['obv'] = (np.sign(delta.fillna(0)) * df['Volume']).cumsum()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--years', type=int, default=10)
+    args = parser.parse_args()
+
+    bars = args.years * 252
+    close, high, low, volume = synthetic_bars(args.symbols, bars)
+    print(f"{args.symbols} symbols x {bars} bars")
+
+    start = time.perf_counter()
+    reference = [pandas_indicators(close[i], high[i], low[i], volume[i]) for i in range(args.symbols)]
+    pandas_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = compute_indicators(close, high, low, volume)
+    engine_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(args.symbols):
+        compute_indicators(close[i], high[i], low[i], volume[i])
+    engine_loop_s = time.perf_counter() - start
+
+    print(f"pandas, per symbol      : {pandas_s * 1000:9.1f} ms")
+    print(f"engine, per symbol      : {engine_loop_s * 1000:9.1f} ms  ({pandas_s / engine_loop_s:5.1f}x)")
+    print(f"engine, one 2-D call    : {engine_s * 1000:9.1f} ms  ({pandas_s / engine_s:5.1f}x)")
+
+    print("\nmax relative difference vs pandas:")
+    for name in reference[0]:
+        ref = np.vstack([r[name].to_numpy() for r in reference])
+        diff = np.abs(engine[name] - ref) / np.maximum(np.abs(ref), 1e-9)
+        print(f"  {name:<12} {np.nanmax(diff):.2e}")
+
+
+if __name__ == '__main__':
+    main()
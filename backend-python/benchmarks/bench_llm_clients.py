@@ -0,0 +1,98 @@
+"""
+LLM client throughput: 50 concurrent analyses against a local mock
+OpenAI-compatible server.
+
+    python benchmarks/bench_llm_clients.py --concurrency 50 --latency 0.3
+
+Compares the old pattern (a fresh synchronous OpenAI client per call,
+run on a thread) with the pooled async clients in core/llm.py. The mock
+server answers every completion after a fixed delay, so the numbers
+reflect client overhead and concurrency, not model speed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure the clients, not the scheduler's provider rate limits
+os.environ.setdefault('LLM_RATE_PER_SECOND', '1000')
+os.environ.setdefault('LLM_BURST', '1000')
+os.environ.setdefault('LLM_PROVIDER_CONCURRENCY', '1000')
+
+from mock_llm import start_mock_server
+
+
+def prompts(n: int):
+    from core.prompts import FUNDAMENTAL_PROMPT
+
+    metrics = {"pe_ratio": 21.4, "roe": 0.18, "debt_to_equity": 0.4, "profit_margin": 0.12}
+    return [
+        FUNDAMENTAL_PROMPT.format(ticker=f"SYM{i}", metrics=json.dumps(metrics, indent=2))
+        for i in range(n)
+    ]
+
+
+async def per_call_clients(system_prompt: str, api_key: str) -> str:
+    """The previous call_llm: new blocking client per call, on a thread"""
+    def call():
+        from openai import OpenAI
+        client = OpenAI(api_key=api_key)
+        response = client.chat.completions.create(
+            model="gpt-4-turbo-preview",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": "Analyze the fundamentals."},
+            ],
+        )
+        return response.choices[0].message.content
+    return await asyncio.to_thread(call)
+
+
+async def pooled_clients(system_prompt: str, api_key: str) -> str:
+    from core.llm import complete
+    return await complete('openai', api_key, '', system_prompt, "Analyze the fundamentals.")
+
+
+async def run(label: str, call, system_prompts, api_key: str):
+    async def one(prompt):
+        start = time.perf_counter()
+        await call(prompt, api_key)
+        return time.perf_counter() - start
+
+    await call(system_prompts[0], api_key)  # warm up imports / first connection
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(one(p) for p in system_prompts)))
+    wall = time.perf_counter() - start
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<30} wall {wall:6.2f}s  {len(latencies) / wall:7.1f} req/s  p50 {p50:5.2f}s  p95 {p95:5.2f}s")
+
+
+async def main_async(args):
+    system_prompts = prompts(args.concurrency)
+    print(f"{args.concurrency} concurrent analyses, mock latency {args.latency}s\n")
+    for _ in range(args.rounds):
+        await run("per-call sync client (old)", per_call_clients, system_prompts, args.api_key)
+        await run("pooled async client", pooled_clients, system_prompts, args.api_key)
+
+    from core.llm_clients import llm_clients
+    print(f"\nregistry: {llm_clients.stats()}")
+    await llm_clients.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.3, help='mock completion delay (s)')
+    parser.add_argument('--rounds', type=int, default=2)
+    parser.add_argument('--api-key', default='sk-bench')
+    args = parser.parse_args()
+    os.environ['OPENAI_BASE_URL'] = start_mock_server(args.latency)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Cold vs warm daily-history latency: direct Yahoo download vs the OHLCV store.
+
+    python benchmarks/bench_ohlcv_store.py AAPL MSFT TCS.NS --period 1y
+
+Needs network access to Yahoo Finance. Uses a throwaway store directory.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yfinance as yf
+from core.ohlcv_store import OHLCVStore
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('tickers', nargs='*', default=['AAPL', 'MSFT', 'RELIANCE.NS', 'TCS.NS'])
+    parser.add_argument('--period', default='1y')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = OHLCVStore(root)
+        print(f"{'ticker':<12}{'yahoo ms':>10}{'cold ms':>10}{'warm ms':>10}{'top-up ms':>11}{'bars':>7}")
+        for ticker in args.tickers:
+            direct_ms, _ = timed(lambda: yf.Ticker(ticker).history(period=args.period, interval='1d'))
+            cold_ms, hist = timed(lambda: store.get_history(ticker, args.period))
+
+            warm = []
+            for _ in range(args.repeat):
+                ms, _ = timed(lambda: store.get_history(ticker, args.period))
+                warm.append(ms)
+
+            # Force the refresh window to lapse: only the missing tail is fetched
+            store.refresh_seconds = 0
+            topup_ms, _ = timed(lambda: store.get_history(ticker, args.period))
+            store.refresh_seconds = float('inf')
+
+            print(f"{ticker:<12}{direct_ms:>10.1f}{cold_ms:>10.1f}{min(warm):>10.2f}{topup_ms:>11.1f}{len(hist):>7}")
+        print(f"\nupstream fetches: {store.upstream_fetches}")
+
+
+if __name__ == '__main__':
+    main()
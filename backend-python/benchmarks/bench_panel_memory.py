@@ -0,0 +1,109 @@
+"""
+Worker memory with per-worker history frames vs the shared mapped panel.
+
+    python benchmarks/bench_panel_memory.py --symbols 2000 --workers 4
+
+Runs offline on a synthetic OHLCV store in a throwaway directory. Each
+worker process reads every symbol's history, keeps the frames (as the
+snapshot cache would) and touches every value; memory is then measured
+while all workers are alive. PSS splits shared pages between the processes
+mapping them, so its sum is the real footprint (Linux only; elsewhere only
+peak RSS is reported).
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from core.ohlcv_store import COLUMNS, OHLCVStore
+from core.shared_panel import SharedPanel, write_panel
+
+
+def memory_kb():
+    """(rss, pss) of this process in kB"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = {line.split(':')[0]: int(line.split()[1]) for line in f if line.split()[-1] == 'kB'}
+        return fields['Rss'], fields['Pss']
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss, rss
+
+
+def worker(mode, store_root, panel_root, symbols, period, barrier, results):
+    store = OHLCVStore(store_root, refresh_seconds=1e9)
+    panel = SharedPanel(panel_root, max_age=1e9)
+    base = memory_kb()
+
+    start = time.perf_counter()
+    frames = {}
+    for symbol in symbols:
+        hist = panel.get_history(symbol, period) if mode == 'panel' else store.get_history(symbol, period)
+        frames[symbol] = hist
+        float(hist['Close'].sum() + hist['Volume'].sum())
+    elapsed = time.perf_counter() - start
+
+    barrier.wait()
+    rss, pss = memory_kb()
+    results.put((rss - base[0], pss - base[1], elapsed))
+    barrier.wait()
+
+
+def synthetic_store(root, symbols, days, seed=5):
+    rng = np.random.default_rng(seed)
+    store = OHLCVStore(root, refresh_seconds=1e9)
+    dates = np.arange(np.datetime64('2015-01-01'), np.datetime64('2026-10-16')).astype('datetime64[D]')
+    dates = dates[np.is_busday(dates)][-days:]
+    names = [f"SYM{i:04d}.NS" for i in range(symbols)]
+    for symbol in names:
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days)))
+        cols = {'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                'Volume': rng.integers(1e5, 5e6, days).astype(np.float64)}
+        store._save(symbol, dates, cols, {'complete': True, 'fetched_at': time.time()})
+    return store, names
+
+
+def run(mode, args, store_root, panel_root, names):
+    ctx = mp.get_context('spawn')
+    barrier = ctx.Barrier(args.workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(mode, store_root, panel_root, names, args.period, barrier, results))
+        for _ in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    rss = sum(s[0] for s in stats) / 1024
+    pss = sum(s[1] for s in stats) / 1024
+    load = max(s[2] for s in stats)
+    print(f"{mode:<8}{rss:>14.1f}{pss:>14.1f}{load:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=1250)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--period', default='5y')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as store_root, tempfile.TemporaryDirectory() as panel_root:
+        store, names = synthetic_store(store_root, args.symbols, args.days)
+        write_panel(((s, *store.read(s)) for s in names), panel_root)
+        print(f"{args.symbols} symbols x {args.days} bars, {args.workers} workers, period {args.period}\n")
+        print(f"{'mode':<8}{'sum RSS MB':>14}{'sum PSS MB':>14}{'load s':>12}")
+        for mode in ('store', 'panel'):
+            run(mode, args, store_root, panel_root, names)
+
+
+if __name__ == '__main__':
+    main()
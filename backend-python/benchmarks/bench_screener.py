@@ -0,0 +1,86 @@
+"""
+Universe screener latency on a synthetic panel.
+
+    python benchmarks/bench_screener.py --symbols 2000 --days 260
+
+Runs offline. Builds a MarketPanel from synthetic bars and fundamentals,
+then times a few typical screens against a warm panel, after checking
+how filters treat missing (NaN) values.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from core.screener import FUNDAMENTAL_FIELDS, MarketPanel, compile_expression, screen
+
+SCREENS = [
+    ("close > sma_50 and pe_ratio < 20 and roe > 0.15", "roe"),
+    ("rsi_14 < 30 and close > sma_200", "-rsi_14"),
+    ("change_3m > 0.1 and volume > 2 * volume_sma_20", "change_3m"),
+    ("close >= 0.95 * high_52w and debt_to_equity < 50", "revenue_growth"),
+    (None, "earnings_growth / max(pe_ratio, 1)"),
+]
+
+# Filters over rows (pe_ratio, dividend_yield, roe) = (5, 0.02, 0.1), (15, 0, 0.1), (NaN, NaN, 0.1)
+MISSING_CASES = [
+    ("pe_ratio < 10", [True, False, False]),
+    ("not (pe_ratio < 10)", [False, True, False]),
+    ("dividend_yield", [True, False, False]),
+    ("not dividend_yield", [False, True, False]),
+    ("dividend_yield and pe_ratio < 20", [True, False, False]),
+    ("pe_ratio > 100 or roe > 0", [True, True, True]),
+    ("not (pe_ratio > 100 or dividend_yield)", [False, True, False]),
+]
+
+
+def check_missing_values():
+    fields = {
+        'pe_ratio': np.array([5.0, 15.0, np.nan]),
+        'dividend_yield': np.array([0.02, 0.0, np.nan]),
+        'roe': np.array([0.1, 0.1, 0.1]),
+    }
+    for source, expected in MISSING_CASES:
+        got = compile_expression(source).mask(fields).tolist()
+        assert got == expected, f"{source!r}: {got} != {expected}"
+    print(f"{len(MISSING_CASES)} missing-value filter checks passed\n")
+
+
+def synthetic_panel(symbols: int, days: int, seed: int = 3) -> MarketPanel:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (symbols, days)), axis=1))
+    spread = np.abs(rng.normal(0, 0.01, (symbols, days)))
+    volume = rng.integers(100_000, 5_000_000, (symbols, days)).astype(np.float64)
+    fundamentals = rng.normal(0.5, 0.5, (symbols, len(FUNDAMENTAL_FIELDS))) * [40, 40, 2, 5, 100, 0.3, 0.2, 0.2, 0.2, 0.02]
+    fundamentals[rng.random(fundamentals.shape) < 0.05] = np.nan
+    dates = np.arange(np.datetime64('2024-01-01'), np.datetime64('2024-01-01') + days)
+    names = [f"SYM{i:04d}.NS" for i in range(symbols)]
+    return MarketPanel(names, dates, close, close * (1 + spread), close * (1 - spread), volume, fundamentals)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=260)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    check_missing_values()
+    start = time.perf_counter()
+    panel = synthetic_panel(args.symbols, args.days)
+    print(f"panel {args.symbols} symbols x {args.days} days built in {time.perf_counter() - start:.2f}s\n")
+
+    for filter, rank in SCREENS:
+        screen(panel, filter, rank)  # compile once
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = screen(panel, filter, rank, limit=50)
+        elapsed = (time.perf_counter() - start) / args.repeat * 1000
+        print(f"{elapsed:7.2f} ms  {result['matches']:5d} matches  filter={filter!r} rank={rank!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Headline sentiment scorer throughput on synthetic headlines.
+
+    python benchmarks/bench_sentiment.py --headlines 100000 --batch 5000
+
+Runs offline. Compares the batch LexiconScorer with a plain per-headline
+dict lookup over the same word lists, and checks that both agree.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from core.sentiment import CLAUSE, NEGATION_SCOPE, NEGATIONS, NEGATIVE_WORDS, POSITIVE_WORDS, TOKEN, lexicon_scorer
+
+NEUTRAL_WORDS = (
+    "shares stock company quarter results board meeting india market investors sector bank "
+    "announces report says plans deal unit price target analysts fy26 q3 revenue"
+).split()
+TICKERS = "Reliance TCS Infosys HDFC ICICI Tata Apple Microsoft Nvidia Amazon".split()
+CLAUSE_TOKENS = [';', ',', '.', ':', 'but', 'while', '3.5%', '1,200']
+# Headlines whose tone depends on where a negation stops
+NEGATION_CASES = [
+    ("Tesla not profitable; losses widen", -1.0),
+    ("Tesla not profitable", -1.0),
+    ("Margins not weak but sales fall", 0.0),
+    ("Sales not 3.5% lower", 1.0),
+]
+
+
+def synthetic_headlines(n: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    vocab = np.array(NEUTRAL_WORDS * 4 + POSITIVE_WORDS + NEGATIVE_WORDS + ['not', 'no'] + CLAUSE_TOKENS)
+    lengths = rng.integers(6, 16, n)
+    return [
+        f"{TICKERS[i % len(TICKERS)]} " + " ".join(rng.choice(vocab, length))
+        for i, length in enumerate(lengths)
+    ]
+
+
+def naive_scores(headlines):
+    polarity = {w: 1 for w in POSITIVE_WORDS}
+    polarity.update({w: -1 for w in NEGATIVE_WORDS})
+    out = []
+    for text in headlines:
+        pos = neg = 0
+        for clause in CLAUSE.split(text.lower()):
+            tokens = TOKEN.findall(clause)
+            for i, token in enumerate(tokens):
+                p = polarity.get(token, 0)
+                if p and sum(t in NEGATIONS for t in tokens[max(0, i - NEGATION_SCOPE):i]) % 2:
+                    p = -p
+                pos += p > 0
+                neg += p < 0
+        out.append((pos - neg) / (pos + neg) if pos + neg else 0.0)
+    return np.array(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--headlines', type=int, default=100_000)
+    parser.add_argument('--batch', type=int, default=5_000)
+    args = parser.parse_args()
+
+    texts = [text for text, _ in NEGATION_CASES]
+    got = lexicon_scorer.score_batch(texts).tolist()
+    for text, score, expected in zip(texts, got, (tone for _, tone in NEGATION_CASES)):
+        assert score == expected, f"{text!r}: {score} != {expected}"
+    print(f"{len(NEGATION_CASES)} negation-scope checks passed")
+
+    headlines = synthetic_headlines(args.headlines)
+    print(f"{len(headlines)} headlines, batches of {args.batch}\n")
+
+    start = time.perf_counter()
+    expected = naive_scores(headlines)
+    naive = time.perf_counter() - start
+    print(f"per-headline dict loop   {naive:6.2f}s  {len(headlines) / naive:10,.0f} headlines/s")
+
+    start = time.perf_counter()
+    scores = np.concatenate([
+        lexicon_scorer.score_batch(headlines[i:i + args.batch])
+        for i in range(0, len(headlines), args.batch)
+    ])
+    batched = time.perf_counter() - start
+    print(f"batch lexicon scorer     {batched:6.2f}s  {len(headlines) / batched:10,.0f} headlines/s")
+
+    print(f"\nmax |difference| {np.abs(scores - expected).max():.2e}, speedup {naive / batched:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
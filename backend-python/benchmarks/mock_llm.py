@@ -0,0 +1,64 @@
+"""
+Local OpenAI-compatible completion server for the LLM benchmarks.
+
+Point the SDK at it with OPENAI_BASE_URL=start_mock_server(...). Replies
+arrive after `latency` seconds plus `per_token` seconds per completion
+token, and token usage is tallied in USAGE (estimated at ~4 characters
+per token on both sides).
+"""
+import asyncio
+import socket
+import threading
+import time
+from typing import Callable, Optional
+
+USAGE = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+
+
+def reset_usage():
+    for key in USAGE:
+        USAGE[key] = 0
+
+
+def start_mock_server(latency: float, per_token: float = 0.0,
+                      reply: Optional[Callable[[dict], str]] = None) -> str:
+    """Serve /v1/chat/completions on a free local port; returns the base URL"""
+    import uvicorn
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def completions(body: dict):
+        content = reply(body) if reply else "Hold. Valuation is fair."
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+        completion_tokens = max(1, len(content) // 4)
+        USAGE['requests'] += 1
+        USAGE['prompt_tokens'] += prompt_tokens
+        USAGE['completion_tokens'] += completion_tokens
+        await asyncio.sleep(latency + per_token * completion_tokens)
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
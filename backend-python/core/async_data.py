@@ -0,0 +1,119 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from core.stock_data import StockDataService
+
+# Upper bound on concurrent blocking upstream fetches per worker process
+DATA_CONCURRENCY = int(os.getenv('DATA_CONCURRENCY', '16'))
+
+
+class _DataExecutor:
+    """Bounded thread pool for blocking data-layer calls, with simple counters"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get(self) -> ThreadPoolExecutor:
+        # Created lazily so each (forked) worker process gets its own pool
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='stock-data'
+                    )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.queued += 1
+
+        def task():
+            with self._lock:
+                self.queued -= 1
+                self.in_flight += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+        try:
+            result = await loop.run_in_executor(self._get(), task)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def resize(self, max_workers: int) -> None:
+        """Swap in a pool of a different size (new calls only)"""
+        with self._lock:
+            old, self._executor = self._executor, None
+            self.max_workers = max_workers
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'completed': self.completed,
+                'failed': self.failed,
+            }
+
+
+data_executor = _DataExecutor(DATA_CONCURRENCY)
+
+
+class AsyncStockDataService:
+    """
+    Awaitable facade over StockDataService.
+    Each call runs the blocking yfinance work on the bounded data executor,
+    so a slow upstream response never stalls the event loop.
+    """
+
+    @staticmethod
+    async def resolve_ticker(ticker: str) -> str:
+        return await data_executor.run(StockDataService.resolve_ticker, ticker)
+
+    @staticmethod
+    async def prefetch_history(symbols: List[str]) -> Dict[str, int]:
+        return await data_executor.run(StockDataService.prefetch_history, symbols)
+
+    @staticmethod
+    async def get_stock_info(ticker: str) -> Optional[Dict[str, Any]]:
+        return await data_executor.run(StockDataService.get_stock_info, ticker)
+
+    @staticmethod
+    async def get_fundamental_metrics(ticker: str) -> Optional[Dict[str, Any]]:
+        return await data_executor.run(StockDataService.get_fundamental_metrics, ticker)
+
+    @staticmethod
+    async def get_technical_metrics(ticker: str, period: str = '1mo') -> Optional[Dict[str, Any]]:
+        return await data_executor.run(StockDataService.get_technical_metrics, ticker, period)
+
+    @staticmethod
+    async def get_risk_metrics(ticker: str) -> Optional[Dict[str, Any]]:
+        return await data_executor.run(StockDataService.get_risk_metrics, ticker)
+
+    @staticmethod
+    async def get_price_history(ticker: str, period: str = '6mo') -> Optional[Dict[str, Any]]:
+        return await data_executor.run(StockDataService.get_price_history, ticker, period)
+
+    @staticmethod
+    async def get_live_indicators(ticker: str) -> Optional[Dict[str, Any]]:
+        return await data_executor.run(StockDataService.get_live_indicators, ticker)
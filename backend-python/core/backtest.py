@@ -0,0 +1,307 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.indicators import TRADING_DAYS, sma
+from core.screener import FUNDAMENTAL_FIELDS
+
+BACKTEST_WORKERS = int(os.getenv('BACKTEST_WORKERS', str(os.cpu_count() or 1)))
+BACKTEST_COST_BPS = float(os.getenv('BACKTEST_COST_BPS', '10'))
+
+# Position taken on each agent rating; Hold keeps whatever is held
+POSITIONS = {'Strong Buy': 1.0, 'Buy': 0.5, 'Sell': 0.0}
+
+# The agents' own thresholds, used when a grid leaves a parameter out
+DEFAULT_PARAMS = {
+    'technical': {'fast': 20, 'slow': 50},
+    'fundamental': {'pe_buy': 15.0, 'roe_min': 0.15, 'pe_sell': 35.0},
+}
+STRATEGIES = tuple(DEFAULT_PARAMS)
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along each row (holidays, and Hold keeping the last position)"""
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = values[np.arange(values.shape[0])[:, None], idx]
+    filled[~np.maximum.accumulate(valid, axis=1)] = np.nan
+    return filled
+
+
+def listed_sma(close: np.ndarray, window: int) -> np.ndarray:
+    """SMA that starts at each symbol's first bar instead of staying NaN after a leading gap"""
+    listed = np.isfinite(close)
+    mean = sma(np.where(listed, close, 0.0), window)
+    full = sma(listed.astype(np.float64), window) > 1.0 - 1e-9
+    return np.where(full, mean, np.nan)
+
+
+def technical_targets(close: np.ndarray, fast: int = 20, slow: int = 50,
+                      cache: Optional[Dict[int, np.ndarray]] = None) -> np.ndarray:
+    """
+    TechnicalAgent's rule at every bar: price > SMAfast > SMAslow is Strong
+    Buy, price > SMAfast Buy, price < SMAfast < SMAslow Sell, else Hold (NaN).
+    """
+    cache = {} if cache is None else cache
+    for window in (fast, slow):
+        if window not in cache:
+            cache[window] = listed_sma(close, window)
+    fast_ma, slow_ma = cache[fast], cache[slow]
+
+    targets = np.full(close.shape, np.nan)
+    with np.errstate(invalid='ignore'):
+        strong = (close > fast_ma) & (fast_ma > slow_ma)
+        # No rating until both averages exist, as the agent needs both
+        buy = (close > fast_ma) & ~strong & np.isfinite(slow_ma)
+        sell = (close < fast_ma) & (fast_ma < slow_ma)
+    targets[sell] = POSITIONS['Sell']
+    targets[buy] = POSITIONS['Buy']
+    targets[strong] = POSITIONS['Strong Buy']
+    return targets
+
+
+def fundamental_targets(close: np.ndarray, pe_now: np.ndarray, roe: np.ndarray, pe_buy: float = 15.0,
+                        roe_min: float = 0.15, pe_sell: float = 35.0) -> np.ndarray:
+    """
+    FundamentalAgent's rule at every bar: 0 < P/E < pe_buy with ROE above
+    roe_min is Buy, P/E above pe_sell Sell, else Hold (NaN).
+
+    Yahoo only serves today's ratios, so the P/E path is the price over
+    today's implied trailing EPS and ROE is held at today's value.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eps = _last(close) / pe_now
+        pe = close / eps[:, None]
+        buy = (pe > 0) & (pe < pe_buy) & (roe[:, None] > roe_min)
+        sell = pe > pe_sell
+    targets = np.full(close.shape, np.nan)
+    targets[sell] = POSITIONS['Sell']
+    targets[buy] = POSITIONS['Buy']
+    return targets
+
+
+def positions(targets: np.ndarray) -> np.ndarray:
+    """Carry each rating's position forward through Hold bars; flat until the first rating"""
+    return np.nan_to_num(_ffill(targets), nan=0.0)
+
+
+def strategy_returns(close: np.ndarray, held: np.ndarray, cost_bps: float = BACKTEST_COST_BPS):
+    """
+    Daily strategy returns for positions set at each close and held to the
+    next one, less cost_bps per unit of position traded. Returns
+    (returns, traded, valid), each (symbols x bars-1).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = close[:, 1:] / close[:, :-1] - 1.0
+    valid = np.isfinite(ret)
+    held = np.where(valid, held[:, :-1], 0.0)
+    traded = np.abs(np.diff(held, axis=1, prepend=0.0))
+    returns = np.where(valid, held * np.where(valid, ret, 0.0), 0.0) - traded * cost_bps / 1e4
+    return returns, traded, valid
+
+
+def performance(returns: np.ndarray, traded: np.ndarray, valid: np.ndarray, held: np.ndarray) -> Dict[str, np.ndarray]:
+    """CAGR, Sharpe, max drawdown, annual turnover and exposure along the last axis"""
+    days = valid.sum(axis=-1)
+    years = days / TRADING_DAYS
+    equity = np.cumprod(1.0 + returns, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = np.where(years > 0, equity[..., -1] ** (1.0 / years) - 1.0, np.nan)
+        mean = returns.sum(axis=-1) / days
+        var = (np.where(valid, returns - mean[..., None], 0.0) ** 2).sum(axis=-1) / (days - 1)
+        sharpe = mean / np.sqrt(var) * math.sqrt(TRADING_DAYS)
+        drawdown = (equity / np.maximum.accumulate(equity, axis=-1) - 1.0).min(axis=-1)
+        turnover = traded.sum(axis=-1) / years
+        exposure = np.where(valid, held, 0.0).sum(axis=-1) / days
+    return {
+        'cagr': cagr,
+        'sharpe': np.where(var > 0, sharpe, np.nan),
+        'max_drawdown': drawdown,
+        'turnover': turnover,
+        'exposure': exposure,
+    }
+
+
+def _last(values: np.ndarray) -> np.ndarray:
+    return _ffill(values)[:, -1]
+
+
+def _portfolio(returns: np.ndarray, traded: np.ndarray, valid: np.ndarray, held: np.ndarray) -> Dict[str, float]:
+    """Equal weight across the symbols trading each day"""
+    live = valid.sum(axis=0)
+    days = live > 0
+    with np.errstate(invalid='ignore'):
+        weight = np.where(days, 1.0 / np.maximum(live, 1), 0.0)
+    held_bars = np.where(valid, held[:, :-1], 0.0)
+    stats = performance(
+        (returns * weight).sum(axis=0)[days],
+        (traded * weight).sum(axis=0)[days],
+        days[days],
+        (held_bars * weight).sum(axis=0)[days],
+    )
+    return {name: _clean(value) for name, value in stats.items()}
+
+
+def _clean(value) -> Optional[float]:
+    value = float(value)
+    return round(value, 4) if math.isfinite(value) else None
+
+
+def backtest(close: np.ndarray, strategy: str, params: Optional[Dict[str, float]] = None,
+             fundamentals: Optional[np.ndarray] = None, cost_bps: float = BACKTEST_COST_BPS,
+             cache: Optional[Dict[int, np.ndarray]] = None) -> Dict[str, Any]:
+    """
+    Replay one agent rule over a (symbols x bars) close matrix. fundamentals
+    is the screener's (symbols x FUNDAMENTAL_FIELDS) matrix, needed for the
+    fundamental rule. Returns portfolio and per-symbol metrics.
+    """
+    if strategy not in DEFAULT_PARAMS:
+        raise ValueError(f"unknown strategy {strategy!r}; expected one of {', '.join(STRATEGIES)}")
+    params = dict(DEFAULT_PARAMS[strategy], **(params or {}))
+    close = _ffill(close)
+
+    if strategy == 'technical':
+        targets = technical_targets(close, int(params['fast']), int(params['slow']), cache)
+    else:
+        if fundamentals is None:
+            raise ValueError("the fundamental strategy needs fundamentals")
+        pe_now = fundamentals[:, FUNDAMENTAL_FIELDS.index('pe_ratio')]
+        roe = fundamentals[:, FUNDAMENTAL_FIELDS.index('roe')]
+        targets = fundamental_targets(close, pe_now, roe, params['pe_buy'], params['roe_min'], params['pe_sell'])
+
+    held = positions(targets)
+    returns, traded, valid = strategy_returns(close, held, cost_bps)
+    per_symbol = performance(returns, traded, valid, np.where(valid, held[:, :-1], 0.0))
+    return {
+        'strategy': strategy,
+        'params': params,
+        'portfolio': _portfolio(returns, traded, valid, held),
+        'symbols': {name: [_clean(v) for v in values] for name, values in per_symbol.items()},
+    }
+
+
+def buy_and_hold(close: np.ndarray) -> Dict[str, Optional[float]]:
+    """Equal-weight buy-and-hold over the same bars, for comparison"""
+    close = _ffill(close)
+    held = np.where(np.isfinite(close), 1.0, 0.0)
+    returns, traded, valid = strategy_returns(close, held, 0.0)
+    return _portfolio(returns, traded, valid, held)
+
+
+def param_grid(strategy: str, **values: Sequence[float]) -> List[Dict[str, float]]:
+    """Cartesian product of parameter values; missing parameters keep the agent's defaults"""
+    defaults = DEFAULT_PARAMS[strategy]
+    unknown = set(values) - set(defaults)
+    if unknown:
+        raise ValueError(f"unknown {strategy} parameter(s): {', '.join(sorted(unknown))}")
+    axes = {name: list(values.get(name) or [default]) for name, default in defaults.items()}
+    grid = [dict(zip(axes, combo)) for combo in itertools.product(*axes.values())]
+    if strategy == 'technical':
+        grid = [p for p in grid if p['fast'] < p['slow']]
+    return grid
+
+
+# Arrays a sweep worker process replays every grid point against
+_shared: Dict[str, Any] = {}
+
+
+def _init_worker(close: np.ndarray, fundamentals: Optional[np.ndarray], cost_bps: float) -> None:
+    _shared.update(close=_ffill(close), fundamentals=fundamentals, cost_bps=cost_bps, sma={})
+
+
+def _run_point(strategy: str, params: Dict[str, float]) -> Dict[str, Any]:
+    return backtest(_shared['close'], strategy, params, _shared['fundamentals'], _shared['cost_bps'], _shared['sma'])
+
+
+def sweep(close: np.ndarray, strategy: str, grid: List[Dict[str, float]],
+          fundamentals: Optional[np.ndarray] = None, cost_bps: float = BACKTEST_COST_BPS,
+          workers: int = BACKTEST_WORKERS) -> List[Dict[str, Any]]:
+    """Backtest every grid point, spread across a process pool; results in grid order"""
+    workers = max(1, min(workers, len(grid)))
+    if workers == 1:
+        _init_worker(close, fundamentals, cost_bps)
+        return [_run_point(strategy, params) for params in grid]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(close, fundamentals, cost_bps)) as pool:
+        return list(pool.map(_run_point, [strategy] * len(grid), grid))
+
+
+def _floats(text: Optional[str]) -> Optional[List[float]]:
+    return [float(v) for v in text.split(',')] if text else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the rule-based agent ratings")
+    parser.add_argument('symbols', nargs='*', help="tickers; defaults to the --universe listing")
+    parser.add_argument('--universe', default='NSE', help="bundled listing when no symbols are given (NSE/US/BSE/ALL)")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='technical')
+    parser.add_argument('--period', default='5y')
+    parser.add_argument('--fast', help="comma-separated fast SMA windows (technical)")
+    parser.add_argument('--slow', help="comma-separated slow SMA windows (technical)")
+    parser.add_argument('--pe-buy', help="comma-separated P/E buy ceilings (fundamental)")
+    parser.add_argument('--roe-min', help="comma-separated ROE floors (fundamental)")
+    parser.add_argument('--pe-sell', help="comma-separated P/E sell floors (fundamental)")
+    parser.add_argument('--cost-bps', type=float, default=BACKTEST_COST_BPS)
+    parser.add_argument('--workers', type=int, default=BACKTEST_WORKERS)
+    parser.add_argument('--json', action='store_true', help="print full results, per-symbol metrics included")
+    args = parser.parse_args()
+
+    from core.screener import build_panel
+    from core.stock_data import StockDataService
+    from core.symbols import get_symbol_master
+
+    if args.symbols:
+        symbols = [StockDataService.resolve_ticker(s) for s in args.symbols]
+    else:
+        universe = args.universe.upper()
+        symbols = get_symbol_master().tickers(None if universe == 'ALL' else universe)
+
+    if args.strategy == 'technical':
+        grid = param_grid('technical', fast=_floats(args.fast), slow=_floats(args.slow))
+    else:
+        grid = param_grid('fundamental', pe_buy=_floats(args.pe_buy), roe_min=_floats(args.roe_min),
+                          pe_sell=_floats(args.pe_sell))
+
+    started = time.perf_counter()
+    panel = build_panel(symbols, args.period)
+    loaded = time.perf_counter() - started
+    started = time.perf_counter()
+    results = sweep(panel.close, args.strategy, grid, panel.fundamentals, args.cost_bps, args.workers)
+    elapsed = time.perf_counter() - started
+    benchmark = buy_and_hold(panel.close)
+
+    if args.json:
+        for result in results:
+            metrics = result['symbols']
+            result['symbols'] = {
+                symbol: {name: values[i] for name, values in metrics.items()} for i, symbol in enumerate(panel.symbols)
+            }
+        print(json.dumps({'symbols': len(panel), 'bars': len(panel.dates), 'buy_and_hold': benchmark,
+                          'results': results}, indent=2))
+        return
+
+    span = f"{panel.dates[0]} .. {panel.dates[-1]}" if len(panel.dates) else "no data"
+    print(f"{len(panel)} symbols, {len(panel.dates)} bars ({span}); loaded in {loaded:.1f}s, "
+          f"{len(grid)} runs in {elapsed:.2f}s\n")
+    columns = ('cagr', 'sharpe', 'max_drawdown', 'turnover', 'exposure')
+    print(f"{'params':<44}" + ''.join(f"{c:>14}" for c in columns))
+    ranked = sorted(results, key=lambda r: -(r['portfolio']['sharpe'] if r['portfolio']['sharpe'] is not None else -math.inf))
+    for result in ranked + [{'params': 'buy and hold', 'portfolio': benchmark}]:
+        label = result['params'] if isinstance(result['params'], str) else \
+            ' '.join(f"{k}={v:g}" for k, v in result['params'].items())
+        print(f"{label:<44}" + ''.join(
+            f"{result['portfolio'][c]:>14.4f}" if result['portfolio'][c] is not None else f"{'n/a':>14}"
+            for c in columns
+        ))
+
+
+if __name__ == '__main__':
+    main()
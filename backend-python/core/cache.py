@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import pandas as pd
+
+# Freshness per kind of data. Quote-like data goes stale quickly, company
+# profile data (info) only changes a few times a day.
+DEFAULT_TTLS = {
+    'resolve': 24 * 3600,
+    'resolve_miss': 3600,
+    'info': 15 * 60,
+    'fast_info': 60,
+    'history': 5 * 60,
+    'history_intraday': 60,
+    'indicators': 5 * 60,
+    'risk_model': 5 * 60,
+    'benchmark': 30 * 60,
+    'relative_risk': 15 * 60,
+}
+
+DEFAULT_MAX_BYTES = int(float(os.getenv('SNAPSHOT_CACHE_MAX_MB', '64')) * 1024 * 1024)
+
+
+def _sizeof(value: Any) -> int:
+    """Rough in-memory footprint of a cached value (bytes)"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum()) if isinstance(value, pd.DataFrame) \
+            else int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class SnapshotCache:
+    """
+    In-process snapshot cache for upstream market data.
+    Entries are keyed by (symbol, kind, *extra), expire per kind and are
+    evicted least-recently-used once the memory cap is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttls: Optional[Dict[str, float]] = None):
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        # One lock per key being fetched, so concurrent misses share a fetch,
+        # with the number of threads holding or waiting on it; the entry is
+        # dropped when the last one leaves
+        self._fetch_locks: Dict[Tuple, List[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(symbol: str, kind: str, *extra: Hashable) -> Tuple:
+        return (symbol, kind) + tuple(extra)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            value = self._peek(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def _peek(self, key: Tuple) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Tuple, value: Any, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            ttl = self.ttls.get(key[1], 60)
+        size = _sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def get_or_fetch(self, key: Tuple, fetch: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value or call `fetch` and cache its result (None is
+        not cached). Threads missing on the same key wait for one fetch.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            entry = self._fetch_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                with self._lock:
+                    value = self._peek(key)
+                if value is not None:
+                    return value
+                value = fetch()
+                if value is not None:
+                    self.set(key, value, ttl)
+                return value
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._fetch_locks[key]
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [k for k in self._entries if k[0] == symbol]:
+                self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _drop(self, key: Tuple) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+# Process-wide instance shared by StockDataService
+snapshot_cache = SnapshotCache()
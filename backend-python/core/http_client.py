@@ -0,0 +1,60 @@
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+# Timeouts (seconds) and pool limits for outbound non-LLM HTTP (news/search APIs)
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3'))
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '50'))
+HTTP_MAX_KEEPALIVE = int(os.getenv('HTTP_MAX_KEEPALIVE', '10'))
+
+
+class SharedHTTPClient:
+    """
+    One pooled httpx.AsyncClient per worker, so repeated calls to the same
+    search API reuse warm TLS connections. Like the LLM pools, it is bound
+    to the event loop that created it and rebuilt for a different loop.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.created = 0
+        self.requests = 0
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._client is None or self._loop is not loop or self._client.is_closed:
+                self._client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+                    limits=httpx.Limits(
+                        max_connections=HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                    ),
+                    follow_redirects=True,
+                )
+                self._loop = loop
+                self.created += 1
+            self.requests += 1
+            return self._client
+
+    async def aclose(self) -> None:
+        with self._lock:
+            client, self._client, self._loop = self._client, None, None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'open': self._client is not None and not self._client.is_closed,
+            'created': self.created,
+            'requests': self.requests,
+        }
+
+
+http_client = SharedHTTPClient()
@@ -0,0 +1,198 @@
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+SMA_WINDOWS = (20, 50, 200)
+EMA_SPANS = (12, 20, 26, 50)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_WINDOW, BOLLINGER_K = 20, 2.0
+VOLUME_WINDOW = 20
+TRADING_DAYS = 252
+
+# Keep the per-block growth factor of the closed-form EMA below this, so the
+# rescaled cumulative sum never loses meaningful precision.
+_EMA_MAX_GROWTH = 1e12
+
+
+def _time_major(values) -> np.ndarray:
+    """(bars, series) contiguous float64 copy of a 1-D or (series, bars) input"""
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 1:
+        return np.ascontiguousarray(arr[:, np.newaxis])
+    return np.ascontiguousarray(arr.T)
+
+
+def _series_major(arr: np.ndarray, one_dim: bool) -> np.ndarray:
+    return arr[:, 0] if one_dim else arr.T
+
+
+# The kernels below work on time-major (bars, series) arrays so every step
+# along time is one vectorized row operation across all series.
+
+def _ema(x: np.ndarray, alpha: float) -> np.ndarray:
+    out = np.empty_like(x)
+    if x.shape[0] == 0:
+        return out
+    decay = 1.0 - alpha
+    out[0] = x[0]
+    if decay <= 0.0:
+        out[1:] = x[1:]
+        return out
+
+    block = max(1, min(512, int(math.log(_EMA_MAX_GROWTH) / -math.log(decay))))
+    k = np.arange(1, block + 1, dtype=np.float64)[:, np.newaxis]
+    grow = decay ** -k
+    shrink = decay ** k
+
+    prev = out[0]
+    for start in range(1, x.shape[0], block):
+        stop = min(start + block, x.shape[0])
+        n = stop - start
+        acc = np.multiply(x[start:stop], grow[:n], out=out[start:stop])
+        np.cumsum(acc, axis=0, out=acc)
+        acc *= alpha
+        acc += prev
+        acc *= shrink[:n]
+        prev = acc[-1]
+    return out
+
+
+def _sma(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    if x.shape[0] < window:
+        return out
+    csum = np.cumsum(x, axis=0)
+    out[window - 1] = csum[window - 1]
+    np.subtract(csum[window:], csum[:-window], out=out[window:])
+    out[window - 1:] /= window
+    return out
+
+
+def _rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    if x.shape[0] < window:
+        return np.full_like(x, np.nan)
+    # Shift by the first value to keep E[x^2] - E[x]^2 well conditioned
+    centered = x - x[0]
+    mean = _sma(centered, window)
+    var = _sma(np.square(centered, out=centered), window)
+    var -= np.square(mean, out=mean)
+    np.maximum(var, 0.0, out=var, where=~np.isnan(var))
+    return np.sqrt(var, out=var)
+
+
+def ema(x, alpha: float) -> np.ndarray:
+    """
+    Exponential moving average along the last axis, seeded with the first
+    value (pandas `ewm(alpha=..., adjust=False)` semantics).
+
+    The recursion y[t] = y[t-1] + alpha * (x[t] - y[t-1]) is evaluated in
+    closed form per block: y[k] = d^k * (y0 + alpha * cumsum(x[j] * d^-j)),
+    with d = 1 - alpha. Block length is bounded so d^-k stays well inside
+    float64 range; each block is a handful of whole-array operations.
+    """
+    return _series_major(_ema(_time_major(x), alpha), np.ndim(x) == 1)
+
+
+def sma(x, window: int) -> np.ndarray:
+    """Simple moving average along the last axis (NaN until the window fills)"""
+    return _series_major(_sma(_time_major(x), window), np.ndim(x) == 1)
+
+
+def rolling_std(x, window: int) -> np.ndarray:
+    """Population rolling standard deviation along the last axis"""
+    return _series_major(_rolling_std(_time_major(x), window), np.ndim(x) == 1)
+
+
+def compute_indicators(
+    close,
+    high=None,
+    low=None,
+    volume=None,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute the full technical indicator set in one call.
+
+    Inputs are 1-D arrays (one symbol) or 2-D arrays shaped (symbols, bars);
+    outputs keep the input shape. Everything runs on contiguous float64
+    arrays: SMAs, the EMA family, RSI (Wilder), MACD/signal/histogram,
+    Bollinger Bands, ATR (Wilder), OBV and a volume average.
+    """
+    one_dim = np.ndim(close) == 1
+    close = _time_major(close)
+    high = _time_major(high) if high is not None else close
+    low = _time_major(low) if low is not None else close
+
+    out: Dict[str, np.ndarray] = {}
+
+    for window in SMA_WINDOWS:
+        out[f'sma_{window}'] = _sma(close, window)
+    for span in EMA_SPANS:
+        out[f'ema_{span}'] = _ema(close, 2.0 / (span + 1))
+
+    # MACD reuses the EMA family where the spans line up
+    fast = out.get(f'ema_{MACD_FAST}')
+    slow = out.get(f'ema_{MACD_SLOW}')
+    if fast is None:
+        fast = _ema(close, 2.0 / (MACD_FAST + 1))
+    if slow is None:
+        slow = _ema(close, 2.0 / (MACD_SLOW + 1))
+    macd = fast - slow
+    signal = _ema(macd, 2.0 / (MACD_SIGNAL + 1))
+    out['macd'] = macd
+    out['macd_signal'] = signal
+    out['macd_hist'] = macd - signal
+
+    # RSI with Wilder smoothing, seeded with the first price change
+    delta = np.diff(close, axis=0)
+    rsi = np.full_like(close, np.nan)
+    if delta.shape[0]:
+        avg_gain = _ema(np.maximum(delta, 0.0), 1.0 / RSI_PERIOD)
+        avg_loss = _ema(np.maximum(-delta, 0.0), 1.0 / RSI_PERIOD)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = avg_gain / avg_loss
+            rsi[1:] = np.where(avg_loss == 0.0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+    out[f'rsi_{RSI_PERIOD}'] = rsi
+
+    mid = out.get(f'sma_{BOLLINGER_WINDOW}')
+    if mid is None:
+        mid = _sma(close, BOLLINGER_WINDOW)
+    band = _rolling_std(close, BOLLINGER_WINDOW)
+    band *= BOLLINGER_K
+    out['bb_mid'] = mid
+    out['bb_upper'] = mid + band
+    out['bb_lower'] = mid - band
+
+    # True range: the first bar has no previous close
+    true_range = high - low
+    if close.shape[0] > 1:
+        prev_close = close[:-1]
+        np.maximum(true_range[1:], np.abs(high[1:] - prev_close), out=true_range[1:])
+        np.maximum(true_range[1:], np.abs(low[1:] - prev_close), out=true_range[1:])
+    out[f'atr_{ATR_PERIOD}'] = _ema(true_range, 1.0 / ATR_PERIOD)
+
+    if volume is not None:
+        volume = _time_major(volume)
+        signed = np.zeros_like(close)
+        np.multiply(np.sign(delta), volume[1:], out=signed[1:])
+        out['obv'] = np.cumsum(signed, axis=0, out=signed)
+        out[f'volume_sma_{VOLUME_WINDOW}'] = _sma(volume, VOLUME_WINDOW)
+
+    return {name: _series_major(values, one_dim) for name, values in out.items()}
+
+
+def annualized_volatility(close) -> np.ndarray:
+    """Annualized std (ddof=1) of simple daily returns, per series"""
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    returns = close[:, 1:] / close[:, :-1] - 1.0
+    if returns.shape[1] < 2:
+        return np.zeros(close.shape[0])
+    return np.std(returns, axis=1, ddof=1) * math.sqrt(TRADING_DAYS)
+
+
+def last_valid(values: np.ndarray, default: Optional[float] = None) -> Optional[float]:
+    """Latest non-NaN value of a 1-D indicator series as a plain float"""
+    valid = values[~np.isnan(values)]
+    return float(valid[-1]) if len(valid) else default
@@ -1,43 +1,195 @@
-from typing import Optional
+from typing import AsyncIterator, Callable, Iterator, Optional
+import asyncio
 import sys
+import threading
+import time
+
+from core.llm_cache import llm_cache
+from core.llm_clients import llm_clients
+from core.llm_hedge import hedger, latency_tracker
+from core.llm_scheduler import LLM_MAX_RETRIES, is_retryable, llm_scheduler
 
 async def call_llm(provider: str, api_key: str, model: str, system_prompt: str, user_prompt: str) -> str:
-    """Centralized LLM Caller"""
-    
+    """Centralized LLM Caller (answers for identical prompts come from llm_cache)"""
+    key = llm_cache.make_key(provider, model, system_prompt, user_prompt) if llm_cache.enabled else None
+    if key:
+        # SQLite reads/writes (and eviction) stay off the event loop
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            return cached
     try:
-        if provider == 'openai':
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
-            response = client.chat.completions.create(
-                model=model or "gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-            return response.choices[0].message.content
-        
-        elif provider == 'anthropic':
-            import anthropic
-            client = anthropic.Anthropic(api_key=api_key)
-            message = client.messages.create(
-                model=model or "claude-3-opas-20240229",
-                max_tokens=1024,
-                messages=[
-                   {"role": "user", "content": f"{system_prompt}\n\n{user_prompt}"}
-                ]
-            )
-            return message.content[0].text
-        
-        elif provider == 'google':
-            import google.generativeai as genai
-            genai.configure(api_key=api_key)
-            model_instance = genai.GenerativeModel(model or 'gemini-pro')
-            response = model_instance.generate_content(f"{system_prompt}\n\n{user_prompt}")
-            return response.text
-            
-        return "Error: Unsupported provider or missing library."
-        
+        response = await complete(provider, api_key, model, system_prompt, user_prompt)
+        if key and response:
+            await asyncio.to_thread(llm_cache.set, key, provider, model, system_prompt + user_prompt, response)
+        return response
     except Exception as e:
         print(f"LLM Error: {e}")
         return f"AI Analysis failed: {str(e)}"
+
+async def complete(provider: str, api_key: str, model: str, system_prompt: str, user_prompt: str,
+                   priority: Optional[int] = None) -> str:
+    """
+    One completion through the pooled async clients, admitted by the
+    scheduler (rate limits, priority, retries); raises on failure.
+    With hedging configured, a slow primary is raced against the backup
+    provider once it passes its usual latency.
+    """
+    def attempt(provider: str, api_key: str, model: str):
+        return lambda: llm_scheduler.call(
+            provider,
+            lambda: _complete_once(provider, api_key, model, system_prompt, user_prompt),
+            priority,
+        )
+
+    target = hedger.target(provider, api_key)
+    if target is None:
+        return await attempt(provider, api_key, model)()
+    return await hedger.run(attempt(provider, api_key, model), attempt(*target), hedger.delay(provider, model))
+
+async def _complete_once(provider: str, api_key: str, model: str, system_prompt: str, user_prompt: str) -> str:
+    start = time.perf_counter()
+    try:
+        text = await _provider_completion(provider, api_key, model, system_prompt, user_prompt)
+    except asyncio.CancelledError:
+        # Usually a primary that lost to its hedge: it took at least this long
+        latency_tracker.observe(provider, model, time.perf_counter() - start, censored=True)
+        raise
+    latency_tracker.observe(provider, model, time.perf_counter() - start)
+    return text
+
+async def _provider_completion(provider: str, api_key: str, model: str, system_prompt: str, user_prompt: str) -> str:
+    if provider == 'openai':
+        client = llm_clients.get('openai', api_key)
+        response = await client.chat.completions.create(
+            model=model or "gpt-4-turbo-preview",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+        return response.choices[0].message.content
+
+    elif provider == 'anthropic':
+        client = llm_clients.get('anthropic', api_key)
+        message = await client.messages.create(
+            model=model or "claude-3-opas-20240229",
+            max_tokens=1024,
+            messages=[
+               {"role": "user", "content": f"{system_prompt}\n\n{user_prompt}"}
+            ]
+        )
+        return message.content[0].text
+
+    elif provider == 'google':
+        # google-generativeai configures the key process-wide and has no
+        # pluggable HTTP client; keep its blocking call off the event loop
+        return await asyncio.to_thread(_call_google_sync, api_key, model, system_prompt, user_prompt)
+
+    raise ValueError(f"Unsupported provider: {provider}")
+
+def _call_google_sync(api_key: str, model: str, system_prompt: str, user_prompt: str) -> str:
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    model_instance = genai.GenerativeModel(model or 'gemini-pro')
+    response = model_instance.generate_content(f"{system_prompt}\n\n{user_prompt}")
+    return response.text
+
+async def stream_llm(provider: str, api_key: str, model: str, system_prompt: str, user_prompt: str,
+                     use_cache: bool = True, priority: Optional[int] = None) -> AsyncIterator[str]:
+    """Yield response text chunks as the provider streams them; raises on failure"""
+    key = llm_cache.make_key(provider, model, system_prompt, user_prompt) if use_cache and llm_cache.enabled else None
+    if key:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            yield cached
+            return
+    pieces = []
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            async with llm_scheduler.slot(provider, priority):
+                async for chunk in _stream_provider(provider, api_key, model, system_prompt, user_prompt):
+                    pieces.append(chunk)
+                    yield chunk
+            break
+        except Exception as e:
+            # A stream can only be retried before any text reached the caller
+            if pieces or attempt == LLM_MAX_RETRIES or not is_retryable(e):
+                llm_scheduler.note_failure(provider)
+                raise
+            llm_scheduler.note_retry(provider, e)
+            await asyncio.sleep(llm_scheduler.backoff(attempt, e))
+    if key and pieces:
+        await asyncio.to_thread(llm_cache.set, key, provider, model, system_prompt + user_prompt, ''.join(pieces))
+
+async def _stream_provider(provider: str, api_key: str, model: str, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+    if provider == 'openai':
+        client = llm_clients.get('openai', api_key)
+        stream = await client.chat.completions.create(
+            model=model or "gpt-4-turbo-preview",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    elif provider == 'anthropic':
+        client = llm_clients.get('anthropic', api_key)
+        async with client.messages.stream(
+            model=model or "claude-3-opas-20240229",
+            max_tokens=1024,
+            messages=[
+               {"role": "user", "content": f"{system_prompt}\n\n{user_prompt}"}
+            ]
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+    elif provider == 'google':
+        async for chunk in _iterate_in_thread(lambda: _stream_google_sync(api_key, model, system_prompt, user_prompt)):
+            yield chunk
+
+    else:
+        raise ValueError(f"Unsupported provider: {provider}")
+
+def _stream_google_sync(api_key: str, model: str, system_prompt: str, user_prompt: str) -> Iterator[str]:
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    model_instance = genai.GenerativeModel(model or 'gemini-pro')
+    for chunk in model_instance.generate_content(f"{system_prompt}\n\n{user_prompt}", stream=True):
+        if chunk.text:
+            yield chunk.text
+
+async def _iterate_in_thread(make_iterator: Callable[[], Iterator[str]]) -> AsyncIterator[str]:
+    """Drive a blocking iterator on a worker thread, handing items to the event loop"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def pump():
+        try:
+            for item in make_iterator():
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    worker = asyncio.ensure_future(asyncio.to_thread(pump))
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Consumer finished or went away: let the pump thread wind down
+        stop.set()
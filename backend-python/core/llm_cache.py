@@ -0,0 +1,162 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from core.tokens import estimate_tokens
+
+CACHE_PATH = os.getenv(
+    'LLM_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'llm_responses.sqlite'),
+)
+# Seconds a stored completion stays valid; 0 disables the cache
+CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', str(24 * 3600)))
+CACHE_MAX_MB = float(os.getenv('LLM_CACHE_MAX_MB', '64'))
+# Decimal numbers in prompts are rounded to this many significant digits
+# before hashing, so a 0.1% price move still hits the cache; 0 hashes them verbatim
+QUANTIZE_DIGITS = int(os.getenv('LLM_CACHE_QUANTIZE_DIGITS', '3'))
+
+# Standalone decimal numbers only. Digits inside identifiers such as BSE
+# codes ("500325.BO"), "SMA20" or "FY2026" are left alone, and so are
+# integers: years, dates ("2026-10-18") and share counts must not collide
+NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+(?:[eE][-+]?\d+)?|[eE][-+]?\d+)(?![.\w])')
+
+
+def quantize_numbers(text: str, digits: int) -> str:
+    """Round every decimal number in text to `digits` significant digits"""
+    if digits <= 0:
+        return text
+
+    def repl(match):
+        value = float(match.group())
+        if value == 0 or value != value:
+            return match.group()
+        return f"{value:.{digits}g}"
+
+    return NUMBER.sub(repl, text)
+
+
+class LLMResponseCache:
+    """
+    Persistent completion cache in a single SQLite file, keyed by a hash of
+    (provider, model, system prompt, user prompt). Entries expire after a
+    TTL; when the file grows past its budget the least recently used rows go.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL,
+                 max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024), quantize_digits: int = QUANTIZE_DIGITS):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.quantize_digits = quantize_digits
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' key TEXT PRIMARY KEY, provider TEXT, model TEXT, response TEXT,'
+                ' tokens INTEGER, size INTEGER, created REAL, last_used REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)')
+            self._conn = conn
+        return self._conn
+
+    def make_key(self, provider: str, model: str, system_prompt: str, user_prompt: str) -> str:
+        parts = [
+            provider or '',
+            model or '',
+            quantize_numbers(system_prompt, self.quantize_digits),
+            quantize_numbers(user_prompt, self.quantize_digits),
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db().execute(
+                    'SELECT response, tokens, created FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None or now - row[2] > self.ttl:
+                    self.misses += 1
+                    return None
+                self._db().execute('UPDATE responses SET last_used = ? WHERE key = ?', (now, key))
+            except sqlite3.Error as e:
+                print(f"Error reading LLM cache: {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.tokens_saved += row[1]
+            return row[0]
+
+    def set(self, key: str, provider: str, model: str, prompt: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode())
+        tokens = estimate_tokens(prompt, provider) + estimate_tokens(response, provider)
+        with self._lock:
+            try:
+                self._db().execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, provider, model, response, tokens, size, now, now),
+                )
+                self._evict(now)
+            except sqlite3.Error as e:
+                print(f"Error writing LLM cache: {e}")
+
+    def _evict(self, now: float) -> None:
+        db = self._db()
+        expired = db.execute('DELETE FROM responses WHERE created < ?', (now - self.ttl,)).rowcount
+        self.evictions += max(expired, 0)
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% of the budget so we don't evict on every insert
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in db.execute('SELECT key, size FROM responses ORDER BY last_used'):
+            if freed >= target:
+                break
+            victims.append((key,))
+            freed += size
+        db.executemany('DELETE FROM responses WHERE key = ?', victims)
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            try:
+                entries, size = self._db().execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+                ).fetchone()
+            except sqlite3.Error:
+                entries, size = 0, 0
+        total = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'entries': entries,
+            'size_bytes': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'tokens_saved': self.tokens_saved,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+llm_cache = LLMResponseCache()
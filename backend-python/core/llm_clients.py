@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+import httpx
+
+# Timeouts (seconds) and connection-pool limits for provider HTTP traffic
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '100'))
+LLM_MAX_KEEPALIVE = int(os.getenv('LLM_MAX_KEEPALIVE', '20'))
+# SDK clients unused for this long are dropped
+LLM_CLIENT_IDLE_SECONDS = float(os.getenv('LLM_CLIENT_IDLE_SECONDS', '600'))
+
+
+def key_hash(api_key: str) -> str:
+    """Registry key for an API key, so raw keys are never held as dict keys"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class LLMClientRegistry:
+    """
+    One async SDK client per (provider, API key hash), reused across calls.
+
+    All clients of a provider share a single httpx connection pool (auth is
+    per request), so TLS sessions stay warm no matter which user's key is in
+    use. The pool is tied to the event loop that created it and is rebuilt if
+    a different loop asks for it. SDK retries are off; core.llm_scheduler
+    owns retries and backoff.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+        self._pools: Dict[str, Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def _pool(self, provider: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        entry = self._pools.get(provider)
+        if entry is None or entry[1] is not loop or entry[0].is_closed:
+            pool = httpx.AsyncClient(
+                timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                ),
+            )
+            self._pools[provider] = (pool, loop)
+            # Clients built on the old pool must not outlive it
+            for key in [k for k in self._clients if k[0] == provider]:
+                del self._clients[key]
+        return self._pools[provider][0]
+
+    def _build(self, provider: str, api_key: str) -> Any:
+        if provider == 'openai':
+            from openai import AsyncOpenAI
+            return AsyncOpenAI(api_key=api_key, http_client=self._pool(provider), max_retries=0)
+        if provider == 'anthropic':
+            from anthropic import AsyncAnthropic
+            return AsyncAnthropic(api_key=api_key, http_client=self._pool(provider), max_retries=0)
+        raise ValueError(f"Unsupported provider: {provider}")
+
+    def get(self, provider: str, api_key: str) -> Any:
+        """Async client for this provider and key (call from the event loop)"""
+        key = (provider, key_hash(api_key))
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            self._pool(provider)
+            entry = self._clients.get(key)
+            if entry is None:
+                client = self._build(provider, api_key)
+                self.created += 1
+            else:
+                client = entry[0]
+                self.reused += 1
+            self._clients[key] = (client, now)
+            return client
+
+    def _evict_idle(self, now: float) -> None:
+        # Dropping the SDK wrapper is enough; the shared pool stays open
+        for key, (_, last_used) in list(self._clients.items()):
+            if now - last_used > LLM_CLIENT_IDLE_SECONDS:
+                del self._clients[key]
+                self.evicted += 1
+
+    async def aclose(self) -> None:
+        """Close the shared pools (application shutdown)"""
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+            self._clients.clear()
+        for pool, loop in pools:
+            if loop is asyncio.get_running_loop():
+                await pool.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'pools': sorted(self._pools),
+                'created': self.created,
+                'reused': self.reused,
+                'evicted': self.evicted,
+            }
+
+
+llm_clients = LLMClientRegistry()
@@ -0,0 +1,169 @@
+import asyncio
+import bisect
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Hedging is off unless a secondary target is configured
+HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', '0').lower() in ('1', 'true', 'yes')
+HEDGE_PROVIDER = os.getenv('LLM_HEDGE_PROVIDER', '')
+HEDGE_MODEL = os.getenv('LLM_HEDGE_MODEL', '')
+# Key for the secondary provider; when it matches the primary provider the
+# caller's key is used
+HEDGE_API_KEY = os.getenv('LLM_HEDGE_API_KEY', '')
+# Fire the hedge once the primary is slower than this percentile of its recent latency
+HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+# Delay used until enough samples exist, and a floor for the adaptive delay
+HEDGE_DEFAULT_DELAY = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', '10'))
+HEDGE_MIN_DELAY = float(os.getenv('LLM_HEDGE_MIN_DELAY', '1'))
+
+# Log-spaced bucket upper bounds: 50ms .. ~5min
+BUCKET_BOUNDS = [0.05 * 1.25 ** i for i in range(40)]
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with exponential decay, so percentiles
+    follow the provider's recent behaviour rather than its whole history.
+    A request cancelled before it finished (the primary losing to a hedge)
+    is recorded at its elapsed time as a censored sample: its real latency
+    was at least that, so leaving it out would pull the tail, and with it
+    the hedge delay, ever lower.
+    """
+
+    def __init__(self, decay: float = 0.995):
+        self.decay = decay
+        self.counts = [0.0] * (len(BUCKET_BOUNDS) + 1)
+        self.weight = 0.0
+        self.samples = 0
+        self.censored = 0
+
+    def observe(self, seconds: float, censored: bool = False) -> None:
+        for i in range(len(self.counts)):
+            self.counts[i] *= self.decay
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1.0
+        self.weight = self.weight * self.decay + 1.0
+        self.samples += 1
+        self.censored += censored
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency (s) below which q% of the decayed weight falls"""
+        if not self.samples:
+            return None
+        target = self.weight * q / 100.0
+        cumulative = 0.0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= target and count > 0:
+                low = BUCKET_BOUNDS[i - 1] if i > 0 else 0.0
+                high = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else BUCKET_BOUNDS[-1]
+                # Interpolate inside the bucket
+                return low + (high - low) * (target - cumulative) / count
+            cumulative += count
+        return BUCKET_BOUNDS[-1]
+
+
+class LatencyTracker:
+    """Completion latency histograms per (provider, model)"""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, provider: str, model: str, seconds: float, censored: bool = False) -> None:
+        key = (provider, model or 'default')
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(seconds, censored)
+
+    def histogram(self, provider: str, model: str) -> Optional[LatencyHistogram]:
+        return self._histograms.get((provider, model or 'default'))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                f"{provider}/{model}": {
+                    'samples': h.samples,
+                    'censored': h.censored,
+                    'p50_ms': round(h.percentile(50) * 1000, 1),
+                    'p95_ms': round(h.percentile(95) * 1000, 1),
+                    'p99_ms': round(h.percentile(99) * 1000, 1),
+                }
+                for (provider, model), h in self._histograms.items()
+            }
+
+
+latency_tracker = LatencyTracker()
+
+
+class Hedger:
+    """Issues a backup request when the primary runs past its usual latency"""
+
+    def __init__(self):
+        self.fired = 0
+        self.secondary_wins = 0
+        self.primary_wins_after_hedge = 0
+
+    def target(self, provider: str, api_key: str) -> Optional[Tuple[str, str, str]]:
+        """(provider, key, model) of the backup, or None when hedging doesn't apply"""
+        if not HEDGE_ENABLED or not HEDGE_PROVIDER:
+            return None
+        key = HEDGE_API_KEY or (api_key if HEDGE_PROVIDER == provider else '')
+        if not key:
+            return None
+        return HEDGE_PROVIDER, key, HEDGE_MODEL
+
+    def delay(self, provider: str, model: str) -> float:
+        histogram = latency_tracker.histogram(provider, model)
+        if histogram is None or histogram.samples < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, histogram.percentile(HEDGE_PERCENTILE))
+
+    async def run(self, primary: Callable[[], Awaitable[Any]], secondary: Callable[[], Awaitable[Any]],
+                  delay: float) -> Any:
+        """Return the first successful result; the slower request is cancelled"""
+        first = asyncio.ensure_future(primary())
+        backup = None
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done:
+                return first.result()
+
+            self.fired += 1
+            backup = asyncio.ensure_future(secondary())
+            pending = {first, backup}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.secondary_wins += 1
+                        else:
+                            self.primary_wins_after_hedge += 1
+                        return task.result()
+                    # Report the primary's error if both fail
+                    if task is first or error is None:
+                        error = task.exception()
+            raise error
+        finally:
+            # Loser, or both when the caller itself was cancelled
+            for task in (first, backup):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': bool(HEDGE_ENABLED and HEDGE_PROVIDER),
+            'secondary': f"{HEDGE_PROVIDER}/{HEDGE_MODEL or 'default'}" if HEDGE_PROVIDER else None,
+            'percentile': HEDGE_PERCENTILE,
+            'fired': self.fired,
+            'secondary_wins': self.secondary_wins,
+            'primary_wins_after_hedge': self.primary_wins_after_hedge,
+            'latency': latency_tracker.stats(),
+        }
+
+
+hedger = Hedger()
@@ -0,0 +1,293 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+# Request priorities, lower runs first
+INTERACTIVE, ANALYSIS, BATCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', ANALYSIS: 'analysis', BATCH: 'batch'}
+
+# Defaults per provider; LLM_RATE_PER_SECOND_OPENAI=... etc. override one provider
+LLM_RATE_PER_SECOND = float(os.getenv('LLM_RATE_PER_SECOND', '8'))
+LLM_BURST = float(os.getenv('LLM_BURST', '16'))
+LLM_PROVIDER_CONCURRENCY = int(os.getenv('LLM_PROVIDER_CONCURRENCY', '16'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '0.5'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '20'))
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+_priority: ContextVar[int] = ContextVar('llm_priority', default=ANALYSIS)
+_shared: ContextVar[Optional['SharedPriority']] = ContextVar('llm_shared_priority', default=None)
+
+
+@contextmanager
+def llm_priority(level: int):
+    """Run LLM calls made inside this block (and tasks it spawns) at `level`"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    """Level LLM calls made here would queue at"""
+    shared = _shared.get()
+    return shared.level if shared is not None else _priority.get()
+
+
+class SharedPriority:
+    """
+    Priority of work that several callers wait on (a singleflight leader).
+    It starts at the level of the caller that started it; a more urgent
+    caller joining promotes it, including LLM requests it already has
+    queued, so an interactive request never waits at batch priority
+    behind a batch that happened to start the same analysis first.
+    """
+
+    def __init__(self, level: int):
+        self.level = level
+        self._queued: List[list] = []
+        self._children: List['SharedPriority'] = []
+
+    async def run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() with its LLM calls (and nested shared work) at this priority"""
+        parent = _shared.get()
+        if parent is not None:
+            parent._children.append(self)
+        _shared.set(self)
+        try:
+            return await fn()
+        finally:
+            if parent is not None:
+                parent._children.remove(self)
+
+    def promote(self, level: int) -> None:
+        if level >= self.level:
+            return
+        self.level = level
+        self._queued[:] = [llm_scheduler._requeue(entry, level) for entry in self._queued]
+        for child in list(self._children):
+            child.promote(level)
+
+
+def shared_priority() -> SharedPriority:
+    """A SharedPriority starting at the caller's current level"""
+    return SharedPriority(current_priority())
+
+
+def _setting(name: str, provider: str, default: float) -> float:
+    return float(os.getenv(f'{name}_{provider.upper()}', default))
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, overloads, 5xx and transport failures are worth another try"""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRY_STATUSES
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    # SDK wrappers around transport errors (openai/anthropic APIConnectionError, APITimeoutError)
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError')
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume a token; returns 0, or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _ProviderQueue:
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.bucket = _TokenBucket(
+            _setting('LLM_RATE_PER_SECOND', provider, LLM_RATE_PER_SECOND),
+            _setting('LLM_BURST', provider, LLM_BURST),
+        )
+        self.concurrency = int(_setting('LLM_PROVIDER_CONCURRENCY', provider, LLM_PROVIDER_CONCURRENCY))
+        self.heap = []
+        self.in_flight = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.waits = {level: deque(maxlen=1000) for level in PRIORITY_NAMES}
+        self.dispatched = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM providers.
+
+    Each provider has a token bucket (requests per second with a burst)
+    and a cap on concurrent requests. Callers wait in a priority heap, so
+    interactive chat is admitted ahead of queued analysis and batch work.
+    Retryable failures back off with full jitter and honour Retry-After.
+    """
+
+    def __init__(self):
+        self._queues: Dict[str, _ProviderQueue] = {}
+        self._seq = itertools.count()
+
+    def _queue(self, provider: str) -> _ProviderQueue:
+        queue = self._queues.get(provider)
+        if queue is None:
+            queue = self._queues[provider] = _ProviderQueue(provider)
+        return queue
+
+    async def acquire(self, provider: str, priority: Optional[int] = None) -> None:
+        queue = self._queue(provider)
+        shared = _shared.get() if priority is None else None
+        level = current_priority() if priority is None else priority
+        waiter = asyncio.get_running_loop().create_future()
+        # [level, seq, waiter, enqueued, queue, live]; a promotion retires the entry and pushes a new one
+        entry = [level, next(self._seq), waiter, time.monotonic(), queue, True]
+        heapq.heappush(queue.heap, entry)
+        if shared is not None:
+            shared._queued.append(entry)
+        self._dispatch(queue)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Granted just as we were cancelled: hand the slot back
+            if waiter.done() and not waiter.cancelled():
+                self.release(provider)
+            raise
+        finally:
+            if shared is not None:
+                shared._queued[:] = [e for e in shared._queued if e[2] is not waiter]
+
+    def _requeue(self, entry: list, level: int) -> list:
+        """Move a waiting request to a more urgent level; returns its new heap entry"""
+        waiter, queue = entry[2], entry[4]
+        if waiter.done() or not entry[5]:
+            return entry
+        entry[5] = False
+        promoted = [level, next(self._seq), waiter, entry[3], queue, True]
+        heapq.heappush(queue.heap, promoted)
+        self._dispatch(queue)
+        return promoted
+
+    def release(self, provider: str) -> None:
+        queue = self._queue(provider)
+        queue.in_flight -= 1
+        self._dispatch(queue)
+
+    def _dispatch(self, queue: _ProviderQueue) -> None:
+        while queue.heap and queue.in_flight < queue.concurrency:
+            level, _, waiter, enqueued, _, live = queue.heap[0]
+            if waiter.done() or not live:
+                heapq.heappop(queue.heap)
+                continue
+            wait = queue.bucket.take()
+            if wait > 0:
+                if queue.timer is None:
+                    queue.timer = asyncio.get_running_loop().call_later(wait, self._wake, queue)
+                return
+            heapq.heappop(queue.heap)
+            queue.in_flight += 1
+            queue.dispatched += 1
+            queue.waits[level].append(time.monotonic() - enqueued)
+            waiter.set_result(None)
+
+    def _wake(self, queue: _ProviderQueue) -> None:
+        queue.timer = None
+        self._dispatch(queue)
+
+    @asynccontextmanager
+    async def slot(self, provider: str, priority: Optional[int] = None):
+        await self.acquire(provider, priority)
+        try:
+            yield
+        finally:
+            self.release(provider)
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Full-jitter exponential backoff, or the provider's Retry-After"""
+        hinted = _retry_after(error) if error is not None else None
+        if hinted is not None:
+            return min(hinted, LLM_BACKOFF_MAX)
+        return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+    def note_retry(self, provider: str, error: BaseException) -> None:
+        queue = self._queue(provider)
+        queue.retries += 1
+        if getattr(error, 'status_code', None) == 429:
+            queue.rate_limited += 1
+
+    def note_failure(self, provider: str) -> None:
+        self._queue(provider).failures += 1
+
+    async def call(self, provider: str, fn: Callable[[], Awaitable[Any]], priority: Optional[int] = None) -> Any:
+        """Run fn under a provider slot, retrying retryable failures"""
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                async with self.slot(provider, priority):
+                    return await fn()
+            except Exception as e:
+                if attempt == LLM_MAX_RETRIES or not is_retryable(e):
+                    self.note_failure(provider)
+                    raise
+                self.note_retry(provider, e)
+                # Back off outside the slot so other callers keep flowing
+                await asyncio.sleep(self.backoff(attempt, e))
+
+    def stats(self) -> Dict[str, Any]:
+        out = {}
+        for provider, queue in self._queues.items():
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for level, _, waiter, _, _, live in queue.heap:
+                if live and not waiter.done():
+                    depth[PRIORITY_NAMES[level]] += 1
+            waits = {}
+            for level, samples in queue.waits.items():
+                if samples:
+                    ordered = sorted(samples)
+                    waits[PRIORITY_NAMES[level]] = {
+                        'avg_ms': round(sum(ordered) / len(ordered) * 1000, 1),
+                        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                    }
+            out[provider] = {
+                'queue_depth': depth,
+                'in_flight': queue.in_flight,
+                'concurrency': queue.concurrency,
+                'rate_per_second': queue.bucket.rate,
+                'dispatched': queue.dispatched,
+                'retries': queue.retries,
+                'rate_limited': queue.rate_limited,
+                'failures': queue.failures,
+                'wait': waits,
+            }
+        return out
+
+
+llm_scheduler = LLMScheduler()
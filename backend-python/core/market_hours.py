@@ -0,0 +1,57 @@
+from datetime import datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+# Regular cash sessions (Mon-Fri). Exchange holidays are not modelled: on a
+# holiday the market just looks "open" and results get the shorter TTL.
+SESSIONS = {
+    'NSE': (ZoneInfo('Asia/Kolkata'), time(9, 15), time(15, 30)),
+    'BSE': (ZoneInfo('Asia/Kolkata'), time(9, 15), time(15, 30)),
+    'US': (ZoneInfo('America/New_York'), time(9, 30), time(16, 0)),
+}
+
+SUFFIX_EXCHANGES = {
+    '.NS': 'NSE',
+    '.BO': 'BSE',
+}
+
+
+def exchange_for(symbol: str) -> str:
+    """Exchange whose session governs a resolved Yahoo symbol"""
+    symbol = symbol.upper()
+    for suffix, exchange in SUFFIX_EXCHANGES.items():
+        if symbol.endswith(suffix):
+            return exchange
+    if symbol.startswith('^NSE') or symbol == '^BSESN':
+        return 'NSE'
+    return 'US'
+
+
+def _local_now(exchange: str, now: Optional[datetime]) -> datetime:
+    tz = SESSIONS[exchange][0]
+    if now is None:
+        return datetime.now(tz)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=ZoneInfo('UTC'))
+    return now.astimezone(tz)
+
+
+def is_open(exchange: str, now: Optional[datetime] = None) -> bool:
+    """Whether the exchange's regular session is running"""
+    tz, open_at, close_at = SESSIONS[exchange]
+    local = _local_now(exchange, now)
+    return local.weekday() < 5 and open_at <= local.time() < close_at
+
+
+def seconds_until_open(exchange: str, now: Optional[datetime] = None) -> float:
+    """Seconds until the next session opens (0 while it is open)"""
+    tz, open_at, _ = SESSIONS[exchange]
+    local = _local_now(exchange, now)
+    if is_open(exchange, local):
+        return 0.0
+    candidate = local.replace(hour=open_at.hour, minute=open_at.minute, second=0, microsecond=0)
+    if candidate <= local:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return (candidate - local).total_seconds()
@@ -0,0 +1,240 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import yfinance as yf
+
+STORE_PATH = os.getenv(
+    'NEWS_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'news.sqlite'),
+)
+# How long stored headlines are served before asking Yahoo for newer ones
+REFRESH_SECONDS = float(os.getenv('NEWS_REFRESH_SECONDS', '300'))
+RETENTION_DAYS = float(os.getenv('NEWS_RETENTION_DAYS', '30'))
+# Headlines whose SimHash fingerprints differ in at most this many bits are
+# treated as the same story (headlines are short, so this is looser than the
+# usual 3 bits for documents)
+DUPLICATE_BITS = int(os.getenv('NEWS_DUPLICATE_BITS', '6'))
+# Only stories this close in time are compared for near-duplicates
+DUPLICATE_WINDOW = 3 * 24 * 3600
+
+WORD = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset('a an and as at by for from in is it of on or the to with'.split())
+
+
+class NewsItem:
+    """One normalized headline; slotted since a store read builds many of them"""
+
+    __slots__ = ('title', 'publisher', 'ts', 'link', 'snippet', 'source', 'simhash')
+
+    def __init__(self, title: str, publisher: str, ts: Optional[float], link: Optional[str],
+                 snippet: str = '', source: str = 'yahoo', simhash: Optional[int] = None):
+        self.title = title
+        self.publisher = publisher
+        self.ts = ts
+        self.link = link
+        self.snippet = snippet
+        self.source = source
+        self.simhash = simhash if simhash is not None else title_simhash(title)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "publisher": self.publisher,
+            "ts": self.ts,
+            "link": self.link,
+            "source": self.source,
+        }
+
+
+def title_simhash(title: str) -> int:
+    """64-bit SimHash over the headline's words (case, punctuation and stopwords ignored)"""
+    weights = [0] * 64
+    for word in set(WORD.findall(title.lower())) - STOPWORDS:
+        h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    # Stored in a signed SQLite INTEGER
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def is_near_duplicate(a: int, b: int, bits: int = DUPLICATE_BITS) -> bool:
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count('1') <= bits
+
+
+def collapse_duplicates(items: Iterable[NewsItem], bits: int = DUPLICATE_BITS) -> List[NewsItem]:
+    """Keep the first of each group of near-identical headlines"""
+    kept: List[NewsItem] = []
+    for item in items:
+        if not any(is_near_duplicate(item.simhash, other.simhash, bits) for other in kept):
+            kept.append(item)
+    return kept
+
+
+def _raw_timestamp(n: Dict[str, Any]) -> Optional[float]:
+    ts = n.get('providerPublishTime')
+    if ts:
+        return float(ts)
+    pub_date = (n.get('content') or {}).get('pubDate')
+    if isinstance(pub_date, str):
+        try:
+            # ISO format like "2026-01-23T21:46:00Z"
+            return datetime.fromisoformat(pub_date.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def parse_yahoo_item(n: Dict[str, Any], ts: Optional[float] = None) -> Optional[NewsItem]:
+    """Normalize one `Ticker.news` entry (flat or nested under 'content')"""
+    content = n.get('content') or {}
+    title = n.get('title') or content.get('title')
+    if not title:
+        return None
+    publisher = n.get('publisher') or (content.get('provider') or {}).get('displayName') or 'Unknown Source'
+    link = n.get('link') or (content.get('canonicalUrl') or {}).get('url') or (content.get('clickThroughUrl') or {}).get('url')
+    ts = ts if ts is not None else _raw_timestamp(n)
+    return NewsItem(title, publisher, ts if ts and ts > 0 else None, link)
+
+
+class NewsStore:
+    """
+    Per-ticker headline store in SQLite, indexed by (ticker, ts).
+
+    A read inside the refresh window is served from disk. After it, Yahoo's
+    feed is fetched once and only entries newer than the last stored
+    timestamp are parsed and inserted; a headline that SimHash-matches a
+    story stored in the previous few days is counted as a duplicate and
+    skipped.
+    """
+
+    def __init__(self, path: str = STORE_PATH, refresh_seconds: float = REFRESH_SECONDS):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}
+        self.upstream_fetches = 0
+        self.inserted = 0
+        self.skipped_seen = 0
+        self.duplicates = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS items ('
+                ' ticker TEXT, ts REAL, title TEXT, publisher TEXT, link TEXT, simhash INTEGER,'
+                ' PRIMARY KEY (ticker, title))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS items_ticker_ts ON items(ticker, ts)')
+            conn.execute('CREATE TABLE IF NOT EXISTS feeds (ticker TEXT PRIMARY KEY, fetched_at REAL, last_ts REAL)')
+            self._conn = conn
+        return self._conn
+
+    def get_items(self, ticker: str, limit: int = 20) -> List[NewsItem]:
+        """Newest stored headlines for ticker, topping up from Yahoo when stale"""
+        with self._lock_for(ticker):
+            with self._lock:
+                feed = self._db().execute(
+                    'SELECT fetched_at, last_ts FROM feeds WHERE ticker = ?', (ticker,)
+                ).fetchone()
+            fetched_at, last_ts = feed or (0.0, None)
+            if time.time() - fetched_at >= self.refresh_seconds:
+                try:
+                    self._refresh(ticker, last_ts)
+                except Exception as e:
+                    # Serve what is stored; an empty store surfaces as no news
+                    print(f"Error refreshing news for {ticker}: {e}")
+        with self._lock:
+            rows = self._db().execute(
+                'SELECT title, publisher, ts, link, simhash FROM items'
+                ' WHERE ticker = ? ORDER BY ts DESC LIMIT ?', (ticker, limit)
+            ).fetchall()
+        return [NewsItem(title, publisher, ts, link, simhash=simhash) for title, publisher, ts, link, simhash in rows]
+
+    def _refresh(self, ticker: str, last_ts: Optional[float]) -> None:
+        self.upstream_fetches += 1
+        raw = yf.Ticker(ticker).news or []
+        fresh = []
+        for n in raw:
+            # Cheap timestamp check first; only unseen entries get fully parsed
+            ts = _raw_timestamp(n)
+            if last_ts is not None and ts is not None and ts <= last_ts:
+                self.skipped_seen += 1
+                continue
+            item = parse_yahoo_item(n, ts)
+            if item is not None:
+                fresh.append(item)
+        self.add(ticker, fresh)
+
+    def add(self, ticker: str, items: List[NewsItem]) -> int:
+        """Insert items that are not near-duplicates of stored stories; returns how many were new"""
+        now = time.time()
+        cutoff = now - RETENTION_DAYS * 86400
+        items = [item for item in items if (item.ts or now) >= cutoff]
+        added = 0
+        with self._lock:
+            try:
+                db = self._db()
+                dated = [item.ts for item in items if item.ts]
+                recent = [row[0] for row in db.execute(
+                    'SELECT simhash FROM items WHERE ticker = ? AND ts >= ?',
+                    (ticker, min(dated, default=now) - DUPLICATE_WINDOW),
+                )]
+                for item in items:
+                    if any(is_near_duplicate(item.simhash, other) for other in recent):
+                        self.duplicates += 1
+                        continue
+                    cursor = db.execute(
+                        'INSERT OR IGNORE INTO items VALUES (?, ?, ?, ?, ?, ?)',
+                        (ticker, item.ts or now, item.title, item.publisher, item.link, item.simhash),
+                    )
+                    if cursor.rowcount > 0:
+                        added += 1
+                        recent.append(item.simhash)
+                # Newest timestamp seen, duplicates included, so they aren't re-parsed next time
+                last_ts = db.execute('SELECT MAX(ts) FROM items WHERE ticker = ?', (ticker,)).fetchone()[0]
+                last_ts = max(dated + [last_ts or 0]) or None
+                db.execute('INSERT OR REPLACE INTO feeds VALUES (?, ?, ?)', (ticker, now, last_ts))
+                db.execute('DELETE FROM items WHERE ts < ?', (cutoff,))
+            except sqlite3.Error as e:
+                print(f"Error writing news store: {e}")
+        self.inserted += added
+        return added
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            try:
+                items, tickers = self._db().execute(
+                    'SELECT COUNT(*), COUNT(DISTINCT ticker) FROM items'
+                ).fetchone()
+            except sqlite3.Error:
+                items, tickers = 0, 0
+        return {
+            'items': items,
+            'tickers': tickers,
+            'upstream_fetches': self.upstream_fetches,
+            'inserted': self.inserted,
+            'skipped_seen': self.skipped_seen,
+            'duplicates': self.duplicates,
+        }
+
+
+# Process-wide instance used by NewsAgent
+news_store = NewsStore()
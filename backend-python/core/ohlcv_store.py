@@ -0,0 +1,309 @@
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+STORE_DIR = os.getenv(
+    'OHLCV_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'ohlcv'),
+)
+# How long a stored series is trusted before asking Yahoo for newer bars
+REFRESH_SECONDS = float(os.getenv('OHLCV_REFRESH_SECONDS', '300'))
+# Minimum span fetched on a cold start so the usual 1mo/6mo/1y reads share one download
+SEED_PERIOD = os.getenv('OHLCV_SEED_PERIOD', '2y')
+
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+# Adjusted prices get rewritten on dividends/splits; beyond this relative
+# difference on an overlapping bar the stored series is re-downloaded.
+ADJUSTMENT_TOLERANCE = 1e-4
+
+
+def period_start(period: str, today: Optional[date] = None) -> Optional[date]:
+    """First calendar day covered by a yfinance-style period ('6mo', '1y', 'ytd', ...)"""
+    today = today or date.today()
+    period = period.strip().lower()
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return date(today.year, 1, 1)
+    offsets = {
+        'wk': lambda n: pd.DateOffset(weeks=n),
+        'mo': lambda n: pd.DateOffset(months=n),
+        'y': lambda n: pd.DateOffset(years=n),
+    }
+    if period.endswith('d') and period[:-1].isdigit():
+        # 'Nd' means N sessions; cover them generously with calendar days
+        n = int(period[:-1])
+        return today - timedelta(days=n * 7 // 5 + 7)
+    for unit in ('wk', 'mo', 'y'):
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            n = int(period[:-len(unit)])
+            return (pd.Timestamp(today) - offsets[unit](n)).date()
+    raise ValueError(f"Unsupported period: {period}")
+
+
+class OHLCVStore:
+    """
+    On-disk daily OHLCV store, one .npz file per symbol.
+
+    Each file holds `dates` (datetime64[D]) and one float64 column per field
+    plus a small JSON header recording when Yahoo was last asked and how far
+    back the series is known to be complete. Reads slice the local arrays;
+    only the missing tail (or a missing older range) is fetched upstream.
+    """
+
+    def __init__(self, root: str = STORE_DIR, refresh_seconds: float = REFRESH_SECONDS):
+        self.root = root
+        self.refresh_seconds = refresh_seconds
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.upstream_fetches = 0
+
+    def get_history(self, symbol: str, period: str) -> pd.DataFrame:
+        """Daily bars for `period`, served from disk and topped up incrementally"""
+        start = period_start(period)
+        with self._lock_for(symbol):
+            dates, cols, header = self._load(symbol)
+            dates, cols, header = self._ensure_coverage(symbol, start, dates, cols, header)
+            dates, cols, header = self._ensure_fresh(symbol, dates, cols, header)
+
+        if period.endswith('d') and period[:-1].isdigit():
+            first = max(len(dates) - int(period[:-1]), 0)
+        elif start is not None:
+            first = int(np.searchsorted(dates, np.datetime64(start, 'D')))
+        else:
+            first = 0
+        return self._to_frame(dates[first:], {name: values[first:] for name, values in cols.items()})
+
+    def ingest(self, symbol: str, hist: pd.DataFrame, period: Optional[str] = None) -> None:
+        """Merge an already-downloaded frame (e.g. from yf.download for `period`) into the store"""
+        new_dates, new_cols = self._from_frame(hist)
+        if len(new_dates) == 0:
+            return
+        with self._lock_for(symbol):
+            dates, cols, header = self._load(symbol)
+            dates, cols = self._merge(dates, cols, new_dates, new_cols)
+            if not header.get('complete'):
+                covered_from = str(period_start(period) if period else new_dates[0])
+                if header.get('complete_from') is None or covered_from < header['complete_from']:
+                    header['complete_from'] = covered_from
+            header['fetched_at'] = time.time()
+            self._save(symbol, dates, cols, header)
+
+    def prefetch(self, symbols: List[str], period: str = SEED_PERIOD) -> Dict[str, int]:
+        """
+        Bring many symbols up to date with bulk `yf.download` calls instead
+        of one history request each. Symbols with no usable series get the
+        whole period in one download; stale ones share a second download of
+        the missing tail. Fresh symbols are left alone.
+        """
+        start = period_start(period)
+        cold, stale = [], {}
+        for symbol in dict.fromkeys(symbols):
+            dates, _, header = self._load(symbol)
+            covered = header.get('complete') or (
+                header.get('complete_from') and start is not None
+                and date.fromisoformat(header['complete_from']) <= start
+            )
+            if len(dates) == 0 or not covered:
+                cold.append(symbol)
+            elif time.time() - header.get('fetched_at', 0) >= self.refresh_seconds:
+                stale[symbol] = pd.Timestamp(dates[-2] if len(dates) > 1 else dates[-1]).date()
+
+        fetched = 0
+        if cold:
+            fetched += self._ingest_bulk(cold, period, period=period)
+        if stale:
+            fetched += self._ingest_bulk(list(stale), None, start=min(stale.values()).isoformat())
+        return {'requested': len(set(symbols)), 'cold': len(cold), 'stale': len(stale), 'fetched': fetched}
+
+    def symbols(self) -> List[str]:
+        """Every symbol with a stored series"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name[:-len('.npz')].replace('_idx_', '^')
+            for name in os.listdir(self.root) if name.endswith('.npz')
+        )
+
+    def read(self, symbol: str) -> Tuple[np.ndarray, Dict[str, np.ndarray], Dict]:
+        """Stored (dates, columns, header) as they are on disk, without any upstream call"""
+        with self._lock_for(symbol):
+            return self._load(symbol)
+
+    def _ingest_bulk(self, symbols: List[str], coverage: Optional[str], **kwargs) -> int:
+        """One yf.download for symbols; coverage is the period the download is known to span"""
+        self.upstream_fetches += 1
+        data = yf.download(
+            symbols, interval='1d', group_by='ticker', auto_adjust=True,
+            threads=True, progress=False, **kwargs,
+        )
+        if data is None or data.empty:
+            return 0
+        fetched = 0
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                hist = data[symbol]
+            else:
+                hist = data
+            hist = hist.dropna(subset=['Close'])
+            if not hist.empty:
+                self.ingest(symbol, hist, coverage)
+                fetched += 1
+        return fetched
+
+    # -- coverage / refresh -------------------------------------------------
+
+    def _ensure_coverage(self, symbol: str, start: Optional[date], dates, cols, header):
+        """Backfill older bars when the request reaches before what is stored"""
+        if header.get('complete'):
+            return dates, cols, header
+
+        if len(dates) == 0:
+            seed_start = period_start(SEED_PERIOD)
+            if start is None:
+                hist = self._download(symbol, period='max')
+                header['complete'] = True
+            else:
+                fetch_start = min(start, seed_start)
+                hist = self._download(symbol, start=fetch_start)
+                header['complete_from'] = str(fetch_start)
+            dates, cols = self._from_frame(hist)
+            header['fetched_at'] = time.time()
+            if len(dates):
+                self._save(symbol, dates, cols, header)
+            return dates, cols, header
+
+        complete_from = date.fromisoformat(header['complete_from'])
+        if start is not None and start >= complete_from:
+            return dates, cols, header
+
+        if start is None:
+            hist = self._download(symbol, period='max')
+            header['complete'] = True
+        else:
+            hist = self._download(symbol, start=start, end=complete_from)
+            header['complete_from'] = str(start)
+        old_dates, old_cols = self._from_frame(hist)
+        dates, cols = self._merge(old_dates, old_cols, dates, cols)
+        self._save(symbol, dates, cols, header)
+        return dates, cols, header
+
+    def _ensure_fresh(self, symbol: str, dates, cols, header):
+        """Fetch bars from the last stored session onward once the refresh window has passed"""
+        if time.time() - header.get('fetched_at', 0) < self.refresh_seconds or len(dates) == 0:
+            return dates, cols, header
+
+        # Start one bar before the last stored one: the last bar may be a
+        # partial session, the one before it must match unless Yahoo
+        # re-adjusted the series for a dividend or split.
+        anchor = dates[-2] if len(dates) > 1 else dates[-1]
+        hist = self._download(symbol, start=pd.Timestamp(anchor).date())
+        new_dates, new_cols = self._from_frame(hist)
+        header['fetched_at'] = time.time()
+
+        if len(new_dates) and new_dates[0] == anchor:
+            stored = cols['Close'][np.searchsorted(dates, anchor)]
+            fetched = new_cols['Close'][0]
+            if stored and abs(fetched - stored) / abs(stored) > ADJUSTMENT_TOLERANCE:
+                print(f"OHLCV store: {symbol} history was re-adjusted upstream, re-downloading")
+                refetch_start = header.get('complete_from')
+                if header.get('complete') or refetch_start is None:
+                    hist = self._download(symbol, period='max')
+                    header['complete'] = True
+                else:
+                    hist = self._download(symbol, start=date.fromisoformat(refetch_start))
+                dates, cols = self._from_frame(hist)
+                self._save(symbol, dates, cols, header)
+                return dates, cols, header
+
+        dates, cols = self._merge(dates, cols, new_dates, new_cols)
+        self._save(symbol, dates, cols, header)
+        return dates, cols, header
+
+    # -- array helpers ------------------------------------------------------
+
+    @staticmethod
+    def _merge(dates, cols, new_dates, new_cols) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Union of two sorted series; bars in the newer arrays win on overlap"""
+        if len(new_dates) == 0:
+            return dates, cols
+        if len(dates) == 0:
+            return new_dates, new_cols
+        keep = (dates < new_dates[0]) | (dates > new_dates[-1])
+        merged_dates = np.concatenate([dates[keep], new_dates])
+        order = np.argsort(merged_dates, kind='stable')
+        merged_cols = {
+            name: np.concatenate([cols[name][keep], new_cols[name]])[order] for name in COLUMNS
+        }
+        return merged_dates[order], merged_cols
+
+    @staticmethod
+    def _from_frame(hist: Optional[pd.DataFrame]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        if hist is None or hist.empty:
+            return np.empty(0, dtype='datetime64[D]'), {name: np.empty(0) for name in COLUMNS}
+        index = hist.index
+        if getattr(index, 'tz', None) is not None:
+            index = index.tz_localize(None)
+        dates = index.normalize().values.astype('datetime64[D]')
+        cols = {name: hist[name].to_numpy(dtype=np.float64) for name in COLUMNS}
+        return dates, cols
+
+    @staticmethod
+    def _to_frame(dates: np.ndarray, cols: Dict[str, np.ndarray]) -> pd.DataFrame:
+        index = pd.DatetimeIndex(dates.astype('datetime64[ns]'), name='Date')
+        return pd.DataFrame({name: cols[name] for name in COLUMNS}, index=index)
+
+    # -- persistence --------------------------------------------------------
+
+    def _download(self, symbol: str, **kwargs) -> pd.DataFrame:
+        self.upstream_fetches += 1
+        if 'start' in kwargs:
+            kwargs['start'] = kwargs['start'].isoformat()
+        if 'end' in kwargs:
+            kwargs['end'] = kwargs['end'].isoformat()
+        return yf.Ticker(symbol).history(interval='1d', **kwargs)
+
+    def _path(self, symbol: str) -> str:
+        safe = symbol.replace('/', '_').replace('^', '_idx_')
+        return os.path.join(self.root, f"{safe}.npz")
+
+    def _load(self, symbol: str):
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            dates, cols = self._from_frame(None)
+            return dates, cols, {}
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                header = json.loads(str(data['header']))
+                dates = data['dates']
+                cols = {name: data[name] for name in COLUMNS}
+            return dates, cols, header
+        except Exception as e:
+            print(f"OHLCV store: discarding unreadable file for {symbol}: {e}")
+            dates, cols = self._from_frame(None)
+            return dates, cols, {}
+
+    def _save(self, symbol: str, dates, cols, header) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(symbol)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, dates=dates, header=np.array(json.dumps(header)), **cols)
+        os.replace(tmp, path)
+
+    def _lock_for(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+
+# Process-wide instance used by StockDataService
+ohlcv_store = OHLCVStore()
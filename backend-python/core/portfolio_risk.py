@@ -0,0 +1,282 @@
+import math
+import os
+import time
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.cache import snapshot_cache
+from core.indicators import TRADING_DAYS
+from core.screener import _days, load_histories
+
+RISK_MC_PATHS = int(os.getenv('RISK_MC_PATHS', '100000'))
+RISK_MAX_PATHS = int(os.getenv('RISK_MAX_PATHS', '1000000'))
+RISK_MAX_POSITIONS = int(os.getenv('RISK_MAX_POSITIONS', '1000'))
+# Simulated returns held in memory at once (paths x positions); bounds the chunk size
+RISK_MC_CHUNK_ELEMENTS = int(os.getenv('RISK_MC_CHUNK_ELEMENTS', '2000000'))
+MIN_OBSERVATIONS = 30
+# Keeps the covariance strictly positive definite when the sample estimate is already well conditioned
+MIN_SHRINKAGE = 1e-4
+
+
+def _aligned_log_returns(histories: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray]:
+    """(dates, returns) with daily log returns (days x symbols) over the span every symbol trades"""
+    closes = pd.DataFrame({
+        symbol: pd.Series(hist['Close'].to_numpy(dtype=np.float64), index=_days(hist.index))
+        for symbol, hist in histories.items()
+    })
+    # Forward-fill exchange holidays in a mixed NSE/US book, then keep the common history
+    closes = closes.sort_index().ffill().dropna()
+    values = closes.to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(values), axis=0)
+    return closes.index.to_numpy()[1:], returns
+
+
+def shrunk_covariance(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Ledoit-Wolf covariance with the off-diagonal terms shrunk toward zero
+    (variances are kept). With hundreds of positions and a year of bars the
+    sample covariance is singular; the shrunk estimate stays positive
+    definite, so it has a Cholesky factor.
+    """
+    t, n = returns.shape
+    x = returns - returns.mean(axis=0)
+    sample = x.T @ x / t
+    variances = np.diag(sample)
+    off_diagonal = np.sum(sample ** 2) - np.sum(variances ** 2)
+    squares = x ** 2
+    noise = (np.sum(squares.sum(axis=1) ** 2) - np.sum(squares ** 2)) / t ** 2 - off_diagonal / t
+    shrinkage = float(min(max(noise / off_diagonal, MIN_SHRINKAGE), 1.0)) if off_diagonal > 0 else 1.0
+    cov = sample * (1.0 - shrinkage)
+    cov[np.diag_indices(n)] = variances
+    return cov, shrinkage
+
+
+def risk_model(symbols: Sequence[str], period: str = '1y') -> Dict[str, Any]:
+    """Aligned returns, mean and shrunk covariance for a symbol set; cached per worker"""
+    symbols = sorted(set(symbols))
+    key = snapshot_cache.make_key(tuple(symbols), 'risk_model', period)
+
+    def build():
+        histories = load_histories(symbols, period)
+        missing = [s for s in symbols if histories.get(s) is None or histories[s].empty]
+        if missing:
+            raise ValueError(f"no price history for {', '.join(missing)}")
+        dates, returns = _aligned_log_returns(histories)
+        if len(returns) < MIN_OBSERVATIONS or not np.isfinite(returns).all():
+            raise ValueError(f"only {len(returns)} days of common history for these holdings")
+        flat = [s for s, v in zip(symbols, returns.var(axis=0)) if v == 0]
+        if flat:
+            raise ValueError(f"no price movement for {', '.join(flat)}")
+        cov, shrinkage = shrunk_covariance(returns)
+        return {
+            'symbols': symbols,
+            'dates': dates,
+            'returns': returns,
+            'mean': returns.mean(axis=0),
+            'cov': cov,
+            'chol': np.linalg.cholesky(cov),
+            'shrinkage': shrinkage,
+        }
+
+    return snapshot_cache.get_or_fetch(key, build)
+
+
+def _horizon_returns(returns: np.ndarray, horizon: int) -> np.ndarray:
+    """Overlapping horizon-day log returns from daily ones"""
+    if horizon <= 1:
+        return returns
+    csum = np.cumsum(np.vstack([np.zeros((1, returns.shape[1])), returns]), axis=0)
+    return csum[horizon:] - csum[:-horizon]
+
+
+def _tail(pnl: np.ndarray, confidence: float) -> np.ndarray:
+    """Indices of the worst ceil((1 - confidence) * n) outcomes"""
+    k = max(1, math.ceil((1.0 - confidence) * len(pnl)))
+    return np.argpartition(pnl, k - 1)[:k]
+
+
+def historical_var(model: Dict[str, Any], weights: np.ndarray, confidence: Sequence[float],
+                   horizon: int = 1) -> Dict[float, Dict[str, float]]:
+    """VaR/CVaR (fractions of value) from the observed returns matrix, revalued per asset"""
+    pnl = np.expm1(_horizon_returns(model['returns'], horizon)) @ weights
+    out = {}
+    for level in confidence:
+        tail = pnl[_tail(pnl, level)]
+        out[level] = {'var': float(-tail.max()), 'cvar': float(-tail.mean())}
+    return out
+
+
+def parametric_var(model: Dict[str, Any], weights: np.ndarray, confidence: Sequence[float],
+                   horizon: int = 1) -> Dict[float, Dict[str, float]]:
+    """Delta-normal VaR/CVaR from the mean vector and shrunk covariance"""
+    mean = float(weights @ model['mean']) * horizon
+    sigma = math.sqrt(float(weights @ model['cov'] @ weights) * horizon)
+    normal = NormalDist()
+    out = {}
+    for level in confidence:
+        z = normal.inv_cdf(1.0 - level)
+        out[level] = {
+            'var': -(mean + z * sigma),
+            'cvar': -(mean - sigma * normal.pdf(z) / (1.0 - level)),
+        }
+    return out
+
+
+def monte_carlo_var(model: Dict[str, Any], weights: np.ndarray, confidence: Sequence[float], horizon: int = 1,
+                    paths: int = RISK_MC_PATHS, seed: Optional[int] = None,
+                    df: Optional[float] = None) -> Dict[float, Dict[str, Any]]:
+    """
+    VaR/CVaR from correlated draws of horizon log returns (normal, or
+    multivariate Student-t with `df` degrees of freedom), revalued per
+    asset. Paths are generated in chunks, so memory is bounded by
+    RISK_MC_CHUNK_ELEMENTS rather than paths x positions; only the worst
+    paths (P&L and asset returns) are kept, for the tail statistics and
+    expected-shortfall contributions.
+
+    The same seed gives the same result for any chunk size.
+    """
+    n = len(weights)
+    normal_seed, scale_seed = np.random.SeedSequence(seed).spawn(2)
+    normal_rng, scale_rng = np.random.default_rng(normal_seed), np.random.default_rng(scale_seed)
+    chol_t = np.ascontiguousarray(model['chol'].T * math.sqrt(horizon), dtype=np.float32)
+    drift = (model['mean'] * horizon).astype(np.float32)
+    w32 = weights.astype(np.float32)
+
+    keep = max(1, math.ceil((1.0 - min(confidence)) * paths))
+    chunk = max(1, min(paths, RISK_MC_CHUNK_ELEMENTS // max(n, 1)))
+    draws = np.empty((chunk, n), dtype=np.float32)
+    tail_pnl = np.empty(0)
+    tail_assets = np.empty((0, n), dtype=np.float32)
+
+    for start in range(0, paths, chunk):
+        size = min(chunk, paths - start)
+        z = draws[:size]
+        normal_rng.standard_normal(out=z, dtype=np.float32)
+        x = z @ chol_t
+        if df:
+            x *= np.sqrt((df - 2.0) / scale_rng.chisquare(df, size)).astype(np.float32)[:, None]
+        x += drift
+        np.expm1(x, out=x)
+        chunk_pnl = (x @ w32).astype(np.float64)
+
+        # Running set of the worst `keep` paths seen so far
+        if len(tail_pnl) >= keep:
+            worse = chunk_pnl < tail_pnl.max()
+            chunk_pnl, x = chunk_pnl[worse], x[worse]
+        tail_pnl = np.concatenate([tail_pnl, chunk_pnl])
+        tail_assets = np.concatenate([tail_assets, x])
+        if len(tail_pnl) > keep:
+            worst = np.argpartition(tail_pnl, keep - 1)[:keep]
+            tail_pnl, tail_assets = tail_pnl[worst], tail_assets[worst]
+
+    order = np.argsort(tail_pnl)
+    tail_pnl, tail_assets = tail_pnl[order], tail_assets[order]
+    out = {}
+    for level in confidence:
+        k = max(1, math.ceil((1.0 - level) * paths))
+        out[level] = {
+            'var': float(-tail_pnl[k - 1]),
+            'cvar': float(-tail_pnl[:k].mean()),
+            # Euler split of CVaR: each position's mean loss over the tail paths
+            'components': -(tail_assets[:k].astype(np.float64) * weights).mean(axis=0),
+        }
+    return out
+
+
+def risk_contributions(model: Dict[str, Any], weights: np.ndarray) -> Dict[str, np.ndarray]:
+    """Annualized volatility with its marginal and component (Euler) split across positions"""
+    cov = model['cov'] * TRADING_DAYS
+    exposure = cov @ weights
+    sigma = math.sqrt(float(weights @ exposure))
+    marginal = exposure / sigma if sigma > 0 else np.zeros_like(weights)
+    component = weights * marginal
+    return {
+        'volatility': sigma,
+        'asset_volatility': np.sqrt(np.diag(cov)),
+        'marginal': marginal,
+        'component': component,
+        'share': component / sigma if sigma > 0 else np.zeros_like(weights),
+    }
+
+
+def _r(value: float, digits: int = 6) -> Optional[float]:
+    return round(float(value), digits) if math.isfinite(value) else None
+
+
+def portfolio_risk(holdings: Dict[str, float], confidence: Sequence[float] = (0.95, 0.99), horizon: int = 1,
+                   period: str = '1y', paths: int = RISK_MC_PATHS, seed: Optional[int] = None,
+                   df: Optional[float] = None, value: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Historical, parametric and Monte Carlo VaR/CVaR plus risk contributions
+    for resolved symbol -> weight holdings. Weights are normalized to sum to
+    one; losses are positive fractions of portfolio value (and amounts when
+    `value` is given).
+    """
+    started = time.perf_counter()
+    if not holdings:
+        raise ValueError("no holdings")
+    if len(holdings) > RISK_MAX_POSITIONS:
+        raise ValueError(f"at most {RISK_MAX_POSITIONS} positions")
+    if not 1 <= paths <= RISK_MAX_PATHS:
+        raise ValueError(f"paths must be between 1 and {RISK_MAX_PATHS}")
+    if horizon < 1:
+        raise ValueError("horizon must be at least one day")
+    if df is not None and df <= 2:
+        raise ValueError("df must be greater than 2")
+    levels = sorted(set(confidence))
+    if not levels or not all(0.5 <= c < 1 for c in levels):
+        raise ValueError("confidence levels must be in [0.5, 1)")
+    total = sum(holdings.values())
+    if abs(total) < 1e-12:
+        raise ValueError("weights sum to zero")
+
+    model = risk_model(list(holdings), period)
+    weights = np.array([holdings[s] / total for s in model['symbols']])
+
+    historical = historical_var(model, weights, levels, horizon)
+    parametric = parametric_var(model, weights, levels, horizon)
+    simulated = monte_carlo_var(model, weights, levels, horizon, paths, seed, df)
+    contributions = risk_contributions(model, weights)
+
+    var = {}
+    for level in levels:
+        entry = {}
+        for method, result in (('historical', historical), ('parametric', parametric), ('monte_carlo', simulated)):
+            entry[method] = {'var': _r(result[level]['var']), 'cvar': _r(result[level]['cvar'])}
+            if value:
+                entry[method]['var_amount'] = _r(result[level]['var'] * value, 2)
+                entry[method]['cvar_amount'] = _r(result[level]['cvar'] * value, 2)
+        var[f"{level:g}"] = entry
+
+    positions = []
+    for i, symbol in enumerate(model['symbols']):
+        positions.append({
+            'ticker': symbol,
+            'weight': _r(weights[i]),
+            'volatility': _r(contributions['asset_volatility'][i]),
+            'marginal_volatility': _r(contributions['marginal'][i]),
+            'component_volatility': _r(contributions['component'][i]),
+            'risk_share': _r(contributions['share'][i]),
+            'component_cvar': {f"{level:g}": _r(simulated[level]['components'][i]) for level in levels},
+        })
+
+    return {
+        'positions': positions,
+        'portfolio': {
+            'volatility': _r(contributions['volatility']),
+            'expected_return': _r(float(weights @ model['mean']) * TRADING_DAYS),
+        },
+        'var': var,
+        'horizon_days': horizon,
+        'observations': len(model['returns']),
+        'as_of': str(pd.Timestamp(model['dates'][-1]).date()),
+        'shrinkage': _r(model['shrinkage'], 4),
+        'paths': paths,
+        'seed': seed,
+        'distribution': f"student-t({df:g})" if df else 'normal',
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -0,0 +1,131 @@
+import os
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.cache import snapshot_cache
+from core.indicators import TRADING_DAYS
+from core.screener import _days, load_histories
+
+# Index each symbol is measured against: Indian listings vs the Nifty, everything else vs the S&P 500
+BENCHMARK_INDIA = os.getenv('BENCHMARK_INDIA', '^NSEI')
+BENCHMARK_DEFAULT = os.getenv('BENCHMARK_DEFAULT', '^GSPC')
+INDIAN_SUFFIXES = ('.NS', '.BO')
+MIN_OBSERVATIONS = 30
+
+
+def benchmark_for(symbol: str) -> str:
+    return BENCHMARK_INDIA if symbol.upper().endswith(INDIAN_SUFFIXES) else BENCHMARK_DEFAULT
+
+
+def _closes(hist: pd.DataFrame) -> pd.Series:
+    """Close prices indexed by calendar day"""
+    return pd.Series(hist['Close'].to_numpy(dtype=np.float64), index=_days(hist.index))
+
+
+def benchmark_closes(benchmark: str, period: str = '1y') -> Optional[pd.Series]:
+    """Daily closes of a benchmark index, fetched once per process for every symbol measured against it"""
+    from core.stock_data import StockDataService
+
+    def fetch():
+        hist = StockDataService._get_history(benchmark, period)
+        if hist is None or hist.empty:
+            return None
+        return _closes(hist).groupby(level=0).last()
+
+    key = snapshot_cache.make_key(benchmark, 'benchmark', period)
+    return snapshot_cache.get_or_fetch(key, fetch)
+
+
+def _r(value: float, digits: int) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def relative_metrics(returns: np.ndarray, bench: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Beta, correlation and annualized tracking error of every column of
+    `returns` (days x symbols) against `bench` (days), in one pass over the
+    matrix. NaN marks a day a symbol did not trade; each column uses only
+    the days where both it and the benchmark have a return.
+    """
+    mask = np.isfinite(returns) & np.isfinite(bench)[:, None]
+    n = mask.sum(axis=0)
+    r = np.where(mask, returns, 0.0)
+    b = np.where(mask, bench[:, None], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where(mask, r - r.sum(axis=0) / n, 0.0)
+        b = np.where(mask, b - b.sum(axis=0) / n, 0.0)
+        cov = (r * b).sum(axis=0)
+        var_r = (r * r).sum(axis=0)
+        var_b = (b * b).sum(axis=0)
+        beta = cov / var_b
+        correlation = cov / np.sqrt(var_r * var_b)
+        tracking = np.sqrt(np.maximum(var_r + var_b - 2 * cov, 0.0) / (n - 1) * TRADING_DAYS)
+    short = n < MIN_OBSERVATIONS
+    for values in (beta, correlation, tracking):
+        values[short | ~np.isfinite(values)] = np.nan
+    return {'beta': beta, 'correlation': correlation, 'tracking_error': tracking, 'observations': n}
+
+
+def relative_risk(symbols: Sequence[str], period: str = '1y',
+                  histories: Optional[Dict[str, pd.DataFrame]] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Benchmark-relative metrics for resolved symbols, batched per benchmark.
+    Results are cached per symbol, so warming a watchlist here makes the
+    per-ticker calls of its analyses cache hits.
+    """
+    out: Dict[str, Optional[Dict[str, Any]]] = {}
+    groups: Dict[str, list] = {}
+    for symbol in dict.fromkeys(symbols):
+        benchmark = benchmark_for(symbol)
+        cached = snapshot_cache.get(snapshot_cache.make_key(symbol, 'relative_risk', benchmark, period))
+        if cached is not None:
+            out[symbol] = cached
+        else:
+            groups.setdefault(benchmark, []).append(symbol)
+    if not groups:
+        return out
+
+    histories = dict(histories or {})
+    missing = [s for members in groups.values() for s in members if s not in histories]
+    if missing:
+        histories.update(load_histories(missing, period))
+
+    for benchmark, members in groups.items():
+        try:
+            bench = benchmark_closes(benchmark, period)
+        except Exception as e:
+            print(f"Error loading benchmark {benchmark}: {e}")
+            bench = None
+        if bench is None or len(bench) < 2:
+            out.update({symbol: None for symbol in members})
+            continue
+
+        # Closes on the benchmark's trading days: a day the symbol did not trade
+        # leaves NaN returns either side rather than a multi-day return
+        closes = pd.DataFrame({
+            symbol: _closes(histories[symbol]).groupby(level=0).last()
+            for symbol in members
+            if histories.get(symbol) is not None and not histories[symbol].empty
+        }).reindex(bench.index)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(np.log(closes.to_numpy(dtype=np.float64)), axis=0)
+            bench_returns = np.diff(np.log(bench.to_numpy(dtype=np.float64)))
+        metrics = relative_metrics(returns, bench_returns)
+
+        for symbol in members:
+            if symbol not in closes:
+                out[symbol] = None
+                continue
+            i = closes.columns.get_loc(symbol)
+            result = {
+                'benchmark': benchmark,
+                'beta': _r(metrics['beta'][i], 2),
+                'correlation': _r(metrics['correlation'][i], 2),
+                'tracking_error': _r(metrics['tracking_error'][i] * 100, 2),
+                'observations': int(metrics['observations'][i]),
+            }
+            snapshot_cache.set(snapshot_cache.make_key(symbol, 'relative_risk', benchmark, period), result)
+            out[symbol] = result
+    return out
@@ -0,0 +1,99 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from core.market_hours import exchange_for, is_open, seconds_until_open
+
+# (TTL while the exchange is open, TTL while closed) in seconds per analysis
+# type. None while closed means "until the next session opens".
+TTLS: Dict[str, Tuple[float, Optional[float]]] = {
+    'fundamental': (6 * 3600, 24 * 3600),
+    'technical': (60, None),
+    'risk': (15 * 60, None),
+    'sentiment': (5 * 60, 30 * 60),
+    'news': (5 * 60, 30 * 60),
+    'advisor': (2 * 60, None),
+}
+DEFAULT_TTL = (60, 15 * 60)
+# Closed-market TTLs never exceed this (long weekends, stale calendars)
+MAX_CLOSED_TTL = 3 * 24 * 3600
+
+MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '2048'))
+# After expiry an entry may still be served (and refreshed in the background)
+# for STALE_FACTOR x its TTL
+STALE_FACTOR = float(os.getenv('RESULT_CACHE_STALE_FACTOR', '1.0'))
+
+FRESH, STALE = 'fresh', 'stale'
+
+
+def ttl_for(analysis_type: str, symbol: str) -> float:
+    """Freshness window for a result, from its type and its exchange's session"""
+    open_ttl, closed_ttl = TTLS.get(analysis_type, DEFAULT_TTL)
+    exchange = exchange_for(symbol)
+    if is_open(exchange):
+        return open_ttl
+    if closed_ttl is None:
+        closed_ttl = max(open_ttl, seconds_until_open(exchange))
+    return min(closed_ttl, MAX_CLOSED_TTL)
+
+
+class ResultCache:
+    """
+    LRU cache of finished analysis responses with stale-while-revalidate.
+    Keys are the normalized analysis keys used for request coalescing:
+    (resolved ticker, type, period/mode, provider, model).
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, stale_factor: float = STALE_FACTOR):
+        self.max_entries = max_entries
+        self.stale_factor = stale_factor
+        self._entries: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.refreshes = 0
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[str], Optional[Any]]:
+        """(FRESH | STALE | None, value)"""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None:
+            self.misses += 1
+            return None, None
+        fresh_until, stale_until, value = entry
+        if now < fresh_until:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return FRESH, value
+        if now < stale_until:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return STALE, value
+        del self._entries[key]
+        self.misses += 1
+        return None, None
+
+    def store(self, key: Hashable, value: Any, ttl: float) -> None:
+        now = time.monotonic()
+        stale = max(ttl * self.stale_factor, 60.0)
+        self._entries[key] = (now + ttl, now + ttl + stale, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'bypasses': self.bypasses,
+            'background_refreshes': self.refreshes,
+            'hit_rate': round((self.hits + self.stale_hits) / total, 4) if total else 0.0,
+        }
+
+
+result_cache = ResultCache()
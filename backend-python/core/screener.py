@@ -0,0 +1,456 @@
+import ast
+import functools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.indicators import TRADING_DAYS, compute_indicators
+
+# Seconds a built panel is reused before prices and fundamentals are reloaded
+SCREENER_PANEL_TTL = float(os.getenv('SCREENER_PANEL_TTL', '900'))
+SCREENER_FETCH_CONCURRENCY = int(os.getenv('SCREENER_FETCH_CONCURRENCY', '16'))
+# Memory budget for built panels per worker; least recently used panels go first
+SCREENER_PANEL_MAX_BYTES = int(float(os.getenv('SCREENER_PANEL_MAX_MB', '256')) * 1024 * 1024)
+MAX_EXPRESSION_LENGTH = 500
+MAX_EXPRESSION_NODES = 200
+
+FUNDAMENTAL_FIELDS = (
+    'pe_ratio', 'forward_pe', 'peg_ratio', 'price_to_book', 'debt_to_equity', 'roe',
+    'profit_margin', 'revenue_growth', 'earnings_growth', 'dividend_yield',
+)
+# get_fundamental_metrics reports a missing Yahoo field as 0; for these
+# ratios 0 is never a real value, so it is screened as missing
+ZERO_IS_MISSING = {'pe_ratio', 'forward_pe', 'peg_ratio', 'price_to_book'}
+# Trailing price changes exposed as change_<label>, in bars
+CHANGE_WINDOWS = {'1w': 5, '1m': 21, '3m': 63, '6m': 126, '1y': 252}
+
+
+def _own_bars(close: np.ndarray, *others: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Right-align each row on its own trading days: the days a symbol has a
+    close are moved, in order, to the end of the row and the rest become
+    leading NaN. In a mixed NSE/US panel another exchange's holidays then
+    drop out instead of becoming flat bars.
+    """
+    order = np.argsort(~np.isnan(close), axis=1, kind='stable')
+    rows = np.arange(close.shape[0])[:, None]
+    return tuple(values[rows, order] for values in (close,) + others)
+
+
+class MarketPanel:
+    """
+    Screening snapshot of a universe: (symbols x days) OHLCV arrays and a
+    (symbols x fields) fundamentals matrix. The latest value of every
+    indicator is computed once, as whole-panel array operations, when the
+    panel is built; screens then only index these per-field vectors.
+    """
+
+    def __init__(self, symbols: Sequence[str], dates: np.ndarray, close: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, volume: np.ndarray, fundamentals: np.ndarray):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.dates = dates
+        self.close = close
+        self.high = high
+        self.low = low
+        self.volume = volume
+        self.fundamentals = fundamentals
+        self.built_at = time.time()
+        self.fields = self._latest_fields()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _latest_fields(self) -> Dict[str, np.ndarray]:
+        # Indicators, bar counts and returns run over each symbol's own
+        # bars; only the latest values are aligned across the panel
+        close, high, low, volume = _own_bars(self.close, self.high, self.low, self.volume)
+        # Indicator kernels run through a leading NaN as NaN forever, so
+        # symbols are grouped by their first bar (usually a handful of
+        # groups) and each group is computed from there on
+        first = np.argmax(~np.isnan(close), axis=1)
+        fields: Dict[str, np.ndarray] = {}
+        for start in np.unique(first):
+            rows = first == start
+            latest = compute_indicators(close[rows, start:], high[rows, start:], low[rows, start:], volume[rows, start:])
+            for name, values in latest.items():
+                fields.setdefault(name, np.full(len(self), np.nan))[rows] = values[:, -1]
+        fields.update(close=close[:, -1], high=high[:, -1], low=low[:, -1], volume=volume[:, -1])
+
+        days = close.shape[1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for label, bars in CHANGE_WINDOWS.items():
+                fields[f'change_{label}'] = (
+                    close[:, -1] / close[:, -1 - bars] - 1.0 if days > bars else np.full(len(self), np.nan)
+                )
+            year = close[:, -TRADING_DAYS - 1:]
+            fields['high_52w'] = np.nanmax(high[:, -TRADING_DAYS:], axis=1)
+            fields['low_52w'] = np.nanmin(low[:, -TRADING_DAYS:], axis=1)
+            returns = year[:, 1:] / year[:, :-1] - 1.0
+            fields['volatility'] = np.nanstd(returns, axis=1, ddof=1) * math.sqrt(TRADING_DAYS)
+
+        for j, name in enumerate(FUNDAMENTAL_FIELDS):
+            fields[name] = self.fundamentals[:, j]
+        return fields
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.dates, self.close, self.high, self.low, self.volume, self.fundamentals]
+        return sum(a.nbytes for a in arrays) + sum(v.nbytes for v in self.fields.values())
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'symbols': len(self),
+            'days': len(self.dates),
+            'as_of': str(self.dates[-1]) if len(self.dates) else None,
+            'built_at': self.built_at,
+        }
+
+
+def _days(index: pd.DatetimeIndex) -> np.ndarray:
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    return index.normalize().values.astype('datetime64[D]')
+
+
+def panel_from_frames(histories: Dict[str, pd.DataFrame], fundamentals: Dict[str, Optional[Dict[str, Any]]]) -> MarketPanel:
+    """Align per-symbol daily frames on the union of their dates"""
+    symbols = [s for s, hist in histories.items() if hist is not None and not hist.empty]
+    day_index = {s: _days(histories[s].index) for s in symbols}
+    dates = np.unique(np.concatenate(list(day_index.values()))) if symbols else np.empty(0, dtype='datetime64[D]')
+
+    shape = (len(symbols), len(dates))
+    arrays = {name: np.full(shape, np.nan) for name in ('Close', 'High', 'Low', 'Volume')}
+    for i, symbol in enumerate(symbols):
+        cols = np.searchsorted(dates, day_index[symbol])
+        for name, array in arrays.items():
+            array[i, cols] = histories[symbol][name].to_numpy(dtype=np.float64)
+
+    matrix = np.full((len(symbols), len(FUNDAMENTAL_FIELDS)), np.nan)
+    for i, symbol in enumerate(symbols):
+        metrics = fundamentals.get(symbol) or {}
+        for j, name in enumerate(FUNDAMENTAL_FIELDS):
+            value = metrics.get(name)
+            if isinstance(value, (int, float)) and not (value == 0 and name in ZERO_IS_MISSING):
+                matrix[i, j] = value
+
+    return MarketPanel(symbols, dates, arrays['Close'], arrays['High'], arrays['Low'], arrays['Volume'], matrix)
+
+
+def load_histories(symbols: Sequence[str], period: str = '1y') -> Dict[str, Optional[pd.DataFrame]]:
+    """Daily history per resolved symbol: one bulk prefetch, then local reads in parallel"""
+    from core.stock_data import StockDataService
+
+    symbols = list(dict.fromkeys(symbols))
+    StockDataService.prefetch_history(symbols)
+
+    def history(symbol):
+        try:
+            return StockDataService._get_history(symbol, period)
+        except Exception as e:
+            print(f"Error loading history for {symbol}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=SCREENER_FETCH_CONCURRENCY, thread_name_prefix='screener') as pool:
+        return dict(zip(symbols, pool.map(history, symbols)))
+
+
+def build_panel(symbols: Sequence[str], period: str = '1y') -> MarketPanel:
+    """Load a panel for resolved symbols: price history plus fundamentals"""
+    from core.stock_data import StockDataService
+
+    histories = load_histories(symbols, period)
+    with ThreadPoolExecutor(max_workers=SCREENER_FETCH_CONCURRENCY, thread_name_prefix='screener') as pool:
+        fundamentals = dict(zip(histories, pool.map(StockDataService.get_fundamental_metrics, histories)))
+    return panel_from_frames(histories, fundamentals)
+
+
+# -- filter / ranking expressions --------------------------------------------
+
+_BINARY = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply,
+    ast.Div: np.true_divide, ast.Pow: np.power,
+}
+_COMPARE = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+    ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+_FUNCTIONS = {'abs': np.abs, 'log': np.log, 'sqrt': np.sqrt, 'min': np.minimum, 'max': np.maximum}
+
+Evaluator = Callable[[Dict[str, np.ndarray]], Any]
+
+
+class Truth(NamedTuple):
+    """
+    Three-valued (Kleene) result of a boolean sub-expression: rows known to
+    be true and rows known to be false. A row that is neither involves a
+    missing (NaN) value somewhere that decides it, and never passes a filter.
+    """
+    true: np.ndarray
+    false: np.ndarray
+
+
+def _truth(value: Any) -> Truth:
+    """Boolean view of a sub-expression; a bare number is true when non-zero and unknown when NaN"""
+    if isinstance(value, Truth):
+        return value
+    value = np.asarray(value, dtype=np.float64)
+    known = ~np.isnan(value)
+    nonzero = np.nan_to_num(value, nan=0.0) != 0
+    return Truth(known & nonzero, known & ~nonzero)
+
+
+def _number(value: Any) -> Any:
+    """Numeric view of a sub-expression; a boolean is 1/0, and NaN when unknown"""
+    if isinstance(value, Truth):
+        return np.where(value.true, 1.0, np.where(value.false, 0.0, np.nan))
+    return value
+
+
+class Expression:
+    """
+    A screening expression over panel fields, e.g.
+    "close > sma_50 and pe_ratio < 20 and roe > 0.15".
+
+    Parsed with Python's ast and compiled to a tree of NumPy calls; only
+    field names, numbers, arithmetic, comparisons, and/or/not and a few
+    math functions are accepted, so nothing user-supplied is ever eval'd.
+    Logic is three-valued: a comparison with a missing (NaN) value is
+    unknown, `not` keeps it unknown, and a row passes a filter only when
+    the whole expression is known to be true.
+    """
+
+    def __init__(self, source: str):
+        if len(source) > MAX_EXPRESSION_LENGTH:
+            raise ValueError(f"expression longer than {MAX_EXPRESSION_LENGTH} characters")
+        try:
+            tree = ast.parse(source.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"invalid expression: {e.msg}")
+        if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_NODES:
+            raise ValueError("expression too complex")
+        self.source = source
+        self.names: List[str] = []
+        self._fn = self._compile(tree.body)
+
+    def evaluate(self, fields: Dict[str, np.ndarray]) -> Any:
+        with np.errstate(all='ignore'):
+            return self._fn(fields)
+
+    def mask(self, fields: Dict[str, np.ndarray]) -> np.ndarray:
+        """Rows for which the expression is known to be true"""
+        return np.asarray(_truth(self.evaluate(fields)).true, dtype=bool)
+
+    def values(self, fields: Dict[str, np.ndarray]) -> np.ndarray:
+        """The expression as numbers (booleans as 1/0, unknown as NaN)"""
+        return np.asarray(_number(self.evaluate(fields)), dtype=np.float64)
+
+    def _compile(self, node: ast.AST) -> Evaluator:
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(v) for v in node.values]
+            if isinstance(node.op, ast.And):
+                def combine(a: Truth, b: Truth) -> Truth:
+                    return Truth(a.true & b.true, a.false | b.false)
+            else:
+                def combine(a: Truth, b: Truth) -> Truth:
+                    return Truth(a.true | b.true, a.false & b.false)
+            return lambda f: functools.reduce(combine, (_truth(p(f)) for p in parts))
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                def negate(f):
+                    value = _truth(operand(f))
+                    return Truth(value.false, value.true)
+                return negate
+            if isinstance(node.op, ast.USub):
+                return lambda f: np.negative(_number(operand(f)))
+            if isinstance(node.op, ast.UAdd):
+                return lambda f: _number(operand(f))
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            op, left, right = _BINARY[type(node.op)], self._compile(node.left), self._compile(node.right)
+            return lambda f: op(_number(left(f)), _number(right(f)))
+        if isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+            operands = [self._compile(node.left)] + [self._compile(c) for c in node.comparators]
+            ops = [_COMPARE[type(op)] for op in node.ops]
+
+            def compare(f):
+                values = [np.asarray(_number(o(f)), dtype=np.float64) for o in operands]
+                result = None
+                for i, op in enumerate(ops):
+                    known = ~(np.isnan(values[i]) | np.isnan(values[i + 1]))
+                    holds = op(values[i], values[i + 1])
+                    part = Truth(known & holds, known & ~holds)
+                    result = part if result is None else Truth(result.true & part.true, result.false | part.false)
+                return result
+            return compare
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS \
+                and not node.keywords:
+            fn, args = _FUNCTIONS[node.func.id], [self._compile(a) for a in node.args]
+            if node.func.id in ('min', 'max'):
+                if len(args) < 2:
+                    raise ValueError(f"{node.func.id}() takes at least two arguments")
+                return lambda f: fn.reduce(np.broadcast_arrays(*[_number(a(f)) for a in args]))
+            if len(args) != 1:
+                raise ValueError(f"{node.func.id}() takes one argument")
+            return lambda f: fn(_number(args[0](f)))
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name not in self.names:
+                self.names.append(name)
+            return lambda f: f[name]
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            try:
+                value = float(node.value)
+            except OverflowError:
+                raise ValueError(f"number out of range: {node.value}")
+            return lambda f: value
+        raise ValueError(f"unsupported syntax: {ast.unparse(node)}")
+
+
+@functools.lru_cache(maxsize=256)
+def compile_expression(source: str) -> Expression:
+    return Expression(source)
+
+
+def _check_fields(expression: Expression, fields: Dict[str, np.ndarray]) -> None:
+    unknown = [n for n in expression.names if n not in fields]
+    if unknown:
+        raise ValueError(f"unknown field(s) {', '.join(unknown)}; available: {', '.join(sorted(fields))}")
+
+
+def _clean(value: float) -> Optional[float]:
+    """JSON-safe output value: NaN and infinities (e.g. x / 0) become None"""
+    return round(float(value), 4) if math.isfinite(value) else None
+
+
+def screen(panel: MarketPanel, filter: Optional[str] = None, rank: Optional[str] = None,
+           descending: bool = True, limit: int = 50) -> Dict[str, Any]:
+    """Symbols passing filter, ordered by rank, with the fields both expressions use"""
+    started = time.perf_counter()
+    fields = panel.fields
+    n = len(panel)
+    columns = ['close']
+
+    mask = np.ones(n, dtype=bool)
+    if filter:
+        expression = compile_expression(filter)
+        _check_fields(expression, fields)
+        mask = np.broadcast_to(expression.mask(fields), (n,))
+        columns += expression.names
+    matches = np.flatnonzero(mask)
+
+    rank_values = None
+    if rank:
+        expression = compile_expression(rank)
+        _check_fields(expression, fields)
+        rank_values = np.broadcast_to(expression.values(fields), (n,))
+        columns += expression.names
+        keys = rank_values[matches]
+        # Missing rank values sort last either way
+        keys = np.where(np.isnan(keys), np.inf, -keys if descending else keys)
+        matches = matches[np.argsort(keys, kind='stable')]
+
+    columns = list(dict.fromkeys(columns))
+    top = matches[:max(limit, 0)]
+    results = []
+    for i in top.tolist():
+        row = {'symbol': panel.symbols[i]}
+        if rank_values is not None:
+            row['rank_value'] = _clean(rank_values[i])
+        row.update({name: _clean(fields[name][i]) for name in columns})
+        results.append(row)
+
+    return {
+        'universe': n,
+        'matches': int(len(matches)),
+        'results': results,
+        'panel': panel.describe(),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+class PanelCache:
+    """
+    Built panels per (period, symbol set), rebuilt after SCREENER_PANEL_TTL.
+    /agent/screen accepts arbitrary symbol lists, so panels are also evicted
+    least-recently-used once they exceed `max_bytes`.
+    """
+
+    def __init__(self, ttl: float = SCREENER_PANEL_TTL, max_bytes: int = SCREENER_PANEL_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._panels: "OrderedDict[Tuple, MarketPanel]" = OrderedDict()
+        self._bytes = 0
+        # Build lock per key with the number of callers holding or waiting on it
+        self._locks: Dict[Tuple, List[Any]] = {}
+        self._guard = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, symbols: Sequence[str], period: str = '1y') -> MarketPanel:
+        key = (period, tuple(sorted(set(symbols))))
+        with self._guard:
+            self._expire()
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                with self._guard:
+                    panel = self._panels.get(key)
+                    if panel is not None and time.time() - panel.built_at < self.ttl:
+                        self._panels.move_to_end(key)
+                        self.hits += 1
+                        return panel
+                panel = build_panel(key[1], period)
+                self.builds += 1
+                with self._guard:
+                    self._store(key, panel)
+                return panel
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def _store(self, key: Tuple, panel: MarketPanel) -> None:
+        if key in self._panels:
+            self._drop(key)
+        self._panels[key] = panel
+        self._bytes += panel.nbytes
+        # The panel just built is always kept, even alone over budget
+        while self._bytes > self.max_bytes and len(self._panels) > 1:
+            self._drop(next(iter(self._panels)))
+            self.evictions += 1
+
+    def _expire(self) -> None:
+        now = time.time()
+        for key in [k for k, p in self._panels.items() if now - p.built_at >= self.ttl]:
+            self._drop(key)
+            self.evictions += 1
+
+    def _drop(self, key: Tuple) -> None:
+        self._bytes -= self._panels.pop(key).nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            return {
+                'panels': len(self._panels),
+                'symbols': sum(len(p) for p in self._panels.values()),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'builds': self.builds,
+                'hits': self.hits,
+                'evictions': self.evictions,
+            }
+
+
+# Process-wide panels used by /agent/screen
+panel_cache = PanelCache()
@@ -0,0 +1,191 @@
+import os
+import re
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+# Recency weighting of headline tone: a story this many hours old counts half
+SENTIMENT_HALF_LIFE_HOURS = float(os.getenv('SENTIMENT_HALF_LIFE_HOURS', '48'))
+# Scores beyond +/- this are labelled Positive / Negative
+SENTIMENT_THRESHOLD = 0.15
+# Trend compares the last TREND_WINDOW against everything older
+TREND_WINDOW = 3 * 24 * 3600
+
+# Loughran-McDonald-style finance word lists, trimmed to stems that show up
+# in headlines, plus common market verbs ("beats", "downgrade") the 10-K
+# oriented lists lack.
+POSITIVE_WORDS = """
+achieve achieved achievement advance advanced advances advantage attractive beat beats benefit benefited
+best better bolster boost boosted boosts breakthrough bullish climb climbs confident efficient enhance
+enhanced excellent exceed exceeded exceeds expand expanded expansion favorable gain gained gains good
+great greater growth highest improve improved improvement improves innovation jump jumps leading leads
+outperform outperformed outperforms positive profitable profitability progress rally rallied rallies
+rebound rebounds record resilient rise rises rising robust soar soared soars stable strength
+strengthen strong stronger success successful surge surged surges surpass top tops upbeat upgrade
+upgraded upgrades upside win wins winning
+""".split()
+
+NEGATIVE_WORDS = """
+adverse bankrupt bankruptcy bearish breach challenge challenges closure concern concerns crash
+crisis cut cuts decline declined declines decrease default defaults deficit delay delayed delays
+delist deteriorate difficult disappoint disappointing disappoints dispute down downgrade downgraded
+downgrades drop dropped drops fail failed failure falls fall fell fined fraud halt halted hurt
+investigation lawsuit layoff layoffs lose loses losing loss losses lower miss missed misses negative
+penalty plunge plunged plunges probe recall recession resign resigns risk risks scandal selloff slip
+slips slow slowdown slowing slump slumps sink sinks slashed tumble tumbles tumbled underperform
+volatile warning warns weak weaken weaker worse worst writedown
+""".split()
+
+NEGATIONS = frozenset("not no never without nor isn't wasn't aren't don't doesn't didn't won't".split())
+# A negation flips the polarity of the next few words ("not profitable"),
+# within its clause: "not profitable; losses widen" only flips "profitable"
+NEGATION_SCOPE = 3
+CLAUSE_PUNCTUATION = b'.;,:!?'
+CLAUSE_WORDS = frozenset(['but', 'while'])
+CLAUSE = re.compile(r"(?<!\d)[.,]|[.,](?!\d)|[;:!?]|\b(?:but|while)\b")
+
+# Same word and clause definitions as the byte-level tokenizer below: ASCII
+# letters, with apostrophes only inside a word ("don't", not "'strong'");
+# clauses end at punctuation (not a decimal point or thousands separator)
+# and start again at "but"/"while"
+TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)*")
+
+# Per-position multipliers for the word hash: a word hashes to
+# sum(byte[i] * HASH_WEIGHTS[i]) mod 2**64
+HASH_WEIGHTS = np.random.default_rng(0x5e47).integers(1, 2 ** 63, size=64, dtype=np.uint64) | np.uint64(1)
+APOSTROPHE = ord("'")
+
+
+def word_hash(word: str) -> int:
+    codes = np.frombuffer(word.lower().encode(), dtype=np.uint8).astype(np.uint64)
+    return int((codes * HASH_WEIGHTS[np.minimum(np.arange(len(codes)), 63)]).sum(dtype=np.uint64))
+
+
+class LexiconScorer:
+    """
+    Batch headline tone scorer over a hashed finance lexicon.
+
+    The word lists are compiled once into a sorted array of 64-bit word
+    hashes with a parallel polarity array. A batch is scored without a
+    per-word Python loop: the headlines are joined into one byte buffer,
+    word boundaries and word hashes come from array operations on it
+    (np.add.reduceat over position-weighted bytes), polarities are looked
+    up with one searchsorted and per-headline counts come from bincount.
+    Tone is (pos - neg) / (pos + neg), 0 for headlines without lexicon words.
+    """
+
+    def __init__(self, positive: Sequence[str] = POSITIVE_WORDS, negative: Sequence[str] = NEGATIVE_WORDS,
+                 negations=NEGATIONS, clause_words=CLAUSE_WORDS):
+        polarity = {word_hash(w): 1.0 for w in positive}
+        polarity.update({word_hash(w): -1.0 for w in negative})
+        self.hashes = np.array(sorted(polarity), dtype=np.uint64)
+        self.polarity = np.array([polarity[h] for h in self.hashes.tolist()], dtype=np.float64)
+        self.negation_hashes = np.array(sorted(word_hash(w) for w in negations), dtype=np.uint64)
+        self.clause_hashes = np.array(sorted(word_hash(w) for w in clause_words), dtype=np.uint64)
+        self.clause_bytes = np.frombuffer(CLAUSE_PUNCTUATION, dtype=np.uint8)
+
+    @staticmethod
+    def _lookup(table: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """Index of each key in the sorted table, or -1"""
+        idx = np.searchsorted(table, keys)
+        idx[idx == len(table)] = 0
+        return np.where(table[idx] == keys, idx, -1)
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Tone in [-1, 1] for each text"""
+        n = len(texts)
+        if n == 0:
+            return np.empty(0)
+        encoded = [text.encode() for text in texts]
+        text_starts = np.cumsum([0] + [len(e) + 1 for e in encoded[:-1]])
+        buf = np.frombuffer(b'\n'.join(encoded), dtype=np.uint8)
+        buf = buf | (((buf >= 65) & (buf <= 90)) * np.uint8(32)).astype(np.uint8)
+
+        letter = (buf >= 97) & (buf <= 122)
+        inner_apostrophe = np.zeros_like(letter)
+        inner_apostrophe[1:-1] = (buf[1:-1] == APOSTROPHE) & letter[:-2] & letter[2:]
+        in_word = letter | inner_apostrophe
+        word_start = in_word & ~np.concatenate([[False], in_word[:-1]])
+        starts = np.flatnonzero(word_start)
+        if len(starts) == 0:
+            return np.zeros(n)
+
+        # Hash every word: position-weighted byte sum per contiguous run
+        positions = np.flatnonzero(in_word)
+        word_of_byte = np.cumsum(word_start)[positions] - 1
+        offset = positions - starts[word_of_byte]
+        weighted = buf[positions].astype(np.uint64) * HASH_WEIGHTS[np.minimum(offset, 63)]
+        hashes = np.add.reduceat(weighted, np.flatnonzero(offset == 0))
+
+        hit = self._lookup(self.hashes, hashes)
+        polarity = np.where(hit >= 0, self.polarity[hit], 0.0)
+        negation = (self._lookup(self.negation_hashes, hashes) >= 0).astype(np.int64)
+        doc = np.searchsorted(text_starts, starts, side='right') - 1
+
+        # A clause starts at a word with clause punctuation since the
+        # previous word, or at "but"/"while"
+        digit = (buf >= 48) & (buf <= 57)
+        number_separator = np.zeros_like(digit)
+        number_separator[1:-1] = ((buf[1:-1] == 46) | (buf[1:-1] == 44)) & digit[:-2] & digit[2:]
+        breaks = np.cumsum(np.isin(buf, self.clause_bytes) & ~number_separator)[starts]
+        new_clause = np.diff(breaks, prepend=breaks[0]) > 0
+        new_clause |= self._lookup(self.clause_hashes, hashes) >= 0
+
+        # Negations in the previous NEGATION_SCOPE words of the same clause
+        position = np.arange(len(starts))
+        first_word = np.searchsorted(doc, np.arange(n))[doc]
+        clause_start = np.maximum.accumulate(np.where(new_clause, position, 0))
+        negated_before = np.concatenate([[0], np.cumsum(negation)])
+        window_start = np.maximum(position - NEGATION_SCOPE, np.maximum(first_word, clause_start))
+        flipped = (negated_before[position] - negated_before[window_start]) % 2 == 1
+        polarity = np.where(flipped, -polarity, polarity)
+
+        positive = np.bincount(doc, weights=polarity > 0, minlength=n)
+        negative = np.bincount(doc, weights=polarity < 0, minlength=n)
+        total = positive + negative
+        return np.divide(positive - negative, total, out=np.zeros(n), where=total > 0)
+
+
+def label_for(score: float) -> str:
+    if score > SENTIMENT_THRESHOLD:
+        return "Positive"
+    if score < -SENTIMENT_THRESHOLD:
+        return "Negative"
+    return "Neutral"
+
+
+def aggregate(tones: np.ndarray, timestamps: Sequence[Optional[float]], now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Per-ticker score: recency-weighted mean tone of its headlines. Trend is
+    the change from older headlines to those of the last few days.
+    """
+    now = now or time.time()
+    n = len(tones)
+    if n == 0:
+        return {"score": 0.0, "label": "Neutral", "trend": "N/A", "headlines": 0,
+                "positive": 0, "negative": 0, "neutral": 0}
+    ts = np.array([t if t else now for t in timestamps], dtype=np.float64)
+    age_hours = np.maximum(now - ts, 0) / 3600
+    weights = np.power(0.5, age_hours / SENTIMENT_HALF_LIFE_HOURS)
+    score = float(np.dot(weights, tones) / weights.sum())
+
+    recent = now - ts <= TREND_WINDOW
+    trend = "N/A"
+    if recent.any() and (~recent).any():
+        change = tones[recent].mean() - tones[~recent].mean()
+        trend = "Improving" if change > SENTIMENT_THRESHOLD else "Deteriorating" if change < -SENTIMENT_THRESHOLD else "Stable"
+
+    return {
+        "score": round(score, 3),
+        "label": label_for(score),
+        "trend": trend,
+        "headlines": n,
+        "positive": int((tones > 0).sum()),
+        "negative": int((tones < 0).sum()),
+        "neutral": int((tones == 0).sum()),
+    }
+
+
+# Process-wide scorer, compiled once
+lexicon_scorer = LexiconScorer()
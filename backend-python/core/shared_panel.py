@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.ohlcv_store import COLUMNS, REFRESH_SECONDS, ohlcv_store, period_start
+
+PANEL_DIR = os.getenv(
+    'PANEL_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'panel'),
+)
+# How often the refresher republishes, and how old a panel workers still trust
+PANEL_REFRESH_SECONDS = float(os.getenv('PANEL_REFRESH_SECONDS', str(REFRESH_SECONDS)))
+PANEL_MAX_AGE = float(os.getenv('PANEL_MAX_AGE', str(2 * PANEL_REFRESH_SECONDS)))
+# float32 halves the mapped file at ~7 significant digits of price
+PANEL_DTYPE = os.getenv('PANEL_DTYPE', 'float64')
+# Exchange listing (NSE/US/BSE/ALL) kept warm on top of every symbol already in the OHLCV store
+PANEL_UNIVERSE = os.getenv('PANEL_UNIVERSE', '')
+# Seconds between checks of the CURRENT pointer in workers
+PANEL_CHECK_SECONDS = 5.0
+
+CURRENT = 'CURRENT'
+KEEP_GENERATIONS = 2
+
+
+class PanelData:
+    """One mapped panel generation: flat read-only columns plus a symbol -> row-range index"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'index.json')) as f:
+            index = json.load(f)
+        self.built_at: float = index['built_at']
+        self.rows: Dict[str, Tuple[int, int, Optional[str]]] = {
+            symbol: tuple(entry) for symbol, entry in index['symbols'].items()
+        }
+        self.dates = np.load(os.path.join(path, 'dates.npy'), mmap_mode='r')
+        self.columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in COLUMNS}
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + sum(col.nbytes for col in self.columns.values())
+
+
+class SharedPanel:
+    """
+    Read-only daily OHLCV panel shared by every worker process.
+
+    A single refresher process (see `refresh`) writes each generation as
+    flat .npy columns, with one contiguous row range per symbol, and then
+    atomically points CURRENT at it. Workers memory-map the columns, so the
+    pages live once in the OS page cache however many workers there are,
+    and a history read is an array slice instead of a per-worker copy.
+    """
+
+    def __init__(self, root: str = PANEL_DIR, max_age: float = PANEL_MAX_AGE):
+        self.root = root
+        self.max_age = max_age
+        self._data: Optional[PanelData] = None
+        self._generation: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _current(self) -> Optional[PanelData]:
+        """Mapped current generation, re-checking the pointer every few seconds"""
+        now = time.monotonic()
+        if now - self._checked_at < PANEL_CHECK_SECONDS:
+            return self._data
+        with self._lock:
+            if now - self._checked_at < PANEL_CHECK_SECONDS:
+                return self._data
+            self._checked_at = now
+            try:
+                with open(os.path.join(self.root, CURRENT)) as f:
+                    generation = f.read().strip()
+            except FileNotFoundError:
+                return self._data
+            if generation and generation != self._generation:
+                try:
+                    # Frames already handed out keep the previous mapping alive
+                    self._data = PanelData(os.path.join(self.root, generation))
+                    self._generation = generation
+                except Exception as e:
+                    print(f"Error mapping market panel {generation}: {e}")
+            return self._data
+
+    def get_history(self, symbol: str, period: str) -> Optional[pd.DataFrame]:
+        """Daily bars for `period` as views on the mapped columns, or None when the panel can't serve them"""
+        data = self._current()
+        entry = data.rows.get(symbol) if data is not None else None
+        if entry is None or time.time() - data.built_at > self.max_age:
+            self.misses += 1
+            return None
+
+        start, stop, covered_from = entry
+        if period.endswith('d') and period[:-1].isdigit():
+            bars = int(period[:-1])
+            if stop - start < bars and covered_from is not None:
+                self.misses += 1
+                return None
+            first = max(stop - bars, start)
+        else:
+            begin = period_start(period)
+            if covered_from is not None and (begin is None or begin < date.fromisoformat(covered_from)):
+                self.misses += 1
+                return None
+            first = start
+            if begin is not None:
+                first += int(np.searchsorted(data.dates[start:stop], np.datetime64(begin, 'ns')))
+
+        self.hits += 1
+        index = pd.DatetimeIndex(data.dates[first:stop], name='Date', copy=False)
+        return pd.DataFrame({name: data.columns[name][first:stop] for name in COLUMNS}, index=index, copy=False)
+
+    def stats(self) -> Dict[str, Any]:
+        data = self._data
+        return {
+            'generation': self._generation,
+            'symbols': len(data.rows) if data else 0,
+            'bars': len(data.dates) if data else 0,
+            'mapped_bytes': data.nbytes if data else 0,
+            'age_seconds': round(time.time() - data.built_at, 1) if data else None,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+def write_panel(series: Iterable[Tuple[str, np.ndarray, Dict[str, np.ndarray], Dict[str, Any]]],
+                root: str = PANEL_DIR, dtype: str = PANEL_DTYPE) -> str:
+    """
+    Publish a new generation from (symbol, dates, columns, store header)
+    tuples and return its name. Readers switch over on their next check.
+    """
+    symbols: Dict[str, List[Any]] = {}
+    dates, columns = [], {name: [] for name in COLUMNS}
+    offset = 0
+    for symbol, sym_dates, cols, header in series:
+        if len(sym_dates) == 0:
+            continue
+        covered_from = None if header.get('complete') else header.get('complete_from') or str(sym_dates[0])
+        symbols[symbol] = [offset, offset + len(sym_dates), covered_from]
+        offset += len(sym_dates)
+        dates.append(sym_dates.astype('datetime64[ns]'))
+        for name in COLUMNS:
+            columns[name].append(cols[name].astype(dtype, copy=False))
+
+    generation = f"gen-{time.time_ns()}"
+    path = os.path.join(root, generation)
+    os.makedirs(path)
+    np.save(os.path.join(path, 'dates.npy'), np.concatenate(dates) if dates else np.empty(0, 'datetime64[ns]'))
+    for name in COLUMNS:
+        np.save(os.path.join(path, f'{name}.npy'), np.concatenate(columns[name]) if dates else np.empty(0, dtype))
+    with open(os.path.join(path, 'index.json'), 'w') as f:
+        json.dump({'built_at': time.time(), 'dtype': dtype, 'symbols': symbols}, f)
+
+    tmp = os.path.join(root, f'{CURRENT}.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        f.write(generation)
+    os.replace(tmp, os.path.join(root, CURRENT))
+    _prune(root, generation)
+    return generation
+
+
+def _prune(root: str, current: str) -> None:
+    """Delete generations older than the last few; a worker may still be mapping the previous one"""
+    generations = sorted(name for name in os.listdir(root) if name.startswith('gen-'))
+    for name in generations[:-KEEP_GENERATIONS]:
+        if name == current:
+            continue
+        try:
+            shutil.rmtree(os.path.join(root, name))
+        except OSError as e:
+            # Windows refuses to delete mapped files; retried on the next publish
+            print(f"Market panel: could not remove {name}: {e}")
+
+
+def refresh(universe: str = PANEL_UNIVERSE, root: str = PANEL_DIR) -> Dict[str, Any]:
+    """Top up the OHLCV store with bulk downloads, then publish it as a new panel generation"""
+    started = time.time()
+    symbols = ohlcv_store.symbols()
+    if universe:
+        from core.symbols import get_symbol_master
+        symbols = list(dict.fromkeys(symbols + get_symbol_master().tickers(None if universe.upper() == 'ALL' else universe)))
+
+    prefetch: Dict[str, int] = {}
+    if symbols:
+        try:
+            prefetch = ohlcv_store.prefetch(symbols)
+        except Exception as e:
+            print(f"Error refreshing market panel history: {e}")
+
+    def series():
+        for symbol in symbols:
+            dates, cols, header = ohlcv_store.read(symbol)
+            yield symbol, dates, cols, header
+
+    generation = write_panel(series(), root)
+    return {'generation': generation, 'symbols': len(symbols), 'prefetch': prefetch,
+            'elapsed_s': round(time.time() - started, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the shared market panel")
+    parser.add_argument('--once', action='store_true', help="publish one generation and exit")
+    parser.add_argument('--universe', default=PANEL_UNIVERSE)
+    parser.add_argument('--interval', type=float, default=PANEL_REFRESH_SECONDS)
+    args = parser.parse_args()
+
+    while True:
+        try:
+            print(f"Market panel: {refresh(args.universe)}", flush=True)
+        except Exception as e:
+            print(f"Error publishing market panel: {e}", flush=True)
+        if args.once:
+            return
+        time.sleep(args.interval)
+
+
+# Process-wide reader used by StockDataService
+shared_panel = SharedPanel()
+
+
+if __name__ == '__main__':
+    main()
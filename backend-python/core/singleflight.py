@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from core.llm_scheduler import SharedPriority, current_priority, shared_priority
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key onto one in-flight task.
+
+    The first caller for a key starts the computation; callers arriving
+    while it runs await the same task. Its result, or its exception, is
+    delivered to every waiter. Waiters are shielded, so one client
+    disconnecting does not cancel the work for the others.
+
+    The task's LLM calls queue at the most urgent priority among its
+    waiters: a follower with a higher priority than the leader promotes it.
+    """
+
+    def __init__(self, name: str = 'singleflight'):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._priorities: Dict[Hashable, SharedPriority] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            priority = shared_priority()
+            task = asyncio.ensure_future(priority.run(fn))
+            self._calls[key] = task
+            self._priorities[key] = priority
+            self.leaders += 1
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        else:
+            self.coalesced += 1
+            self._priorities[key].promote(current_priority())
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._priorities[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.coalesced
+        return {
+            'in_flight': len(self._calls),
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'coalesce_rate': round(self.coalesced / total, 4) if total else 0.0,
+        }
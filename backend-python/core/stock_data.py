@@ -1,42 +1,137 @@
 import yfinance as yf
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from core.cache import snapshot_cache
+from core.symbols import get_symbol_master
+from core.ohlcv_store import ohlcv_store
+from core.shared_panel import shared_panel
+from core.relative_risk import relative_risk
+from core.indicators import compute_indicators, annualized_volatility, last_valid
+from core.streaming import streaming_store, seed_from_history
+
+INTRADAY_INTERVALS = {'1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h'}
+
+def _rounded(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+def _series(values: np.ndarray, digits: int = 2) -> List[Optional[float]]:
+    """Indicator array as a JSON-friendly list (NaN warm-up values become None)"""
+    rounded = np.round(values, digits)
+    return [None if np.isnan(v) else float(v) for v in rounded]
 
 class StockDataService:
     """Service for fetching and processing stock data"""
 
+    # Snapshot accessors: every public method reads upstream data through
+    # these so one analysis run only hits Yahoo once per payload.
+
+    @staticmethod
+    def _get_info(symbol: str) -> Optional[Dict[str, Any]]:
+        """Cached `Ticker.info` payload for a resolved symbol"""
+        key = snapshot_cache.make_key(symbol, 'info')
+        return snapshot_cache.get_or_fetch(key, lambda: yf.Ticker(symbol).info or None)
+
+    @staticmethod
+    def _get_fast_info(symbol: str) -> Optional[Dict[str, Any]]:
+        """Cached subset of `Ticker.fast_info` for a resolved symbol"""
+        def fetch():
+            fast_info = yf.Ticker(symbol).fast_info
+            return {
+                'last_price': fast_info.last_price,
+                'currency': fast_info.currency,
+            }
+        key = snapshot_cache.make_key(symbol, 'fast_info')
+        return snapshot_cache.get_or_fetch(key, fetch)
+
+    @staticmethod
+    def _get_history(symbol: str, period: str, interval: str = '1d') -> pd.DataFrame:
+        """
+        Cached price history frame per (period, interval).
+        Daily bars are slices of the shared memory-mapped panel when it has
+        the symbol, else they come from the on-disk OHLCV store, which only
+        asks Yahoo for the days it is missing; other intervals go straight
+        upstream.
+        """
+        if interval == '1d':
+            hist = shared_panel.get_history(symbol, period)
+            if hist is not None:
+                return hist
+
+        kind = 'history_intraday' if interval in INTRADAY_INTERVALS else 'history'
+        key = snapshot_cache.make_key(symbol, kind, period, interval)
+
+        def fetch():
+            if interval == '1d':
+                return ohlcv_store.get_history(symbol, period)
+            return yf.Ticker(symbol).history(period=period, interval=interval)
+
+        hist = snapshot_cache.get_or_fetch(key, fetch)
+        return hist if hist is not None else pd.DataFrame()
+
+    @staticmethod
+    def _get_indicators(symbol: str, period: str, hist: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Indicator arrays for a history frame, computed once per (symbol, period)"""
+        key = snapshot_cache.make_key(symbol, 'indicators', period, len(hist), hist.index[-1])
+        return snapshot_cache.get_or_fetch(key, lambda: compute_indicators(
+            hist['Close'].to_numpy(dtype=float),
+            hist['High'].to_numpy(dtype=float),
+            hist['Low'].to_numpy(dtype=float),
+            hist['Volume'].to_numpy(dtype=float),
+        ))
+
     @staticmethod
     def resolve_ticker(ticker: str) -> str:
         """
         Smart resolution for Indian traders.
-        If ticker has no suffix, try .NS (National Stock Exchange of India).
-        If that fails, fallback to original (US/Global).
+        Bare symbols are resolved offline against the bundled symbol master
+        (NSE first, then US, then BSE). Unknown symbols fall back to a
+        memoized .NS probe; failed probes are cached too, for a shorter time.
         """
         ticker = ticker.upper().strip()
         if "." in ticker:
             return ticker
-        
+
+        resolved = get_symbol_master().resolve(ticker)
+        if resolved is not None:
+            return resolved
+
+        key = snapshot_cache.make_key(ticker, 'resolve')
+        resolved = snapshot_cache.get(key)
+        if resolved is not None:
+            return resolved
+
         # Indian Context Priority
         indian_ticker = f"{ticker}.NS"
         try:
-            # Quick check using fast_info
-            stock = yf.Ticker(indian_ticker)
-            # Accessing fast_info triggers the fetch. keys() checks if it's valid.
-            if stock.fast_info.last_price is not None:
+            # Quick check using fast_info (cached, so the follow-up quote is free)
+            fast_info = StockDataService._get_fast_info(indian_ticker)
+            if fast_info and fast_info.get('last_price') is not None:
+                snapshot_cache.set(key, indian_ticker)
                 return indian_ticker
-        except:
-            pass
-            
+        except Exception as e:
+            print(f"Ticker probe failed for {indian_ticker}: {e}")
+
+        snapshot_cache.set(key, ticker, ttl=snapshot_cache.ttls['resolve_miss'])
         return ticker
 
+    @staticmethod
+    def prefetch_history(symbols: List[str]) -> Dict[str, int]:
+        """Warm the OHLCV store for many resolved symbols with bulk downloads"""
+        try:
+            return ohlcv_store.prefetch(symbols)
+        except Exception as e:
+            # Agents fall back to per-symbol fetches
+            print(f"Error prefetching history for {len(symbols)} symbols: {e}")
+            return {'requested': len(set(symbols)), 'fetched': 0}
+
     @staticmethod
     def get_stock_info(ticker: str) -> Optional[Dict[str, Any]]:
         """Fetch basic stock information"""
         ticker = StockDataService.resolve_ticker(ticker)
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = StockDataService._get_info(ticker) or {}
             
             return {
                 'symbol': ticker,
@@ -58,8 +153,7 @@ class StockDataService:
         """Fetch fundamental analysis metrics"""
         ticker = StockDataService.resolve_ticker(ticker)
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = StockDataService._get_info(ticker) or {}
             
             return {
                 'pe_ratio': info.get('trailingPE', 0),
@@ -82,35 +176,53 @@ class StockDataService:
         """Fetch technical analysis metrics"""
         ticker = StockDataService.resolve_ticker(ticker)
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
+            hist = StockDataService._get_history(ticker, period)
             
             if hist.empty:
                 return None
             
+            close = hist['Close'].to_numpy(dtype=float)
+            ind = StockDataService._get_indicators(ticker, period, hist)
+
             # Calculate basic technical indicators
-            current_price = hist['Close'].iloc[-1]
-            sma_20 = hist['Close'].rolling(window=20).mean().iloc[-1] if len(hist) >= 20 else current_price
-            sma_50 = hist['Close'].rolling(window=50).mean().iloc[-1] if len(hist) >= 50 else current_price
+            current_price = float(close[-1])
+            sma_20 = last_valid(ind['sma_20'], current_price)
+            sma_50 = last_valid(ind['sma_50'], current_price)
             
-            # Calculate volatility
-            returns = hist['Close'].pct_change()
-            volatility = returns.std() * (252 ** 0.5)  # Annualized
+            # Calculate volatility (annualized)
+            volatility = float(annualized_volatility(close)[0])
             
             # Price momentum
-            price_change_1w = ((current_price - hist['Close'].iloc[-5]) / hist['Close'].iloc[-5] * 100) if len(hist) >= 5 else 0
-            price_change_1m = ((current_price - hist['Close'].iloc[0]) / hist['Close'].iloc[0] * 100)
+            price_change_1w = ((current_price - close[-5]) / close[-5] * 100) if len(close) >= 5 else 0
+            price_change_1m = ((current_price - close[0]) / close[0] * 100)
+
+            volume_avg = float(np.mean(hist['Volume'].to_numpy(dtype=float)))
+            volume_sma = last_valid(ind['volume_sma_20'], volume_avg)
+            obv = ind['obv']
+            obv_lookback = min(len(obv) - 1, 20)
             
             return {
                 'current_price': round(current_price, 2),
                 'sma_20': round(sma_20, 2),
                 'sma_50': round(sma_50, 2),
+                'sma_200': _rounded(last_valid(ind['sma_200'])),
+                'ema_12': _rounded(last_valid(ind['ema_12'])),
+                'ema_26': _rounded(last_valid(ind['ema_26'])),
+                'rsi_14': _rounded(last_valid(ind['rsi_14'])),
+                'macd': _rounded(last_valid(ind['macd']), 3),
+                'macd_signal': _rounded(last_valid(ind['macd_signal']), 3),
+                'macd_hist': _rounded(last_valid(ind['macd_hist']), 3),
+                'bb_upper': _rounded(last_valid(ind['bb_upper'])),
+                'bb_lower': _rounded(last_valid(ind['bb_lower'])),
+                'atr_14': _rounded(last_valid(ind['atr_14'])),
                 'volatility': round(volatility * 100, 2),
-                'price_change_1w': round(price_change_1w, 2),
-                'price_change_1m': round(price_change_1m, 2),
-                'volume_avg': int(hist['Volume'].mean()),
-                'high_52w': round(hist['High'].max(), 2),
-                'low_52w': round(hist['Low'].min(), 2),
+                'price_change_1w': round(float(price_change_1w), 2),
+                'price_change_1m': round(float(price_change_1m), 2),
+                'volume_avg': int(volume_avg),
+                'volume_vs_20d_avg': round(float(hist['Volume'].iloc[-1]) / volume_sma, 2) if volume_sma else None,
+                'obv_trend': 'rising' if obv[-1] > obv[-1 - obv_lookback] else 'falling',
+                'high_52w': round(float(hist['High'].max()), 2),
+                'low_52w': round(float(hist['Low'].min()), 2),
             }
         except Exception as e:
             print(f"Error fetching technical data for {ticker}: {e}")
@@ -121,15 +233,18 @@ class StockDataService:
         """Calculate risk metrics"""
         ticker = StockDataService.resolve_ticker(ticker)
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            hist = stock.history(period='1y')
+            info = StockDataService._get_info(ticker) or {}
+            hist = StockDataService._get_history(ticker, '1y')
             
             if hist.empty:
                 return None
             
-            # Calculate beta
-            beta = info.get('beta', 1.0)
+            # Beta against the symbol's benchmark index from our own returns;
+            # Yahoo's field is missing or stale for many NSE listings
+            relative = relative_risk([ticker], '1y', {ticker: hist}).get(ticker) or {}
+            beta = relative.get('beta')
+            if beta is None:
+                beta = info.get('beta')
             
             # Calculate max drawdown
             cumulative = (1 + hist['Close'].pct_change()).cumprod()
@@ -142,7 +257,10 @@ class StockDataService:
             sharpe = (returns.mean() / returns.std()) * (252 ** 0.5) if returns.std() > 0 else 0
             
             return {
-                'beta': round(beta, 2),
+                'beta': _rounded(beta),
+                'benchmark': relative.get('benchmark'),
+                'correlation': relative.get('correlation'),
+                'tracking_error': relative.get('tracking_error'),
                 'max_drawdown': round(max_drawdown, 2),
                 'sharpe_ratio': round(sharpe, 2),
                 'volatility': round(returns.std() * (252 ** 0.5) * 100, 2),
@@ -156,17 +274,19 @@ class StockDataService:
         """Fetch historical price data for charting"""
         ticker = StockDataService.resolve_ticker(ticker)
         try:
-            stock = yf.Ticker(ticker)
             # Fetch history with 1d interval for candles
-            hist = stock.history(period=period, interval='1d')
+            hist = StockDataService._get_history(ticker, period, interval='1d')
             
             if hist.empty:
                 return None
             
-            # Try to get currency from meta
-            meta = stock.history_metadata
-            currency = meta.get('currency', 'USD') if meta else 'USD'
+            # Try to get currency from the quote snapshot
+            fast_info = StockDataService._get_fast_info(ticker)
+            currency = (fast_info or {}).get('currency') or 'USD'
             
+            ind = StockDataService._get_indicators(ticker, period, hist)
+            overlay = ('sma_20', 'sma_50', 'bb_upper', 'bb_lower', 'rsi_14', 'macd', 'macd_signal', 'macd_hist')
+
             dates = hist.index.strftime('%Y-%m-%d').tolist()
             return {
                 'dates': dates,
@@ -175,8 +295,48 @@ class StockDataService:
                 'high': hist['High'].round(2).tolist(),
                 'low': hist['Low'].round(2).tolist(),
                 'close': hist['Close'].round(2).tolist(),
-                'volume': hist['Volume'].tolist()
+                'volume': hist['Volume'].tolist(),
+                'indicators': {name: _series(ind[name]) for name in overlay},
             }
         except Exception as e:
             print(f"Error fetching history for {ticker}: {e}")
             return None
+
+    @staticmethod
+    def get_live_indicators(ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        Indicators for the latest quote from persisted streaming state.
+        Completed daily bars are folded in once (O(1) each); the current
+        session is evaluated as a preview at the live price. Volatility and
+        drawdown accumulate from the first seeded bar.
+        """
+        ticker = StockDataService.resolve_ticker(ticker)
+        try:
+            hist = StockDataService._get_history(ticker, '1y')
+            if hist.empty:
+                return None
+
+            last = hist.iloc[-1]
+            fast_info = StockDataService._get_fast_info(ticker) or {}
+            price = fast_info.get('last_price') or float(last['Close'])
+
+            # Concurrent requests share the state object; fold each bar exactly once
+            with streaming_store.symbol_lock(ticker):
+                state = streaming_store.load(ticker)
+                state, added = seed_from_history(hist, state, skip_last=True)
+                if added:
+                    streaming_store.save(ticker, state)
+                values = state.preview(
+                    price,
+                    high=max(float(last['High']), price),
+                    low=min(float(last['Low']), price),
+                    volume=float(last['Volume']),
+                )
+            return {
+                'symbol': ticker,
+                'as_of': hist.index[-1].strftime('%Y-%m-%d'),
+                'indicators': {k: (round(v, 4) if isinstance(v, float) else v) for k, v in values.items()},
+            }
+        except Exception as e:
+            print(f"Error computing live indicators for {ticker}: {e}")
+            return None
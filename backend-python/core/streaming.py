@@ -0,0 +1,328 @@
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from core.indicators import (
+    ATR_PERIOD,
+    BOLLINGER_K,
+    BOLLINGER_WINDOW,
+    MACD_FAST,
+    MACD_SIGNAL,
+    MACD_SLOW,
+    RSI_PERIOD,
+    TRADING_DAYS,
+)
+
+STATE_DIR = os.getenv(
+    'STREAMING_STATE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'streaming'),
+)
+
+SMA_WINDOWS = (20, 50)
+EMA_SPANS = (MACD_FAST, MACD_SLOW)
+STATE_VERSION = 1
+# Running SMA sums are re-summed from the ring this often to cancel float drift
+RESUM_EVERY = 1000
+
+
+class StreamingIndicators:
+    """
+    Incremental indicator state for one symbol.
+
+    Each completed bar is folded in with `update()` in O(1) time; memory is
+    bounded by the longest SMA window (one ring buffer of closes). Running
+    SMA/EMA, Wilder RSI and ATR, MACD, Bollinger Bands via windowed Welford,
+    volatility via cumulative Welford over returns and running max drawdown
+    follow the same definitions as `compute_indicators` and
+    `StockDataService`, so a state seeded from the same bars matches the
+    batch numbers. `preview()` evaluates an in-progress bar (a tick) without
+    mutating the state. `to_dict()`/`from_dict()` round-trip through JSON.
+    """
+
+    def __init__(self):
+        self.bars = 0
+        self.last_date: Optional[str] = None
+        self.last_close: Optional[float] = None
+        self.window = max(SMA_WINDOWS + (BOLLINGER_WINDOW,))
+        self.ring = [0.0] * self.window
+        self.pos = 0  # next write slot in the ring
+        self.sums = {w: 0.0 for w in SMA_WINDOWS}
+        self.emas: Dict[int, Optional[float]] = {span: None for span in EMA_SPANS}
+        self.macd_signal: Optional[float] = None
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+        self.atr: Optional[float] = None
+        self.obv = 0.0
+        # Bollinger: Welford over the last BOLLINGER_WINDOW closes
+        self.bb_mean = 0.0
+        self.bb_m2 = 0.0
+        # Volatility: Welford over every daily return seen
+        self.ret_n = 0
+        self.ret_mean = 0.0
+        self.ret_m2 = 0.0
+        # Drawdown on closes (same as cumulative-return drawdown)
+        self.peak: Optional[float] = None
+        self.max_drawdown = 0.0
+
+    # -- updates ------------------------------------------------------------
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None,
+               volume: float = 0.0, date: Optional[str] = None) -> Dict[str, Optional[float]]:
+        """Fold in a completed bar and return the indicator values after it"""
+        state = self._step(float(close), high, low, float(volume or 0.0))
+        self._commit(float(close), state)
+        if date is not None:
+            self.last_date = date
+        return self.values()
+
+    def preview(self, price: float, high: Optional[float] = None, low: Optional[float] = None,
+                volume: float = 0.0) -> Dict[str, Optional[float]]:
+        """Indicator values if the current bar closed at `price` (state is not changed)"""
+        state = self._step(float(price), high, low, float(volume or 0.0))
+        return self._values(state, float(price))
+
+    def _leaving(self, window: int) -> Optional[float]:
+        """Close that drops out of a `window`-bar average when the next bar arrives"""
+        if self.bars < window:
+            return None
+        return self.ring[(self.pos - window) % self.window]
+
+    def _step(self, close: float, high: Optional[float], low: Optional[float], volume: float) -> Dict[str, Any]:
+        high = close if high is None else float(high)
+        low = close if low is None else float(low)
+        prev = self.last_close
+        s: Dict[str, Any] = {'bars': self.bars + 1}
+
+        s['sums'] = {}
+        for w in SMA_WINDOWS:
+            leaving = self._leaving(w)
+            s['sums'][w] = self.sums[w] + close - (leaving or 0.0)
+
+        s['emas'] = {}
+        for span, value in self.emas.items():
+            alpha = 2.0 / (span + 1)
+            s['emas'][span] = close if value is None else value + alpha * (close - value)
+        macd = s['emas'][MACD_FAST] - s['emas'][MACD_SLOW]
+        alpha = 2.0 / (MACD_SIGNAL + 1)
+        s['macd_signal'] = macd if self.macd_signal is None else self.macd_signal + alpha * (macd - self.macd_signal)
+
+        s['avg_gain'], s['avg_loss'] = self.avg_gain, self.avg_loss
+        s['obv'] = self.obv
+        if prev is not None:
+            change = close - prev
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            a = 1.0 / RSI_PERIOD
+            s['avg_gain'] = gain if self.avg_gain is None else self.avg_gain + a * (gain - self.avg_gain)
+            s['avg_loss'] = loss if self.avg_loss is None else self.avg_loss + a * (loss - self.avg_loss)
+            s['obv'] = self.obv + (volume if change > 0 else -volume if change < 0 else 0.0)
+
+        true_range = high - low
+        if prev is not None:
+            true_range = max(true_range, abs(high - prev), abs(low - prev))
+        a = 1.0 / ATR_PERIOD
+        s['atr'] = true_range if self.atr is None else self.atr + a * (true_range - self.atr)
+
+        # Windowed Welford: add while filling, then swap the oldest close out
+        leaving = self._leaving(BOLLINGER_WINDOW)
+        if leaving is None:
+            n = self.bars + 1
+            delta = close - self.bb_mean
+            mean = self.bb_mean + delta / n
+            m2 = self.bb_m2 + delta * (close - mean)
+        else:
+            mean = self.bb_mean + (close - leaving) / BOLLINGER_WINDOW
+            m2 = self.bb_m2 + (close - leaving) * (close - mean + leaving - self.bb_mean)
+        s['bb_mean'], s['bb_m2'] = mean, max(m2, 0.0)
+
+        s['ret_n'], s['ret_mean'], s['ret_m2'] = self.ret_n, self.ret_mean, self.ret_m2
+        if prev:
+            r = close / prev - 1.0
+            n = self.ret_n + 1
+            delta = r - self.ret_mean
+            mean = self.ret_mean + delta / n
+            s['ret_n'], s['ret_mean'], s['ret_m2'] = n, mean, self.ret_m2 + delta * (r - mean)
+
+        peak = close if self.peak is None else max(self.peak, close)
+        s['peak'] = peak
+        s['max_drawdown'] = min(self.max_drawdown, close / peak - 1.0)
+        return s
+
+    def _commit(self, close: float, s: Dict[str, Any]) -> None:
+        self.ring[self.pos] = close
+        self.pos = (self.pos + 1) % self.window
+        self.last_close = close
+        self._apply(s)
+        if self.bars % RESUM_EVERY == 0:
+            for w in SMA_WINDOWS:
+                self.sums[w] = sum(self.ring[(self.pos - i) % self.window] for i in range(1, w + 1))
+
+    def _apply(self, s: Dict[str, Any]) -> None:
+        self.bars = s['bars']
+        self.sums = s['sums']
+        self.emas = s['emas']
+        self.macd_signal = s['macd_signal']
+        self.avg_gain, self.avg_loss = s['avg_gain'], s['avg_loss']
+        self.atr = s['atr']
+        self.obv = s['obv']
+        self.bb_mean, self.bb_m2 = s['bb_mean'], s['bb_m2']
+        self.ret_n, self.ret_mean, self.ret_m2 = s['ret_n'], s['ret_mean'], s['ret_m2']
+        self.peak, self.max_drawdown = s['peak'], s['max_drawdown']
+
+    # -- read-out -----------------------------------------------------------
+
+    def values(self) -> Dict[str, Optional[float]]:
+        if self.bars == 0:
+            return {}
+        return self._values(self._snapshot(), self.last_close)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            'bars': self.bars, 'sums': self.sums, 'emas': self.emas, 'macd_signal': self.macd_signal,
+            'avg_gain': self.avg_gain, 'avg_loss': self.avg_loss, 'atr': self.atr, 'obv': self.obv,
+            'bb_mean': self.bb_mean, 'bb_m2': self.bb_m2, 'ret_n': self.ret_n, 'ret_mean': self.ret_mean,
+            'ret_m2': self.ret_m2, 'peak': self.peak, 'max_drawdown': self.max_drawdown,
+        }
+
+    @staticmethod
+    def _values(s: Dict[str, Any], close: float) -> Dict[str, Optional[float]]:
+        bars = s['bars']
+        out: Dict[str, Optional[float]] = {'close': close, 'bars': bars}
+        for w in SMA_WINDOWS:
+            out[f'sma_{w}'] = s['sums'][w] / w if bars >= w else None
+        for span in EMA_SPANS:
+            out[f'ema_{span}'] = s['emas'][span]
+        macd = s['emas'][MACD_FAST] - s['emas'][MACD_SLOW]
+        out['macd'] = macd
+        out['macd_signal'] = s['macd_signal']
+        out['macd_hist'] = macd - s['macd_signal']
+
+        if s['avg_gain'] is None:
+            out[f'rsi_{RSI_PERIOD}'] = None
+        elif s['avg_loss'] == 0:
+            out[f'rsi_{RSI_PERIOD}'] = 100.0
+        else:
+            out[f'rsi_{RSI_PERIOD}'] = 100.0 - 100.0 / (1.0 + s['avg_gain'] / s['avg_loss'])
+
+        if bars >= BOLLINGER_WINDOW:
+            band = BOLLINGER_K * math.sqrt(s['bb_m2'] / BOLLINGER_WINDOW)
+            out['bb_upper'] = s['bb_mean'] + band
+            out['bb_lower'] = s['bb_mean'] - band
+        else:
+            out['bb_upper'] = out['bb_lower'] = None
+
+        out[f'atr_{ATR_PERIOD}'] = s['atr']
+        out['obv'] = s['obv']
+        out['volatility'] = (
+            math.sqrt(s['ret_m2'] / (s['ret_n'] - 1)) * math.sqrt(TRADING_DAYS) * 100 if s['ret_n'] > 1 else 0.0
+        )
+        out['max_drawdown'] = s['max_drawdown'] * 100
+        return out
+
+    # -- persistence --------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self._snapshot()
+        data.update({
+            'version': STATE_VERSION,
+            'last_date': self.last_date,
+            'last_close': self.last_close,
+            'ring': self.ring,
+            'pos': self.pos,
+            # JSON object keys are strings
+            'sums': {str(k): v for k, v in self.sums.items()},
+            'emas': {str(k): v for k, v in self.emas.items()},
+        })
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingIndicators':
+        if data.get('version') != STATE_VERSION:
+            raise ValueError(f"Unsupported streaming state version: {data.get('version')}")
+        state = cls()
+        if len(data['ring']) != state.window:
+            raise ValueError("Streaming state window does not match this build")
+        state._apply(dict(
+            data,
+            sums={int(k): v for k, v in data['sums'].items()},
+            emas={int(k): v for k, v in data['emas'].items()},
+        ))
+        state.last_close = data['last_close']
+        state.ring = list(data['ring'])
+        state.pos = data['pos']
+        state.last_date = data.get('last_date')
+        return state
+
+
+class StreamingStateStore:
+    """
+    JSON files holding one StreamingIndicators state per symbol.
+    States are shared and updated in place, so a caller folding bars into
+    one holds `symbol_lock(symbol)` from load to save.
+    """
+
+    def __init__(self, root: str = STATE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._live: Dict[str, StreamingIndicators] = {}
+        self._symbol_locks: Dict[str, threading.Lock] = {}
+
+    def symbol_lock(self, symbol: str) -> threading.Lock:
+        """Lock serializing load/update/save of one symbol's state"""
+        with self._lock:
+            return self._symbol_locks.setdefault(symbol, threading.Lock())
+
+    def _path(self, symbol: str) -> str:
+        safe = symbol.replace('/', '_').replace('^', '_idx_')
+        return os.path.join(self.root, f"{safe}.json")
+
+    def load(self, symbol: str) -> Optional[StreamingIndicators]:
+        with self._lock:
+            if symbol in self._live:
+                return self._live[symbol]
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                state = StreamingIndicators.from_dict(json.load(f))
+        except Exception as e:
+            print(f"Streaming state for {symbol} is unreadable, reseeding: {e}")
+            return None
+        with self._lock:
+            self._live[symbol] = state
+        return state
+
+    def save(self, symbol: str, state: StreamingIndicators) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(symbol)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(state.to_dict(), f)
+        os.replace(tmp, path)
+        with self._lock:
+            self._live[symbol] = state
+
+
+def seed_from_history(hist, state: Optional[StreamingIndicators] = None,
+                      skip_last: bool = False) -> Tuple[StreamingIndicators, int]:
+    """
+    Fold every bar of a daily frame newer than the state's last date into it.
+    With `skip_last`, the final (possibly still trading) bar is left out.
+    """
+    state = state or StreamingIndicators()
+    if skip_last:
+        hist = hist.iloc[:-1]
+    dates = hist.index.strftime('%Y-%m-%d')
+    added = 0
+    for date, h, l, c, v in zip(dates, hist['High'], hist['Low'], hist['Close'], hist['Volume']):
+        if state.last_date is not None and date <= state.last_date:
+            continue
+        state.update(c, h, l, v, date=date)
+        added += 1
+    return state, added
+
+
+# Process-wide instance
+streaming_store = StreamingStateStore()
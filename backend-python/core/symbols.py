@@ -0,0 +1,156 @@
+import bisect
+import csv
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+SYMBOLS_DIR = os.getenv(
+    'SYMBOLS_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'symbols'),
+)
+
+# Exchange listing files, in resolution priority order (Indian context first).
+# Each maps to the Yahoo suffix appended to a bare symbol.
+EXCHANGES: List[Tuple[str, str, str]] = [
+    ('NSE', 'nse.csv', '.NS'),
+    ('US', 'us.csv', ''),
+    ('BSE', 'bse.csv', '.BO'),
+]
+
+# Header aliases so full exchange dumps (NSE EQUITY_L.csv, nasdaqtrader
+# symbol directories, ...) can be dropped in without conversion.
+SYMBOL_COLUMNS = ('symbol', 'SYMBOL', 'Symbol', 'ACT Symbol', 'Security Code')
+NAME_COLUMNS = ('name', 'NAME OF COMPANY', 'Security Name', 'Company Name', 'Issuer Name')
+
+
+class SymbolMaster:
+    """
+    Offline symbol master built from bundled exchange listing files.
+    Exact lookups are a dict probe (O(len(symbol))); prefix search walks a
+    sorted key array with bisect, so neither path does any I/O.
+    """
+
+    def __init__(self, symbols_dir: str = SYMBOLS_DIR):
+        self.symbols_dir = symbols_dir
+        # symbol -> tuple of exchange indices it is listed on, in priority order
+        self._exchanges: Dict[str, Tuple[int, ...]] = {}
+        self._names: Dict[Tuple[str, int], str] = {}
+        self._sorted_symbols: List[str] = []
+        self._sorted_names: List[Tuple[str, str, int]] = []
+        self._load()
+
+    def _load(self) -> None:
+        listings: Dict[str, List[int]] = {}
+        for idx, (exchange, filename, _) in enumerate(EXCHANGES):
+            path = os.path.join(self.symbols_dir, filename)
+            if not os.path.exists(path):
+                continue
+            try:
+                for symbol, name in self._read_listing(path):
+                    listings.setdefault(symbol, []).append(idx)
+                    self._names[(symbol, idx)] = name
+            except Exception as e:
+                print(f"Error loading {exchange} symbol list from {path}: {e}")
+
+        self._exchanges = {symbol: tuple(sorted(set(idxs))) for symbol, idxs in listings.items()}
+        self._sorted_symbols = sorted(self._exchanges)
+        self._sorted_names = sorted(
+            (name.lower(), symbol, idx) for (symbol, idx), name in self._names.items() if name
+        )
+
+    @staticmethod
+    def _read_listing(path: str):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            header = f.readline()
+            f.seek(0)
+            reader = csv.DictReader(f, delimiter='|' if '|' in header else ',')
+            fields = [c.strip() for c in (reader.fieldnames or [])]
+            reader.fieldnames = fields
+            symbol_col = next((c for c in SYMBOL_COLUMNS if c in fields), None)
+            name_col = next((c for c in NAME_COLUMNS if c in fields), None)
+            if symbol_col is None:
+                raise ValueError(f"no symbol column in {fields}")
+            for row in reader:
+                symbol = (row.get(symbol_col) or '').strip().upper()
+                if not symbol or symbol.startswith('FILE CREATION'):
+                    continue
+                yield symbol, (row.get(name_col) or '').strip() if name_col else ''
+
+    def __len__(self) -> int:
+        return len(self._sorted_symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._exchanges
+
+    def resolve(self, symbol: str) -> Optional[str]:
+        """Yahoo ticker for a bare symbol, or None if the master doesn't list it"""
+        idxs = self._exchanges.get(symbol.upper().strip())
+        if not idxs:
+            return None
+        return f"{symbol.upper().strip()}{EXCHANGES[idxs[0]][2]}"
+
+    def tickers(self, exchange: Optional[str] = None) -> List[str]:
+        """Yahoo tickers of every listing on exchange (all exchanges when None)"""
+        wanted = {i for i, (name, _, _) in enumerate(EXCHANGES) if exchange is None or name == exchange.upper()}
+        return [
+            f"{symbol}{EXCHANGES[idx][2]}"
+            for symbol in self._sorted_symbols
+            for idx in self._exchanges[symbol]
+            if idx in wanted
+        ]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Autocomplete by symbol prefix first, then by company-name prefix"""
+        query = query.strip()
+        if not query:
+            return []
+
+        results: List[Dict[str, Any]] = []
+        seen = set()
+
+        prefix = query.upper()
+        pos = bisect.bisect_left(self._sorted_symbols, prefix)
+        while pos < len(self._sorted_symbols) and len(results) < limit:
+            symbol = self._sorted_symbols[pos]
+            if not symbol.startswith(prefix):
+                break
+            for idx in self._exchanges[symbol]:
+                results.append(self._entry(symbol, idx))
+                seen.add((symbol, idx))
+            pos += 1
+
+        name_prefix = query.lower()
+        pos = bisect.bisect_left(self._sorted_names, (name_prefix,))
+        while pos < len(self._sorted_names) and len(results) < limit:
+            name, symbol, idx = self._sorted_names[pos]
+            if not name.startswith(name_prefix):
+                break
+            if (symbol, idx) not in seen:
+                results.append(self._entry(symbol, idx))
+                seen.add((symbol, idx))
+            pos += 1
+
+        return results[:limit]
+
+    def _entry(self, symbol: str, idx: int) -> Dict[str, Any]:
+        exchange, _, suffix = EXCHANGES[idx]
+        return {
+            'symbol': symbol,
+            'name': self._names.get((symbol, idx), ''),
+            'exchange': exchange,
+            'ticker': f"{symbol}{suffix}",
+        }
+
+
+_master: Optional[SymbolMaster] = None
+_master_lock = threading.Lock()
+
+
+def get_symbol_master() -> SymbolMaster:
+    """Lazily built process-wide symbol master"""
+    global _master
+    if _master is None:
+        with _master_lock:
+            if _master is None:
+                _master = SymbolMaster()
+    return _master
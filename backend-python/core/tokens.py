@@ -0,0 +1,138 @@
+import json
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+# Token budget for the sub-agent summaries embedded in the Advisor prompts
+ADVISOR_SUMMARY_BUDGET = int(os.getenv('ADVISOR_SUMMARY_BUDGET', '2000'))
+# Significant digits kept for floats in compacted metric payloads
+METRIC_DIGITS = int(os.getenv('PROMPT_METRIC_DIGITS', '4'))
+
+# Average characters per token by provider tokenizer (English prose + JSON)
+CHARS_PER_TOKEN = {
+    'openai': 4.0,
+    'anthropic': 3.5,
+    'google': 4.0,
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Shorter keys for the metric payloads; still readable for the model
+KEY_ABBREVIATIONS = {
+    'current_price': 'price',
+    'pe_ratio': 'pe',
+    'forward_pe': 'fwd_pe',
+    'peg_ratio': 'peg',
+    'price_to_book': 'pb',
+    'debt_to_equity': 'de',
+    'profit_margin': 'margin',
+    'revenue_growth': 'rev_growth',
+    'earnings_growth': 'eps_growth',
+    'dividend_yield': 'div_yield',
+    'price_change_1w': 'chg_1w',
+    'price_change_1m': 'chg_1m',
+    'volume_vs_20d_avg': 'vol_vs_20d',
+    'max_drawdown': 'max_dd',
+    'sharpe_ratio': 'sharpe',
+    'volatility': 'vol',
+}
+
+SENTENCE = re.compile(r'(?<=[.!?])\s+|\n+')
+
+_tiktoken_encoding = None
+
+
+def _openai_encoding():
+    """tiktoken's cl100k encoding when the optional package is installed"""
+    global _tiktoken_encoding
+    if _tiktoken_encoding is None:
+        try:
+            import tiktoken
+            _tiktoken_encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception:
+            _tiktoken_encoding = False
+    return _tiktoken_encoding or None
+
+
+def estimate_tokens(text: str, provider: str = 'openai') -> int:
+    """Token count for text under the provider's tokenizer (exact for OpenAI with tiktoken)"""
+    if not text:
+        return 0
+    if provider == 'openai':
+        encoding = _openai_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text))
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN)))
+
+
+def token_usage(provider: str, system_prompt: str, user_prompt: str, completion: Optional[str]) -> Dict[str, int]:
+    prompt = estimate_tokens(system_prompt, provider) + estimate_tokens(user_prompt, provider)
+    return {'prompt': prompt, 'completion': estimate_tokens(completion or '', provider)}
+
+
+def _compact(value: Any, digits: int) -> Any:
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        return float(f"{value:.{digits}g}")
+    if isinstance(value, dict):
+        return {
+            KEY_ABBREVIATIONS.get(k, k): _compact(v, digits)
+            for k, v in value.items()
+            if v is not None
+        }
+    if isinstance(value, (list, tuple)):
+        return [_compact(v, digits) for v in value]
+    return value
+
+
+def compact_metrics(metrics: Dict[str, Any], digits: int = METRIC_DIGITS) -> str:
+    """Minified JSON for a prompt: short keys, rounded floats, no nulls or whitespace"""
+    return json.dumps(_compact(metrics, digits), separators=(',', ':'), default=str)
+
+
+def summarize(text: str, max_tokens: int, provider: str = 'openai') -> str:
+    """
+    Extractive shortening to max_tokens: keeps whole sentences, preferring
+    the opening one and those carrying numbers, in their original order.
+    """
+    if estimate_tokens(text, provider) <= max_tokens:
+        return text
+    sentences = [s.strip() for s in SENTENCE.split(text) if s.strip()]
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: (i != 0, not re.search(r'\d', sentences[i]), i),
+    )
+    keep: List[int] = []
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i], provider) + 1
+        if used + cost > max_tokens:
+            continue
+        keep.append(i)
+        used += cost
+    if not keep:
+        # A single sentence over budget: hard cut
+        limit = int(max_tokens * CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN))
+        return text[:max(limit - 1, 0)].rstrip() + '…'
+    return ' '.join(sentences[i] for i in sorted(keep)) + ' …'
+
+
+def fit_to_budget(sections: Dict[str, str], budget: int, provider: str = 'openai') -> Dict[str, str]:
+    """
+    Shrink the sections so their total stays within budget tokens. Short
+    sections are kept whole and the remaining budget is shared evenly by
+    the long ones.
+    """
+    sizes = {name: estimate_tokens(text, provider) for name, text in sections.items()}
+    if sum(sizes.values()) <= budget:
+        return dict(sections)
+    fitted = {}
+    remaining = budget
+    # Smallest first, so a short section's unused share goes to the longer ones
+    order = sorted(sections, key=sizes.get)
+    for position, name in enumerate(order):
+        share = remaining // (len(order) - position)
+        fitted[name] = sections[name] if sizes[name] <= share else summarize(sections[name], share, provider)
+        remaining -= min(sizes[name], share)
+    return {name: fitted[name] for name in sections}
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+# One market panel refresher per server, started by the master next to the
+# workers; workers only map what it publishes (see core/shared_panel.py).
+PANEL_REFRESHER = os.getenv('PANEL_REFRESHER', '1') == '1'
+
+_refresher = None
+
+
+def when_ready(server):
+    global _refresher
+    if PANEL_REFRESHER:
+        _refresher = subprocess.Popen(
+            [sys.executable, '-m', 'core.shared_panel'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        server.log.info(f"Market panel refresher started (pid {_refresher.pid})")
+
+
+def on_exit(server):
+    if _refresher is not None and _refresher.poll() is None:
+        _refresher.terminate()
+        try:
+            _refresher.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _refresher.kill()
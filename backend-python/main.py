@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api import agent
+from core.llm_clients import llm_clients
+from core.http_client import http_client
 
 app = FastAPI(title="StockAI Agents API")
 
@@ -16,6 +18,11 @@ app.add_middleware(
 # Include routes
 app.include_router(agent.router, prefix="/agent", tags=["Agents"])
 
+@app.on_event("shutdown")
+async def close_http_clients():
+    await llm_clients.aclose()
+    await http_client.aclose()
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "message": "Python AI Agent service is running"}
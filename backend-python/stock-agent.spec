@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('data/symbols', 'data/symbols')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend-python'))
+from core.cache import snapshot_cache
+from core.indicators import compute_indicators
+from core.stock_data import StockDataService
+from core.streaming import StreamingIndicators, seed_from_history
+
+TOLERANCE = 1e-6
+
+
+def synthetic_history(bars=252, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.01, bars))
+    return pd.DataFrame({
+        'Open': close,
+        'High': close * (1 + spread),
+        'Low': close * (1 - spread),
+        'Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, bars).astype(float),
+    }, index=pd.bdate_range(end='2026-01-23', periods=bars))
+
+
+def check(name, streaming, batch):
+    if streaming is None or batch is None:
+        ok = streaming is None and batch is None
+    else:
+        ok = abs(streaming - batch) <= TOLERANCE * max(1.0, abs(batch))
+    status = "SUCCESS" if ok else "FAIL"
+    print(f"  [{status}] {name:<12} streaming={streaming!r:<24} batch={batch!r}")
+    return ok
+
+
+def main():
+    hist = synthetic_history()
+    symbol = "SYNTH.NS"
+    # Prime the snapshot cache so StockDataService runs its batch path on the synthetic bars
+    snapshot_cache.set(snapshot_cache.make_key(symbol, 'history', '1y', '1d'), hist)
+    snapshot_cache.set(snapshot_cache.make_key(symbol, 'info'), {'beta': 1.0})
+
+    state, _ = seed_from_history(hist)
+    live = state.values()
+
+    ind = compute_indicators(hist['Close'].values, hist['High'].values, hist['Low'].values, hist['Volume'].values)
+    tech = StockDataService.get_technical_metrics(symbol, '1y')
+    risk = StockDataService.get_risk_metrics(symbol)
+
+    print("Streaming vs batch indicators:")
+    results = [check(name, live[name], float(ind[name][-1])) for name in (
+        'sma_20', 'sma_50', 'ema_12', 'ema_26', 'macd', 'macd_signal', 'macd_hist',
+        'rsi_14', 'bb_upper', 'bb_lower', 'atr_14', 'obv',
+    )]
+    print("Streaming vs StockDataService (rounded to 2dp):")
+    results.append(check('volatility', round(live['volatility'], 2), tech['volatility']))
+    results.append(check('max_drawdown', round(live['max_drawdown'], 2), risk['max_drawdown']))
+
+    print("Serialization round-trip and tick preview:")
+    restored = StreamingIndicators.from_dict(state.to_dict())
+    results.append(check('restored rsi', restored.values()['rsi_14'], live['rsi_14']))
+    tick = 1.01 * hist['Close'].iloc[-1]
+    preview = restored.preview(tick)
+    committed = StreamingIndicators.from_dict(state.to_dict())
+    results.append(check('preview ema', preview['ema_12'], committed.update(tick)['ema_12']))
+    results.append(check('unchanged', restored.values()['ema_12'], live['ema_12']))
+
+    print("\nAll checks passed" if all(results) else "\nSome checks FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
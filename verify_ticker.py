@@ -1,5 +1,10 @@
+import os
+import sys
 import yfinance as yf
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend-python'))
+from core.symbols import get_symbol_master
+
 def check_ticker(symbol):
     print(f"Checking {symbol}...")
     try:
@@ -16,6 +21,12 @@ def check_ticker(symbol):
 def resolve(symbol):
     if "." in symbol:
         return symbol
+
+    # Offline symbol master first (no network)
+    resolved = get_symbol_master().resolve(symbol)
+    if resolved:
+        print(f"  [MASTER] {symbol} -> {resolved}")
+        return resolved
         
     # Prioritize India
     indian = f"{symbol}.NS"
@@ -30,3 +41,4 @@ def resolve(symbol):
 
 print("Resolution for TCS:", resolve("TCS"))
 print("Resolution for AAPL:", resolve("AAPL"))
+print("Resolution for 500325:", resolve("500325"))